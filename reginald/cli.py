@@ -24,6 +24,36 @@ HELP_TEXT = {
     "chunk_size": "Chunk size for the model (ignored if not using llama-index).",
     "chunk_overlap_ratio": "Chunk overlap ratio for the model (ignored if not using llama-index).",
     "num_output": "Number of outputs to generate (ignored if not using llama-index).",
+    "ann_index": "Approximate nearest neighbour index to use for retrieval ('none' or 'ivf') (ignored if not using llama-index).",
+    "ann_n_probe": "Number of IVF lists to search if using an 'ivf' ANN index (ignored if not using llama-index).",
+    "embedding_backend": "Backend to embed queries with ('torch' or 'int8', which is dynamically quantized and faster on CPU) (ignored if not using llama-index).",
+    "query_batch_size": "Maximum number of queries of concurrent requests to embed together (1, the default, embeds each query on its own) (ignored if not using llama-index).",
+    "query_batch_wait_ms": "Maximum time in milliseconds to wait for the queries of other requests to embed together with a query (ignored if not using llama-index).",
+    "query_cache_size": "Maximum number of message embeddings, and of sets of nodes retrieved for a message, to cache (0, the default, disables the cache) (ignored if not using llama-index).",
+    "query_cache_ttl": "Time in seconds after which cached message embeddings and retrieved nodes expire (0 for no expiry) (ignored if not using llama-index).",
+    "response_cache": "Cache of the responses to messages in query mode ('none', 'memory' or 'sqlite') (ignored if not using llama-index).",
+    "response_cache_size": "Maximum number of responses to cache (ignored if not using llama-index).",
+    "semantic_cache_threshold": "Smallest cosine similarity between the embeddings of a message and a previous message to reuse the response to it in query mode (0 disables the semantic cache) (ignored if not using llama-index).",
+    "n_queries": "Number of nodes of the index to use the start of as queries.",
+    "ann_n_lists": "Number of lists in the IVF index if building an 'ivf' ANN index. Default is 4 * sqrt(number of nodes).",
+    "vector_store_format": "Format to save the index vector store in ('json' or 'memmap').",
+    "quantization": "Precision to save the embeddings in ('none', 'float16', 'int8' or 'binary'). Requires the 'memmap' vector store format.",
+    "resume": "Whether to resume an interrupted build of a new index from its checkpoints, skipping the sources and batches of documents which were completed.",
+    "composite": "Whether to build each source of the index into an index of its own, shared between indices, and save the index as a composite of these source indices.",
+    "save_snapshots": "Whether to save a snapshot of the documents loaded from each source, from which the index can be rebuilt with --from-snapshot (requires pyarrow, from the 'snapshots' extra).",
+    "from_snapshot": "Whether to load the sources of the index from the snapshots saved with --save-snapshots when they were last loaded, without fetching anything (requires pyarrow, from the 'snapshots' extra).",
+    "allow_partial": "Whether to replace the existing index with a new index missing sources which failed to load, rather than keeping the existing index.",
+    "incremental": "Whether to update the existing index, only embedding new or changed documents and removing deleted ones, rather than building a new index.",
+    "embedding_cache_size": "Maximum number of chunk embeddings to keep in the embedding cache shared between index builds (0, the default, disables the cache).",
+    "loader_workers": "Number of data sources to load concurrently when creating an index.",
+    "github_concurrent_requests": "Number of concurrent requests each GitHub repository or issues reader makes when creating an index.",
+    "build_batch_size": "Number of documents to chunk and embed at a time when creating a new index.",
+    "build_workers": "Number of processes to chunk and embed documents in when creating a new index.",
+    "shard": "Number of the shard to build, as a partial index to combine with the others using 'reginald merge_shards', rather than the whole index.",
+    "num_shards": "Number of shards to split the documents of the index between by a hash of their IDs (requires --shard).",
+    "sources": "Comma separated sources of the index to load into the shard (requires --shard). Default is all of them.",
+    "github_loader": "How to load GitHub repositories when creating an index ('api', the default, to request each file from the GitHub API or 'archive' to download each repo as one tarball).",
+    "docstore_format": "Format to save the index docstore in ('json' or 'sqlite').",
     "is_path": "Whether the data is a path (ignored if not using llama-index-llama-cpp).",
     "n_gpu_layers": "Number of GPU layers to use (ignored if not using llama-index).",
     "device": "Device to use (ignored if not using llama-index).",
@@ -126,6 +156,65 @@ def run_all(
     device: Annotated[
         str, typer.Option(envvar="LLAMA_INDEX_DEVICE", help=HELP_TEXT["device"])
     ] = DEFAULT_ARGS["device"],
+    ann_index: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_ANN_INDEX", help=HELP_TEXT["ann_index"]),
+    ] = DEFAULT_ARGS["ann_index"],
+    ann_n_probe: Annotated[
+        int,
+        typer.Option(envvar="LLAMA_INDEX_ANN_N_PROBE", help=HELP_TEXT["ann_n_probe"]),
+    ] = DEFAULT_ARGS["ann_n_probe"],
+    embedding_backend: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_EMBEDDING_BACKEND", help=HELP_TEXT["embedding_backend"]
+        ),
+    ] = DEFAULT_ARGS["embedding_backend"],
+    query_batch_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_BATCH_SIZE", help=HELP_TEXT["query_batch_size"]
+        ),
+    ] = DEFAULT_ARGS["query_batch_size"],
+    query_batch_wait_ms: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_BATCH_WAIT_MS",
+            help=HELP_TEXT["query_batch_wait_ms"],
+        ),
+    ] = DEFAULT_ARGS["query_batch_wait_ms"],
+    query_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_CACHE_SIZE", help=HELP_TEXT["query_cache_size"]
+        ),
+    ] = DEFAULT_ARGS["query_cache_size"],
+    query_cache_ttl: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_CACHE_TTL", help=HELP_TEXT["query_cache_ttl"]
+        ),
+    ] = DEFAULT_ARGS["query_cache_ttl"],
+    response_cache: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_RESPONSE_CACHE", help=HELP_TEXT["response_cache"]
+        ),
+    ] = DEFAULT_ARGS["response_cache"],
+    response_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_RESPONSE_CACHE_SIZE",
+            help=HELP_TEXT["response_cache_size"],
+        ),
+    ] = DEFAULT_ARGS["response_cache_size"],
+    semantic_cache_threshold: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_SEMANTIC_CACHE_THRESHOLD",
+            help=HELP_TEXT["semantic_cache_threshold"],
+        ),
+    ] = DEFAULT_ARGS["semantic_cache_threshold"],
 ) -> None:
     """
     Run all the components of the Reginald slack bot.
@@ -151,6 +240,16 @@ def run_all(
         is_path=is_path,
         n_gpu_layers=n_gpu_layers,
         device=device,
+        ann_index=ann_index,
+        ann_n_probe=ann_n_probe,
+        embedding_backend=embedding_backend,
+        query_batch_size=query_batch_size,
+        query_batch_wait_ms=query_batch_wait_ms,
+        query_cache_size=query_cache_size,
+        query_cache_ttl=query_cache_ttl,
+        response_cache=response_cache,
+        response_cache_size=response_cache_size,
+        semantic_cache_threshold=semantic_cache_threshold,
     )
 
 
@@ -263,6 +362,65 @@ def app(
     device: Annotated[
         str, typer.Option(envvar="LLAMA_INDEX_DEVICE", help=HELP_TEXT["device"])
     ] = DEFAULT_ARGS["device"],
+    ann_index: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_ANN_INDEX", help=HELP_TEXT["ann_index"]),
+    ] = DEFAULT_ARGS["ann_index"],
+    ann_n_probe: Annotated[
+        int,
+        typer.Option(envvar="LLAMA_INDEX_ANN_N_PROBE", help=HELP_TEXT["ann_n_probe"]),
+    ] = DEFAULT_ARGS["ann_n_probe"],
+    embedding_backend: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_EMBEDDING_BACKEND", help=HELP_TEXT["embedding_backend"]
+        ),
+    ] = DEFAULT_ARGS["embedding_backend"],
+    query_batch_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_BATCH_SIZE", help=HELP_TEXT["query_batch_size"]
+        ),
+    ] = DEFAULT_ARGS["query_batch_size"],
+    query_batch_wait_ms: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_BATCH_WAIT_MS",
+            help=HELP_TEXT["query_batch_wait_ms"],
+        ),
+    ] = DEFAULT_ARGS["query_batch_wait_ms"],
+    query_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_CACHE_SIZE", help=HELP_TEXT["query_cache_size"]
+        ),
+    ] = DEFAULT_ARGS["query_cache_size"],
+    query_cache_ttl: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_CACHE_TTL", help=HELP_TEXT["query_cache_ttl"]
+        ),
+    ] = DEFAULT_ARGS["query_cache_ttl"],
+    response_cache: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_RESPONSE_CACHE", help=HELP_TEXT["response_cache"]
+        ),
+    ] = DEFAULT_ARGS["response_cache"],
+    response_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_RESPONSE_CACHE_SIZE",
+            help=HELP_TEXT["response_cache_size"],
+        ),
+    ] = DEFAULT_ARGS["response_cache_size"],
+    semantic_cache_threshold: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_SEMANTIC_CACHE_THRESHOLD",
+            help=HELP_TEXT["semantic_cache_threshold"],
+        ),
+    ] = DEFAULT_ARGS["semantic_cache_threshold"],
     host: Annotated[
         str, typer.Option(envvar="REGINALD_HOST", help=HELP_TEXT["host"])
     ] = DEFAULT_ARGS["host"],
@@ -297,6 +455,16 @@ def app(
         is_path=is_path,
         n_gpu_layers=n_gpu_layers,
         device=device,
+        ann_index=ann_index,
+        ann_n_probe=ann_n_probe,
+        embedding_backend=embedding_backend,
+        query_batch_size=query_batch_size,
+        query_batch_wait_ms=query_batch_wait_ms,
+        query_cache_size=query_cache_size,
+        query_cache_ttl=query_cache_ttl,
+        response_cache=response_cache,
+        response_cache_size=response_cache_size,
+        semantic_cache_threshold=semantic_cache_threshold,
     )
 
 
@@ -321,6 +489,111 @@ def create_index(
     num_output: Annotated[
         int, typer.Option(envvar="LLAMA_INDEX_NUM_OUTPUT")
     ] = DEFAULT_ARGS["num_output"],
+    vector_store_format: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_VECTOR_STORE_FORMAT",
+            help=HELP_TEXT["vector_store_format"],
+        ),
+    ] = DEFAULT_ARGS["vector_store_format"],
+    quantization: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_QUANTIZATION", help=HELP_TEXT["quantization"]),
+    ] = DEFAULT_ARGS["quantization"],
+    docstore_format: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_DOCSTORE_FORMAT", help=HELP_TEXT["docstore_format"]
+        ),
+    ] = DEFAULT_ARGS["docstore_format"],
+    incremental: Annotated[
+        bool,
+        typer.Option(envvar="LLAMA_INDEX_INCREMENTAL", help=HELP_TEXT["incremental"]),
+    ] = DEFAULT_ARGS["incremental"],
+    resume: Annotated[
+        bool,
+        typer.Option(envvar="LLAMA_INDEX_RESUME", help=HELP_TEXT["resume"]),
+    ] = DEFAULT_ARGS["resume"],
+    composite: Annotated[
+        bool,
+        typer.Option(envvar="LLAMA_INDEX_COMPOSITE", help=HELP_TEXT["composite"]),
+    ] = DEFAULT_ARGS["composite"],
+    save_snapshots: Annotated[
+        bool,
+        typer.Option(
+            envvar="LLAMA_INDEX_SAVE_SNAPSHOTS", help=HELP_TEXT["save_snapshots"]
+        ),
+    ] = DEFAULT_ARGS["save_snapshots"],
+    from_snapshot: Annotated[
+        bool,
+        typer.Option(
+            envvar="LLAMA_INDEX_FROM_SNAPSHOT", help=HELP_TEXT["from_snapshot"]
+        ),
+    ] = DEFAULT_ARGS["from_snapshot"],
+    allow_partial: Annotated[
+        bool,
+        typer.Option(
+            envvar="LLAMA_INDEX_ALLOW_PARTIAL", help=HELP_TEXT["allow_partial"]
+        ),
+    ] = DEFAULT_ARGS["allow_partial"],
+    embedding_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_EMBEDDING_CACHE_SIZE",
+            help=HELP_TEXT["embedding_cache_size"],
+        ),
+    ] = DEFAULT_ARGS["embedding_cache_size"],
+    loader_workers: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_LOADER_WORKERS", help=HELP_TEXT["loader_workers"]
+        ),
+    ] = DEFAULT_ARGS["loader_workers"],
+    github_concurrent_requests: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_GITHUB_CONCURRENT_REQUESTS",
+            help=HELP_TEXT["github_concurrent_requests"],
+        ),
+    ] = DEFAULT_ARGS["github_concurrent_requests"],
+    github_loader: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_GITHUB_LOADER", help=HELP_TEXT["github_loader"]
+        ),
+    ] = DEFAULT_ARGS["github_loader"],
+    build_batch_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_BUILD_BATCH_SIZE", help=HELP_TEXT["build_batch_size"]
+        ),
+    ] = DEFAULT_ARGS["build_batch_size"],
+    build_workers: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_BUILD_WORKERS", help=HELP_TEXT["build_workers"]
+        ),
+    ] = DEFAULT_ARGS["build_workers"],
+    ann_index: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_ANN_INDEX", help=HELP_TEXT["ann_index"]),
+    ] = DEFAULT_ARGS["ann_index"],
+    ann_n_lists: Annotated[
+        Optional[int],
+        typer.Option(envvar="LLAMA_INDEX_ANN_N_LISTS", help=HELP_TEXT["ann_n_lists"]),
+    ] = None,
+    shard: Annotated[
+        Optional[int],
+        typer.Option(envvar="LLAMA_INDEX_SHARD", help=HELP_TEXT["shard"]),
+    ] = None,
+    num_shards: Annotated[
+        Optional[int],
+        typer.Option(envvar="LLAMA_INDEX_NUM_SHARDS", help=HELP_TEXT["num_shards"]),
+    ] = None,
+    sources: Annotated[
+        Optional[str],
+        typer.Option(envvar="LLAMA_INDEX_SOURCES", help=HELP_TEXT["sources"]),
+    ] = None,
 ) -> None:
     """
     Create an index for the Reginald model.
@@ -335,6 +608,117 @@ def create_index(
         chunk_size=chunk_size,
         chunk_overlap_ratio=chunk_overlap_ratio,
         num_output=num_output,
+        vector_store_format=vector_store_format,
+        quantization=quantization,
+        docstore_format=docstore_format,
+        incremental=incremental,
+        resume=resume,
+        composite=composite,
+        save_snapshots=save_snapshots,
+        from_snapshot=from_snapshot,
+        allow_partial=allow_partial,
+        embedding_cache_size=embedding_cache_size,
+        loader_workers=loader_workers,
+        github_concurrent_requests=github_concurrent_requests,
+        github_loader=github_loader,
+        build_batch_size=build_batch_size,
+        build_workers=build_workers,
+        ann_index=ann_index,
+        ann_n_lists=ann_n_lists,
+        shard=shard,
+        num_shards=num_shards,
+        sources=sources,
+    )
+
+
+@cli.command()
+def merge_shards(
+    data_dir: Annotated[
+        str, typer.Option(envvar="LLAMA_INDEX_DATA_DIR")
+    ] = DEFAULT_ARGS["data_dir"],
+    which_index: Annotated[
+        str, typer.Option(envvar="LLAMA_INDEX_WHICH_INDEX")
+    ] = DEFAULT_ARGS["which_index"],
+    vector_store_format: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_VECTOR_STORE_FORMAT",
+            help=HELP_TEXT["vector_store_format"],
+        ),
+    ] = DEFAULT_ARGS["vector_store_format"],
+    quantization: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_QUANTIZATION", help=HELP_TEXT["quantization"]),
+    ] = DEFAULT_ARGS["quantization"],
+    docstore_format: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_DOCSTORE_FORMAT", help=HELP_TEXT["docstore_format"]
+        ),
+    ] = DEFAULT_ARGS["docstore_format"],
+    build_batch_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_BUILD_BATCH_SIZE", help=HELP_TEXT["build_batch_size"]
+        ),
+    ] = DEFAULT_ARGS["build_batch_size"],
+    ann_index: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_ANN_INDEX", help=HELP_TEXT["ann_index"]),
+    ] = DEFAULT_ARGS["ann_index"],
+    ann_n_lists: Annotated[
+        Optional[int],
+        typer.Option(envvar="LLAMA_INDEX_ANN_N_LISTS", help=HELP_TEXT["ann_n_lists"]),
+    ] = None,
+) -> None:
+    """
+    Merge the shards built with 'reginald create_index --shard' into the index.
+    """
+    set_up_logging_config(level=20)
+    main(
+        cli="merge_shards",
+        data_dir=data_dir,
+        which_index=which_index,
+        vector_store_format=vector_store_format,
+        quantization=quantization,
+        docstore_format=docstore_format,
+        build_batch_size=build_batch_size,
+        ann_index=ann_index,
+        ann_n_lists=ann_n_lists,
+    )
+
+
+@cli.command()
+def benchmark_embedding_backend(
+    data_dir: Annotated[
+        str, typer.Option(envvar="LLAMA_INDEX_DATA_DIR")
+    ] = DEFAULT_ARGS["data_dir"],
+    which_index: Annotated[
+        str, typer.Option(envvar="LLAMA_INDEX_WHICH_INDEX")
+    ] = DEFAULT_ARGS["which_index"],
+    embedding_backend: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_EMBEDDING_BACKEND", help=HELP_TEXT["embedding_backend"]
+        ),
+    ] = "int8",
+    k: Annotated[
+        int, typer.Option(envvar="LLAMA_INDEX_K", help=HELP_TEXT["k"])
+    ] = DEFAULT_ARGS["k"],
+    n_queries: Annotated[int, typer.Option(help=HELP_TEXT["n_queries"])] = 200,
+) -> None:
+    """
+    Compare the recall and latency of an embedding backend with the
+    'torch' backend on an index built with it.
+    """
+    set_up_logging_config(level=20)
+    main(
+        cli="benchmark_embedding_backend",
+        data_dir=data_dir,
+        which_index=which_index,
+        embedding_backend=embedding_backend,
+        k=k,
+        n_queries=n_queries,
     )
 
 
@@ -407,6 +791,65 @@ def chat(
     device: Annotated[
         str, typer.Option(envvar="LLAMA_INDEX_DEVICE", help=HELP_TEXT["device"])
     ] = DEFAULT_ARGS["device"],
+    ann_index: Annotated[
+        str,
+        typer.Option(envvar="LLAMA_INDEX_ANN_INDEX", help=HELP_TEXT["ann_index"]),
+    ] = DEFAULT_ARGS["ann_index"],
+    ann_n_probe: Annotated[
+        int,
+        typer.Option(envvar="LLAMA_INDEX_ANN_N_PROBE", help=HELP_TEXT["ann_n_probe"]),
+    ] = DEFAULT_ARGS["ann_n_probe"],
+    embedding_backend: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_EMBEDDING_BACKEND", help=HELP_TEXT["embedding_backend"]
+        ),
+    ] = DEFAULT_ARGS["embedding_backend"],
+    query_batch_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_BATCH_SIZE", help=HELP_TEXT["query_batch_size"]
+        ),
+    ] = DEFAULT_ARGS["query_batch_size"],
+    query_batch_wait_ms: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_BATCH_WAIT_MS",
+            help=HELP_TEXT["query_batch_wait_ms"],
+        ),
+    ] = DEFAULT_ARGS["query_batch_wait_ms"],
+    query_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_CACHE_SIZE", help=HELP_TEXT["query_cache_size"]
+        ),
+    ] = DEFAULT_ARGS["query_cache_size"],
+    query_cache_ttl: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_QUERY_CACHE_TTL", help=HELP_TEXT["query_cache_ttl"]
+        ),
+    ] = DEFAULT_ARGS["query_cache_ttl"],
+    response_cache: Annotated[
+        str,
+        typer.Option(
+            envvar="LLAMA_INDEX_RESPONSE_CACHE", help=HELP_TEXT["response_cache"]
+        ),
+    ] = DEFAULT_ARGS["response_cache"],
+    response_cache_size: Annotated[
+        int,
+        typer.Option(
+            envvar="LLAMA_INDEX_RESPONSE_CACHE_SIZE",
+            help=HELP_TEXT["response_cache_size"],
+        ),
+    ] = DEFAULT_ARGS["response_cache_size"],
+    semantic_cache_threshold: Annotated[
+        float,
+        typer.Option(
+            envvar="LLAMA_INDEX_SEMANTIC_CACHE_THRESHOLD",
+            help=HELP_TEXT["semantic_cache_threshold"],
+        ),
+    ] = DEFAULT_ARGS["semantic_cache_threshold"],
 ) -> None:
     """
     Run the chat interaction with the Reginald model.
@@ -429,6 +872,16 @@ def chat(
         is_path=is_path,
         n_gpu_layers=n_gpu_layers,
         device=device,
+        ann_index=ann_index,
+        ann_n_probe=ann_n_probe,
+        embedding_backend=embedding_backend,
+        query_batch_size=query_batch_size,
+        query_batch_wait_ms=query_batch_wait_ms,
+        query_cache_size=query_cache_size,
+        query_cache_ttl=query_cache_ttl,
+        response_cache=response_cache,
+        response_cache_size=response_cache_size,
+        semantic_cache_threshold=semantic_cache_threshold,
     )
 
 
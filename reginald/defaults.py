@@ -5,6 +5,18 @@ EMOJI_DEFAULT: Final[str] = "rocket"
 
 LLAMA_INDEX_DIR: Final[str] = "llama_index_indices"
 
+EMBEDDING_CACHE_DIR: Final[str] = "embedding_cache"
+
+GIT_MIRROR_DIR: Final[str] = "git_mirrors"
+
+GITHUB_ISSUES_DIR: Final[str] = "github_issues"
+
+SOURCE_SNAPSHOT_DIR: Final[str] = "source_snapshots"
+
+SCRAPE_SNAPSHOT_DIR: Final[str] = "scrape_snapshots"
+
+RESPONSE_CACHE_DIR: Final[str] = "response_cache"
+
 DEFAULT_ARGS = {
     "model": "hello",
     "mode": "chat",
@@ -16,6 +28,31 @@ DEFAULT_ARGS = {
     "chunk_size": 512,
     "chunk_overlap_ratio": 0.1,
     "num_output": 512,
+    "vector_store_format": "json",
+    "quantization": "none",
+    "docstore_format": "json",
+    "incremental": False,
+    "resume": False,
+    "composite": False,
+    "save_snapshots": False,
+    "from_snapshot": False,
+    "allow_partial": False,
+    "embedding_cache_size": 0,
+    "loader_workers": 4,
+    "github_concurrent_requests": 4,
+    "github_loader": "api",
+    "build_batch_size": 256,
+    "build_workers": 1,
+    "ann_index": "none",
+    "ann_n_probe": 8,
+    "embedding_backend": "torch",
+    "query_batch_size": 1,
+    "query_batch_wait_ms": 2.0,
+    "query_cache_size": 0,
+    "query_cache_ttl": 3600.0,
+    "response_cache": "none",
+    "response_cache_size": 1024,
+    "semantic_cache_threshold": 0.0,
     "is_path": False,
     "n_gpu_layers": 0,
     "device": "auto",
@@ -20,11 +20,15 @@ def create_reginald_app(response_model) -> FastAPI:
     async def ping():
         return "pong"
 
+    # The message endpoints are plain functions so FastAPI runs them in its
+    # threadpool, handling requests concurrently (e.g. so their queries
+    # can be embedded together) rather than one at a time on the event loop
+
     # set up direct_message endpoint
     #
     # See the note on the below 'POST' endpoint and consider deprecating
     @app.get("/direct_message")
-    async def direct_message(query: Query):
+    def direct_message(query: Query):
         return response_model.direct_message(query.message, query.user_id)
 
     # A POST direct_message endpoint, equivalent to the above.
@@ -32,15 +36,20 @@ def create_reginald_app(response_model) -> FastAPI:
     # the message body for a GET request.  Provided as an additional endpoint
     # instead of replacing the GET endpoint to avoid breaking things.
     @app.post("/direct_message")
-    async def direct_message(query: Query):
+    def direct_message(query: Query):
         return response_model.direct_message(query.message, query.user_id)
 
     # POST channel_mention endpoint: see comment on direct_message
     @app.post("/channel_mention")
-    async def channel_mention(query: Query):
+    def channel_mention(query: Query):
         response = response_model.channel_mention(query.message, query.user_id)
         return response
 
+    # GET metrics endpoint, e.g. the occupancy of query embedding batches
+    @app.get("/metrics")
+    async def metrics():
+        return response_model.metrics()
+
     return app
 
 
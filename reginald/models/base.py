@@ -38,3 +38,9 @@ class ResponseModel(ABC):
 
     def stream_message(self, message: str, user_id: str) -> None:
         raise NotImplementedError
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Metrics of the model for monitoring, by default none.
+        """
+        return {}
@@ -0,0 +1,67 @@
+import logging
+import pathlib
+from typing import Final
+
+import numpy as np
+from llama_index.core.storage.storage_context import DEFAULT_VECTOR_STORE
+
+from reginald.defaults import DEFAULT_ARGS, LLAMA_INDEX_DIR
+from reginald.models.llama_index.data_index_creator import (
+    load_storage_context,
+    source_index_dirs,
+)
+from reginald.models.llama_index.embedding_backend import (
+    embedding_backend_report,
+    load_embed_model,
+    save_embedding_backend_report,
+)
+from reginald.models.llama_index.vector_store import embedding_matrix
+
+# number of characters from the start of a node to use as a query
+QUERY_CHARS: Final[int] = 200
+
+
+def benchmark_embedding_backend(
+    data_dir: str,
+    which_index: str,
+    embedding_backend: str = "int8",
+    k: int | None = None,
+    n_queries: int = 200,
+    seed: int = 0,
+) -> None:
+    """
+    Compare an embedding backend with the "torch" backend an index was
+    built with, using the start of a sample of the nodes of the index
+    as queries, and save the report alongside the index.
+    """
+    k = k or DEFAULT_ARGS["k"]
+    persist_dir = (
+        pathlib.Path(data_dir or DEFAULT_ARGS["data_dir"]).resolve()
+        / LLAMA_INDEX_DIR
+        / (which_index or DEFAULT_ARGS["which_index"])
+    )
+    if source_index_dirs(persist_dir) is not None:
+        raise ValueError(
+            f"{persist_dir} is a composite index. "
+            "Benchmark one of its source indices instead."
+        )
+
+    logging.info(f"Loading the storage context from {persist_dir}")
+    storage_context = load_storage_context(persist_dir)
+    embeddings, node_ids = embedding_matrix(
+        storage_context.vector_stores[DEFAULT_VECTOR_STORE]
+    )
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(node_ids), min(n_queries, len(node_ids)), replace=False)
+    nodes = storage_context.docstore.get_nodes([node_ids[i] for i in sample])
+    queries = [node.get_content()[:QUERY_CHARS] for node in nodes]
+
+    report = embedding_backend_report(
+        reference=load_embed_model("torch"),
+        candidate=load_embed_model(embedding_backend),
+        queries=queries,
+        embeddings=embeddings,
+        k=k,
+    )
+    save_embedding_backend_report(report, embedding_backend, persist_dir)
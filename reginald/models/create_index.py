@@ -13,6 +13,7 @@ from llama_index.core.llms.custom import CustomLLM
 from reginald.defaults import DEFAULT_ARGS
 from reginald.models.llama_index.base import (
     DataIndexCreator,
+    IndexBuildConfig,
     compute_default_chunk_size,
 )
 from reginald.models.llama_index.llama_utils import setup_settings
@@ -57,6 +58,26 @@ def create_index(
     chunk_size: int | None,
     chunk_overlap_ratio: float | None,
     num_output: int | None,
+    vector_store_format: str | None = None,
+    quantization: str | None = None,
+    docstore_format: str | None = None,
+    incremental: bool = False,
+    resume: bool = False,
+    composite: bool = False,
+    save_snapshots: bool = False,
+    from_snapshot: bool = False,
+    allow_partial: bool = False,
+    embedding_cache_size: int | None = None,
+    loader_workers: int | None = None,
+    github_concurrent_requests: int | None = None,
+    github_loader: str | None = None,
+    build_batch_size: int | None = None,
+    build_workers: int | None = None,
+    ann_index: str | None = None,
+    ann_n_lists: int | None = None,
+    shard: int | None = None,
+    num_shards: int | None = None,
+    sources: str | None = None,
 ) -> None:
     max_input_size = max_input_size or DEFAULT_ARGS["max_input_size"]
     num_output = num_output or DEFAULT_ARGS["num_output"]
@@ -83,6 +104,78 @@ def create_index(
         data_dir=pathlib.Path(data_dir or DEFAULT_ARGS["data_dir"]).resolve(),
         which_index=which_index or DEFAULT_ARGS["which_index"],
         settings=settings,
+        config=IndexBuildConfig(
+            vector_store_format=(
+                vector_store_format or DEFAULT_ARGS["vector_store_format"]
+            ),
+            quantization=quantization or DEFAULT_ARGS["quantization"],
+            docstore_format=docstore_format or DEFAULT_ARGS["docstore_format"],
+            incremental=incremental,
+            resume=resume,
+            composite=composite,
+            save_snapshots=save_snapshots,
+            from_snapshot=from_snapshot,
+            allow_partial=allow_partial,
+            embedding_cache_size=(
+                DEFAULT_ARGS["embedding_cache_size"]
+                if embedding_cache_size is None
+                else embedding_cache_size
+            ),
+            loader_workers=loader_workers or DEFAULT_ARGS["loader_workers"],
+            github_concurrent_requests=(
+                github_concurrent_requests or DEFAULT_ARGS["github_concurrent_requests"]
+            ),
+            github_loader=github_loader or DEFAULT_ARGS["github_loader"],
+            build_batch_size=build_batch_size or DEFAULT_ARGS["build_batch_size"],
+            build_workers=build_workers or DEFAULT_ARGS["build_workers"],
+            ann_index=ann_index or DEFAULT_ARGS["ann_index"],
+            ann_n_lists=ann_n_lists,
+            shard=shard,
+            num_shards=num_shards,
+            sources=None if sources is None else sources.split(","),
+        ),
     )
-    data_creator.create_index()
+    if composite:
+        data_creator.create_composite_index()
+    else:
+        data_creator.create_index()
+        data_creator.save_index()
+
+
+def merge_shards(
+    data_dir: str,
+    which_index: str,
+    vector_store_format: str | None = None,
+    quantization: str | None = None,
+    docstore_format: str | None = None,
+    build_batch_size: int | None = None,
+    ann_index: str | None = None,
+    ann_n_lists: int | None = None,
+) -> None:
+    # only the embedding model of the settings is used to merge shards
+    logging.info("Setting up settings...")
+    settings = setup_settings(
+        llm=DummyLLM(),
+        max_input_size=DEFAULT_ARGS["max_input_size"],
+        num_output=DEFAULT_ARGS["num_output"],
+        chunk_overlap_ratio=DEFAULT_ARGS["chunk_overlap_ratio"],
+        k=DEFAULT_ARGS["k"],
+    )
+
+    data_creator = DataIndexCreator(
+        data_dir=pathlib.Path(data_dir or DEFAULT_ARGS["data_dir"]).resolve(),
+        which_index=which_index or DEFAULT_ARGS["which_index"],
+        settings=settings,
+        config=IndexBuildConfig(
+            vector_store_format=(
+                vector_store_format or DEFAULT_ARGS["vector_store_format"]
+            ),
+            quantization=quantization or DEFAULT_ARGS["quantization"],
+            docstore_format=docstore_format or DEFAULT_ARGS["docstore_format"],
+            build_batch_size=build_batch_size or DEFAULT_ARGS["build_batch_size"],
+            ann_index=ann_index or DEFAULT_ARGS["ann_index"],
+            ann_n_lists=ann_n_lists,
+        ),
+    )
+    data_creator.merge_shards()
     data_creator.save_index()
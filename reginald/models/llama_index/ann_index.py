@@ -0,0 +1,316 @@
+import json
+import logging
+import pathlib
+import time
+from math import ceil, sqrt
+from typing import Any, Final
+
+import numpy as np
+
+from reginald.models.llama_index.similarity import normalise_rows, top_k_indices
+
+ANN_INDEX_TYPES: Final[list[str]] = ["none", "ivf"]
+
+IVF_CENTROIDS_FNAME: Final[str] = "ivf_centroids.npy"
+IVF_OFFSETS_FNAME: Final[str] = "ivf_offsets.npy"
+IVF_MEMBERS_FNAME: Final[str] = "ivf_members.npy"
+IVF_REPORT_FNAME: Final[str] = "ivf_report.json"
+
+
+def default_n_lists(n_vectors: int) -> int:
+    """
+    Default number of IVF lists for a number of vectors,
+    following the common rule of thumb of `4 * sqrt(n_vectors)`.
+
+    Examples
+    --------
+    >>> default_n_lists(10_000)
+    400
+    >>> default_n_lists(3)
+    1
+    """
+    return max(1, min(n_vectors // 2, ceil(4 * sqrt(n_vectors))))
+
+
+class IVFIndex:
+    def __init__(
+        self, centroids: np.ndarray, offsets: np.ndarray, members: np.ndarray
+    ) -> None:
+        """
+        Inverted file (IVF) index for approximate nearest neighbour search
+        over a matrix of unit-length embeddings.
+
+        The embeddings are clustered with spherical k-means and each
+        embedding is assigned to its closest centroid. A search only
+        scores the embeddings in the `n_probe` lists whose centroids are
+        closest to the query.
+
+        Parameters
+        ----------
+        centroids : np.ndarray
+            2D array of unit-length centroids, one row per list.
+        offsets : np.ndarray
+            Start of each list in `members` (with a final entry giving
+            the total number of members), so list `i` is
+            `members[offsets[i]:offsets[i + 1]]`.
+        members : np.ndarray
+            Row positions in the embedding matrix, grouped by list.
+        """
+        self.centroids = centroids
+        self.offsets = offsets
+        self.members = members
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def n_vectors(self) -> int:
+        return self.members.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        n_lists: int | None = None,
+        n_iter: int = 10,
+        max_training_points: int = 256,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        Build an IVF index by clustering the embeddings.
+
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            2D array of unit-length embeddings, one row per node.
+        n_lists : int | None, optional
+            Number of lists (clusters), by default None
+            (uses `default_n_lists`).
+        n_iter : int, optional
+            Number of k-means iterations, by default 10.
+        max_training_points : int, optional
+            Maximum number of embeddings per list to train
+            the centroids on, by default 256.
+        seed : int, optional
+            Seed for sampling the training points and initial centroids,
+            by default 0.
+
+        Returns
+        -------
+        IVFIndex
+            IVF index over the rows of `embeddings`.
+        """
+        n_vectors = embeddings.shape[0]
+        if n_vectors == 0:
+            # an empty index has no lists to train
+            return cls(
+                centroids=np.zeros((0, embeddings.shape[1]), dtype=np.float32),
+                offsets=np.zeros(1, dtype=np.int64),
+                members=np.zeros(0, dtype=np.int64),
+            )
+
+        n_lists = min(n_lists or default_n_lists(n_vectors), n_vectors)
+        rng = np.random.default_rng(seed)
+
+        # train the centroids on a sample of the embeddings
+        n_train = min(n_vectors, n_lists * max_training_points)
+        train = np.asarray(
+            embeddings[np.sort(rng.choice(n_vectors, n_train, replace=False))],
+            dtype=np.float32,
+        )
+        centroids = train[rng.choice(n_train, n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = cls._assign(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, train)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalise_rows(sums)
+
+        assignment = cls._assign(embeddings, centroids)
+        members = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+
+        return cls(centroids=centroids, offsets=offsets, members=members)
+
+    @staticmethod
+    def _assign(
+        embeddings: np.ndarray, centroids: np.ndarray, batch_size: int = 8192
+    ) -> np.ndarray:
+        # assign in batches to bound the size of the similarity matrix
+        return np.concatenate(
+            [
+                np.argmax(embeddings[i : i + batch_size] @ centroids.T, axis=1)
+                for i in range(0, embeddings.shape[0], batch_size)
+            ]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+
+    def candidates(self, query_embedding: np.ndarray, n_probe: int) -> np.ndarray:
+        """
+        Row positions of the embeddings in the `n_probe` lists
+        closest to the query.
+
+        Parameters
+        ----------
+        query_embedding : np.ndarray
+            Unit-length query embedding.
+        n_probe : int
+            Number of lists to search.
+
+        Returns
+        -------
+        np.ndarray
+            Row positions in the embedding matrix.
+        """
+        lists = top_k_indices(self.centroids @ query_embedding, n_probe)
+        return np.concatenate(
+            [self.members[self.offsets[i] : self.offsets[i + 1]] for i in lists]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+
+    def search(
+        self, embeddings: np.ndarray, query_embedding: np.ndarray, k: int, n_probe: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k search.
+
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            The embedding matrix the index was built over.
+        query_embedding : np.ndarray
+            Unit-length query embedding.
+        k : int
+            Number of results.
+        n_probe : int
+            Number of lists to search.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Row positions of the results and their similarity scores,
+            best first.
+        """
+        candidates = self.candidates(query_embedding, n_probe)
+        scores = embeddings[candidates] @ query_embedding
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+
+    def save(self, directory: pathlib.Path | str) -> None:
+        directory = pathlib.Path(directory)
+        np.save(directory / IVF_CENTROIDS_FNAME, self.centroids)
+        np.save(directory / IVF_OFFSETS_FNAME, self.offsets)
+        np.save(directory / IVF_MEMBERS_FNAME, self.members)
+
+    @classmethod
+    def exists(cls, directory: pathlib.Path | str) -> bool:
+        return (pathlib.Path(directory) / IVF_CENTROIDS_FNAME).exists()
+
+    @classmethod
+    def load(cls, directory: pathlib.Path | str) -> "IVFIndex":
+        directory = pathlib.Path(directory)
+        logging.info(f"Loading IVF index from {directory}")
+        return cls(
+            centroids=np.load(directory / IVF_CENTROIDS_FNAME),
+            offsets=np.load(directory / IVF_OFFSETS_FNAME),
+            members=np.load(directory / IVF_MEMBERS_FNAME, mmap_mode="r"),
+        )
+
+
+def recall_latency_report(
+    ivf_index: IVFIndex,
+    embeddings: np.ndarray,
+    k: int = 3,
+    n_queries: int = 200,
+    n_probes: list[int] | None = None,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """
+    Measure recall@k and latency of an IVF index against exact search.
+
+    A sample of the indexed embeddings is used as queries. Each query
+    is excluded from its own results, so the report reflects how well
+    the index finds neighbours rather than the query itself.
+
+    Parameters
+    ----------
+    ivf_index : IVFIndex
+        IVF index to evaluate.
+    embeddings : np.ndarray
+        The embedding matrix the index was built over.
+    k : int, optional
+        Number of results per query, by default 3.
+    n_queries : int, optional
+        Number of queries to sample, by default 200.
+    n_probes : list[int] | None, optional
+        Values of `n_probe` to evaluate, by default None
+        (uses powers of two up to the number of lists).
+    seed : int, optional
+        Seed for sampling the queries, by default 0.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        One row per value of `n_probe`, with the mean recall@k and the
+        mean per-query latency of the IVF and exact searches
+        in milliseconds.
+    """
+    n_vectors = embeddings.shape[0]
+    if n_vectors == 0:
+        return []
+    if n_probes is None:
+        n_probes = [2**i for i in range(ivf_index.n_lists.bit_length())]
+        n_probes = [p for p in n_probes if p <= ivf_index.n_lists]
+
+    rng = np.random.default_rng(seed)
+    queries = np.sort(rng.choice(n_vectors, min(n_queries, n_vectors), replace=False))
+
+    # exact neighbours (excluding the query itself)
+    exact = []
+    start = time.perf_counter()
+    for q in queries:
+        scores = embeddings @ embeddings[q]
+        scores[q] = -np.inf
+        exact.append(set(top_k_indices(scores, k).tolist()))
+    exact_ms = 1000 * (time.perf_counter() - start) / len(queries)
+
+    report = []
+    for n_probe in n_probes:
+        hits = 0
+        start = time.perf_counter()
+        for q, truth in zip(queries, exact):
+            positions, _ = ivf_index.search(embeddings, embeddings[q], k + 1, n_probe)
+            neighbours = [p for p in positions.tolist() if p != q][:k]
+            hits += len(truth & set(neighbours))
+        ivf_ms = 1000 * (time.perf_counter() - start) / len(queries)
+        report.append(
+            {
+                "n_probe": n_probe,
+                "recall_at_k": hits / (k * len(queries)),
+                "ivf_latency_ms": ivf_ms,
+                "exact_latency_ms": exact_ms,
+            }
+        )
+
+    return report
+
+
+def save_recall_latency_report(
+    report: list[dict[str, Any]], directory: pathlib.Path | str
+) -> None:
+    """
+    Log a recall-vs-latency report and save it alongside the index.
+    """
+    logging.info("IVF recall-vs-latency report:")
+    logging.info(f"{'n_probe':>8} {'recall@k':>9} {'ivf ms':>8} {'exact ms':>9}")
+    for row in report:
+        logging.info(
+            f"{row['n_probe']:>8} {row['recall_at_k']:>9.3f} "
+            f"{row['ivf_latency_ms']:>8.3f} {row['exact_latency_ms']:>9.3f}"
+        )
+
+    with open(pathlib.Path(directory) / IVF_REPORT_FNAME, "w") as f:
+        json.dump(report, f, indent=2)
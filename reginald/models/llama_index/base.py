@@ -1,21 +1,58 @@
+import copy
 import logging
 import pathlib
 import re
 import sys
-from typing import Callable
+import threading
+from typing import Any, Callable
 
 import nest_asyncio
-from llama_index.core import StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core import VectorStoreIndex, load_index_from_storage
 from llama_index.core.base.llms.base import BaseLLM
 from llama_index.core.base.response.schema import RESPONSE_TYPE
+from llama_index.core.chat_engine import ContextChatEngine
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import QueryBundle
+from llama_index.core.settings import _Settings
 
-from reginald.defaults import LLAMA_INDEX_DIR
+from reginald.defaults import LLAMA_INDEX_DIR, RESPONSE_CACHE_DIR
 from reginald.models.base import MessageResponse, ResponseModel
-from reginald.models.llama_index.data_index_creator import DataIndexCreator
+from reginald.models.llama_index.ann_index import ANN_INDEX_TYPES, IVFIndex
+from reginald.models.llama_index.data_index_creator import (
+    DataIndexCreator,
+    IndexBuildConfig,
+    load_storage_context,
+    source_index_dirs,
+)
+from reginald.models.llama_index.embedding_backend import load_embed_model
+from reginald.models.llama_index.index_manifest import read_manifest
 from reginald.models.llama_index.llama_utils import (
     compute_default_chunk_size,
     setup_settings,
 )
+from reginald.models.llama_index.query_batcher import (
+    BatchedQueryEmbedding,
+    QueryEmbeddingBatcher,
+)
+from reginald.models.llama_index.query_cache import (
+    CachedRetriever,
+    QueryCache,
+    normalise_message,
+)
+from reginald.models.llama_index.response_cache import (
+    ResponseCacheKey,
+    load_response_cache,
+)
+from reginald.models.llama_index.retriever import (
+    CompositeRetriever,
+    NumpyRetriever,
+    PrefetchedRetriever,
+)
+from reginald.models.llama_index.semantic_cache import (
+    SEMANTIC_HITS_FNAME,
+    SemanticAnswerCache,
+)
+from reginald.models.llama_index.vector_store import embedding_matrix
 from reginald.utils import stream_iter_progress_wrapper, stream_progress_wrapper
 
 nest_asyncio.apply()
@@ -34,6 +71,16 @@ class LlamaIndex(ResponseModel):
         chunk_overlap_ratio: float = 0.1,
         num_output: int = 512,
         force_new_index: bool = False,
+        ann_index: str = "none",
+        ann_n_probe: int = 8,
+        embedding_backend: str = "torch",
+        query_batch_size: int = 1,
+        query_batch_wait_ms: float = 2.0,
+        query_cache_size: int = 0,
+        query_cache_ttl: float = 3600,
+        response_cache: str = "none",
+        response_cache_size: int = 1024,
+        semantic_cache_threshold: float = 0.0,
         *args,
         **kwargs,
     ) -> None:
@@ -53,6 +100,8 @@ class LlamaIndex(ResponseModel):
         which_index : str
             Which index to construct (if force_new_index is True) or use.
             Options are "handbook", "wikis",  "public", "reg" or "all_data".
+            If the persisted index is a composite index, each of its
+            source indices is searched and the top-k results combined.
         mode : Optional[str], optional
             The type of engine to use when interacting with the data, options of "chat" or "query".
             Default is "chat".
@@ -68,6 +117,42 @@ class LlamaIndex(ResponseModel):
         force_new_index : bool, optional
             Whether or not to recreate the index vector store,
             by default False
+        ann_index : str, optional
+            Approximate nearest neighbour index to use for retrieval,
+            by default "none" (exact search). Options are "none" or "ivf".
+        ann_n_probe : int, optional
+            Number of IVF lists to search if `ann_index` is "ivf",
+            by default 8. Higher values trade latency for recall.
+        embedding_backend : str, optional
+            Backend to embed queries with, by default "torch".
+            Options are "torch" or "int8" (dynamically quantized,
+            faster on CPU and compatible with indices built with "torch").
+            A new index (see `force_new_index`) is always built with "torch".
+        query_batch_size : int, optional
+            Maximum number of queries of concurrent requests to embed
+            together, by default 1 (each query is embedded on its own). Worth
+            raising when serving concurrent requests, e.g. with the app.
+        query_batch_wait_ms : float, optional
+            Maximum time to wait for the queries of other requests to embed
+            with a query in milliseconds, by default 2.
+        query_cache_size : int, optional
+            Maximum number of message embeddings, and of sets of nodes
+            retrieved for a message, to cache, by default 0 (nothing
+            is cached).
+        query_cache_ttl : float, optional
+            Time after which cached embeddings and retrieved nodes expire
+            in seconds, by default 3,600. If 0, they do not expire.
+        response_cache : str, optional
+            Cache of the responses to messages in query mode, by default
+            "none". Options are "none", "memory" or "sqlite" (kept in the
+            data directory between runs).
+        response_cache_size : int, optional
+            Maximum number of responses to cache, by default 1,024.
+        semantic_cache_threshold : float, optional
+            Smallest cosine similarity between the embeddings of a message
+            and a previous message to reuse the response to it in query
+            mode, by default 0 (responses are not reused for similar
+            messages). Reused responses are logged in the data directory.
         """
         super().__init__(*args, emoji="llama", **kwargs)
         logging.info("Setting up Huggingface backend.")
@@ -78,6 +163,10 @@ class LlamaIndex(ResponseModel):
         else:
             logging.error("Mode must either be 'query' or 'chat'.")
             sys.exit(1)
+        if ann_index not in ANN_INDEX_TYPES:
+            raise ValueError(
+                f"ann_index must be one of {ANN_INDEX_TYPES}, got '{ann_index}'."
+            )
 
         self.max_input_size = max_input_size
         self.model_name = model_name
@@ -104,16 +193,39 @@ class LlamaIndex(ResponseModel):
             chunk_overlap_ratio=self.chunk_overlap_ratio,
             k=self.k,
             tokenizer=self._prep_tokenizer(),
+            embedding_backend=embedding_backend,
         )
 
+        # embed the queries of concurrent requests together
+        self.query_batcher: QueryEmbeddingBatcher | None = None
+        if query_batch_size > 1:
+            settings.embed_model = BatchedQueryEmbedding(
+                settings.embed_model,
+                max_batch_size=query_batch_size,
+                max_wait_ms=query_batch_wait_ms,
+            )
+            self.query_batcher = settings.embed_model.batcher
+
+        persist_dir = self.data_dir / LLAMA_INDEX_DIR / self.which_index
         if force_new_index:
             logging.info("Generating the index from scratch...")
+            build_settings = settings
+            if embedding_backend != "torch":
+                # indices are always built with the torch backend,
+                # the other backends are only for embedding queries
+                logging.info(
+                    "Building the index with the torch embedding backend, "
+                    f"queries are embedded with the {embedding_backend} backend."
+                )
+                build_settings = copy.copy(settings)
+                build_settings.embed_model = load_embed_model("torch")
             data_creator = DataIndexCreator(
                 which_index=self.which_index,
                 data_dir=self.data_dir,
-                settings=settings,
+                settings=build_settings,
+                config=IndexBuildConfig(ann_index=ann_index),
             )
-            self.index: VectorStoreIndex = stream_progress_wrapper(
+            self.index: VectorStoreIndex | None = stream_progress_wrapper(
                 data_creator.create_index,
                 task_str="Generating the index from scratch...",
             )
@@ -121,40 +233,182 @@ class LlamaIndex(ResponseModel):
                 data_creator.save_index,
                 task_str="Saving the index...",
             )
+            if build_settings is not settings:
+                self.index = self._load_index(persist_dir, settings)
+
+            self.retriever = self._prep_retriever(
+                self.index, persist_dir, ann_index=ann_index, ann_n_probe=ann_n_probe
+            )
+
+        elif (source_dirs := source_index_dirs(persist_dir)) is not None:
+            # a composite index searches each of its source indices
+            self._check_source_indices(source_dirs)
+            self.index = None
+            self.retriever = CompositeRetriever(
+                [
+                    self._prep_retriever(
+                        self._load_index(source_dir, settings),
+                        source_dir,
+                        ann_index=ann_index,
+                        ann_n_probe=ann_n_probe,
+                    )
+                    for source_dir in source_dirs
+                ],
+                similarity_top_k=k,
+            )
 
         else:
-            logging.info("Loading the storage context")
-            storage_context = stream_progress_wrapper(
-                StorageContext.from_defaults,
-                task_str="Loading the storage context...",
-                persist_dir=self.data_dir / LLAMA_INDEX_DIR / self.which_index,
+            self.index = self._load_index(persist_dir, settings)
+            self.retriever = self._prep_retriever(
+                self.index, persist_dir, ann_index=ann_index, ann_n_probe=ann_n_probe
             )
 
-            logging.info("Loading the pre-processed index")
-            self.index = stream_progress_wrapper(
-                load_index_from_storage,
-                task_str="Loading the pre-processed index...",
-                storage_context=storage_context,
-                settings=settings,
+        self.index_version = self._index_version(persist_dir)
+
+        # cache the embedding of each message and the nodes retrieved for it
+        self.query_cache: QueryCache | None = None
+        if query_cache_size > 0:
+            self.query_cache = QueryCache(
+                max_size=query_cache_size, ttl_seconds=query_cache_ttl or None
+            )
+            self.query_cache.set_index_version(self.index_version)
+            self.retriever = CachedRetriever(
+                self.retriever,
+                embed_model=settings.embed_model,
+                cache=self.query_cache,
+                similarity_top_k=k,
             )
 
+        # requests are handled concurrently (e.g. by the app's threadpool),
+        # so the nodes for a message are retrieved before waiting for the
+        # LLM, which responds to one message at a time
+        self._llm_lock = threading.Lock()
+
         self.response_mode = "simple_summarize"
         if self.mode == "chat":
             self.chat_engine = {}
+            self.chat_retriever = PrefetchedRetriever(self.retriever)
             logging.info("Done setting up Huggingface backend for chat engine.")
         elif self.mode == "query":
-            self.query_engine = self.index.as_query_engine(
+            self.query_engine = RetrieverQueryEngine.from_args(
+                retriever=self.retriever,
                 response_mode=self.response_mode,
-                similarity_top_k=k,
             )
             logging.info("Done setting up Huggingface backend for query engine.")
 
+        # reuse the responses to repeated queries, which only depend on
+        # the message, LLM and index (chat responses also depend on the
+        # history of the chat)
+        self.response_cache = None
+        if response_cache != "none" and self.mode != "query":
+            logging.warning("The response cache is only used in query mode.")
+        elif response_cache != "none":
+            self.response_cache = load_response_cache(
+                response_cache,
+                directory=self.data_dir / RESPONSE_CACHE_DIR,
+                max_entries=response_cache_size,
+            )
+
+        # reuse the responses to messages similar to previous messages
+        self.embed_model = settings.embed_model
+        self.semantic_cache: SemanticAnswerCache | None = None
+        if semantic_cache_threshold > 0 and self.mode != "query":
+            logging.warning("The semantic cache is only used in query mode.")
+        elif semantic_cache_threshold > 0:
+            self.semantic_cache = SemanticAnswerCache(
+                max_entries=response_cache_size,
+                threshold=semantic_cache_threshold,
+                audit_log_path=self.data_dir / RESPONSE_CACHE_DIR / SEMANTIC_HITS_FNAME,
+            )
+
         self.error_response_template = (
             "Oh no! When I tried to get a response to your prompt, "
             "I got the following error:"
             "\n```\n{}\n```"
         )
 
+    @staticmethod
+    def _load_index(persist_dir: pathlib.Path, settings: _Settings) -> VectorStoreIndex:
+        """
+        Load a persisted index.
+        """
+        logging.info(f"Loading the storage context from {persist_dir}")
+        storage_context = stream_progress_wrapper(
+            load_storage_context,
+            task_str="Loading the storage context...",
+            persist_dir=persist_dir,
+        )
+
+        logging.info("Loading the pre-processed index")
+        return stream_progress_wrapper(
+            load_index_from_storage,
+            task_str="Loading the pre-processed index...",
+            storage_context=storage_context,
+            settings=settings,
+        )
+
+    def _prep_retriever(
+        self,
+        index: VectorStoreIndex,
+        persist_dir: pathlib.Path,
+        ann_index: str,
+        ann_n_probe: int,
+    ) -> NumpyRetriever:
+        """
+        Retriever over a loaded index, using the IVF index persisted
+        alongside it if `ann_index` is "ivf".
+        """
+        ivf_index = None
+        if ann_index == "ivf":
+            if IVFIndex.exists(persist_dir):
+                ivf_index = IVFIndex.load(persist_dir)
+            else:
+                logging.warning(
+                    f"No IVF index persisted in {persist_dir}, building one in memory."
+                )
+                ivf_index = IVFIndex.build(embedding_matrix(index.vector_store)[0])
+
+        # score all nodes at once with a reginald-owned retriever
+        # rather than llama-index's per-node similarity loop
+        return NumpyRetriever.from_index(
+            index,
+            similarity_top_k=self.k,
+            ann_index=ivf_index,
+            n_probe=ann_n_probe,
+        )
+
+    @staticmethod
+    def _index_version(persist_dir: pathlib.Path) -> str:
+        """
+        Version of a persisted index: the build ID in its manifest, or
+        those of its source indices for a composite index. Indices
+        persisted without a manifest are versioned by when they were
+        last modified.
+        """
+        source_dirs = source_index_dirs(persist_dir) or [persist_dir]
+        return "+".join(
+            read_manifest(directory).get("build_id")
+            or str(directory.stat().st_mtime_ns)
+            for directory in source_dirs
+        )
+
+    @staticmethod
+    def _check_source_indices(source_dirs: list[pathlib.Path]) -> None:
+        """
+        Check the source indices of a composite index were built
+        with the same embedding model, so one query embedding can
+        be used to search them all.
+        """
+        embed_models = {
+            source_dir.name: read_manifest(source_dir).get("embed_model")
+            for source_dir in source_dirs
+        }
+        if len(set(embed_models.values())) > 1:
+            raise ValueError(
+                "The source indices were built with different embedding models: "
+                f"{embed_models}. Rebuild them with the same model."
+            )
+
     @staticmethod
     def _format_sources(response: RESPONSE_TYPE) -> str:
         """
@@ -240,22 +494,48 @@ class LlamaIndex(ResponseModel):
         MessageResponse
             Response from the query engine.
         """
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCacheKey.create(
+                message,
+                model_name=self.model_name,
+                which_index=self.which_index,
+                index_version=self.index_version,
+                k=self.k,
+                num_output=self.num_output,
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return MessageResponse(cached)
+
+        embedding = None
+        if self.semantic_cache is not None:
+            embedding = self._embed_message(message)
+            cached = self.semantic_cache.get(
+                embedding, context=self._semantic_context(), message=message
+            )
+            if cached is not None:
+                return MessageResponse(cached)
+
         try:
             if self.mode == "chat":
                 # create chat engine for user if does not exist
                 if self.chat_engine.get(user_id) is None:
-                    self.chat_engine[user_id] = self.index.as_chat_engine(
-                        chat_mode="context",
-                        response_mode=self.response_mode,
-                        similarity_top_k=self.k,
+                    self.chat_engine[user_id] = ContextChatEngine.from_defaults(
+                        retriever=self.chat_retriever
                     )
 
                 # obtain chat engine for particular user
                 chat_engine = self.chat_engine[user_id]
-                response = chat_engine.chat(message)
+                self.chat_retriever.prefetch(QueryBundle(query_str=message))
+                with self._llm_lock:
+                    response = chat_engine.chat(message)
             elif self.mode == "query":
-                self.query_engine._response_synthesizer._streaming = False
-                response = self.query_engine.query(message)
+                query_bundle = QueryBundle(query_str=message, embedding=embedding)
+                nodes = self.query_engine.retrieve(query_bundle)
+                with self._llm_lock:
+                    self.query_engine._response_synthesizer._streaming = False
+                    response = self.query_engine.synthesize(query_bundle, nodes)
 
             # concatenate the response with the resources that it used
             formatted_response = (
@@ -263,6 +543,9 @@ class LlamaIndex(ResponseModel):
             )
         except Exception as e:  # ignore: broad-except
             formatted_response = self.error_response_template.format(repr(e))
+            # do not cache errors
+            cache_key = None
+            embedding = None
 
         pattern = (
             r"(?s)^Context information is"
@@ -281,8 +564,46 @@ class LlamaIndex(ResponseModel):
             )
             answer = formatted_response
 
+        if cache_key is not None:
+            self.response_cache.put(cache_key, answer)
+        if embedding is not None:
+            self.semantic_cache.put(
+                embedding,
+                context=self._semantic_context(),
+                message=message,
+                answer=answer,
+            )
+
         return MessageResponse(answer)
 
+    def _embed_message(self, message: str) -> list[float]:
+        """
+        Embedding of a message, looked up in (and added to) the query
+        cache if it is used.
+        """
+        if self.query_cache is None:
+            return self.embed_model.get_query_embedding(message)
+
+        message_key = normalise_message(message)
+        embedding = self.query_cache.embeddings.get(message_key)
+        if embedding is None:
+            embedding = self.embed_model.get_query_embedding(message)
+            self.query_cache.embeddings.put(message_key, embedding)
+        return embedding
+
+    def _semantic_context(self) -> tuple:
+        """
+        What a response depends on other than the message, which must
+        match for the semantic cache to reuse it.
+        """
+        return (
+            self.model_name,
+            self.which_index,
+            self.index_version,
+            self.k,
+            self.num_output,
+        )
+
     def direct_message(self, message: str, user_id: str) -> MessageResponse:
         """
         Method to respond to a direct message in Slack.
@@ -319,6 +640,23 @@ class LlamaIndex(ResponseModel):
         """
         return self._get_response(message=message, user_id=user_id)
 
+    def metrics(self) -> dict[str, Any]:
+        """
+        Metrics of the model for monitoring: the batches of queries
+        embedded by the query embedding batcher and the hits and misses
+        of the query, response and semantic caches (if used).
+        """
+        metrics = {}
+        if self.query_batcher is not None:
+            metrics["query_embedding"] = self.query_batcher.stats()
+        if self.query_cache is not None:
+            metrics["query_cache"] = self.query_cache.stats()
+        if self.response_cache is not None:
+            metrics["response_cache"] = self.response_cache.stats()
+        if self.semantic_cache is not None:
+            metrics["semantic_cache"] = self.semantic_cache.stats()
+        return metrics
+
     def stream_message(self, message: str, user_id: str) -> None:
         """
         Method to respond to a stream message in Slack.
@@ -339,11 +677,8 @@ class LlamaIndex(ResponseModel):
             if self.mode == "chat":
                 # create chat engine for user if does not exist
                 if self.chat_engine.get(user_id) is None:
-                    self.chat_engine[user_id] = self.index.as_chat_engine(
-                        chat_mode="context",
-                        response_mode=self.response_mode,
-                        similarity_top_k=self.k,
-                        streaming=True,
+                    self.chat_engine[user_id] = ContextChatEngine.from_defaults(
+                        retriever=self.chat_retriever
                     )
 
                 # obtain chat engine for particular user
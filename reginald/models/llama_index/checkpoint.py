@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import pathlib
+import shutil
+from typing import Any, Final
+
+import numpy as np
+from llama_index.core import Document
+from llama_index.core.constants import DATA_KEY
+from llama_index.core.schema import BaseNode
+from llama_index.core.storage.docstore.utils import doc_to_json, json_to_doc
+
+CHECKPOINT_DIR: Final[str] = "checkpoints"
+CHECKPOINT_CONFIG_FNAME: Final[str] = "config.json"
+
+
+def _write_json_atomic(path: pathlib.Path, data: Any) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class BuildCheckpoint:
+    def __init__(self, directory: pathlib.Path | str) -> None:
+        """
+        Checkpoints of an index build, from which a build which was
+        interrupted can be resumed without repeating completed work.
+
+        The documents of each source are saved once the source has
+        loaded, and the nodes (with their embeddings) of each batch of
+        documents once the batch has been chunked and embedded. Every
+        checkpoint is written to a temporary file which is then renamed,
+        so a checkpoint which exists is complete.
+
+        Parameters
+        ----------
+        directory : pathlib.Path | str
+            Directory to keep the checkpoints in.
+        """
+        self.directory = pathlib.Path(directory)
+
+    def start(self, config: dict[str, Any], resume: bool) -> None:
+        """
+        Prepare the checkpoint directory for a build.
+
+        Parameters
+        ----------
+        config : dict[str, Any]
+            Settings which determine the nodes and embeddings of the
+            build (e.g. the embedding model and node parser). Checkpoints
+            saved with different settings are discarded.
+        resume : bool
+            Whether to keep the checkpoints of a previous build. If
+            False, any existing checkpoints are discarded.
+        """
+        config_path = self.directory / CHECKPOINT_CONFIG_FNAME
+        if resume and config_path.exists():
+            with open(config_path, "r") as f:
+                saved_config = json.load(f)
+            if saved_config == config:
+                logging.info(f"Resuming the build from checkpoints in {self.directory}")
+                return
+            logging.warning(
+                "The checkpointed build used different settings, starting over."
+            )
+        elif resume:
+            logging.info(f"No checkpoints found in {self.directory}, starting over.")
+
+        self.clear()
+        (self.directory / "sources").mkdir(parents=True)
+        (self.directory / "batches").mkdir(parents=True)
+        _write_json_atomic(config_path, config)
+
+    def clear(self) -> None:
+        """Remove all checkpoints."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def save_source(
+        self, source: str, documents: list[Document], source_shas: dict[str, str]
+    ) -> None:
+        """
+        Save the documents loaded from a source and the commits
+        they were loaded from.
+        """
+        _write_json_atomic(
+            self.directory / "sources" / f"{source}.json",
+            {
+                "documents": [doc_to_json(document) for document in documents],
+                "source_shas": source_shas,
+            },
+        )
+
+    def load_source(self, source: str) -> tuple[list[Document], dict[str, str]] | None:
+        """
+        Documents and commit SHAs saved for a source,
+        or None if the source has not been checkpointed.
+        """
+        path = self.directory / "sources" / f"{source}.json"
+        if not path.exists():
+            return None
+
+        with open(path, "r") as f:
+            saved = json.load(f)
+        return [json_to_doc(d) for d in saved["documents"]], saved["source_shas"]
+
+    def save_batch(
+        self, number: int, documents: list[Document], nodes: list[BaseNode]
+    ) -> None:
+        """
+        Save the embedded nodes of a batch of documents.
+
+        The IDs and hashes of the documents are saved alongside the
+        nodes, so the checkpoint is only used for the same documents.
+        """
+        path = self.directory / "batches" / f"{number:06d}"
+        embeddings = np.asarray([node.embedding for node in nodes], dtype=np.float32)
+        tmp_path = path.with_name(f"{path.name}.npy.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_path, path.with_suffix(".npy"))
+
+        # the JSON file is written last as it marks the batch as done
+        nodes_json = []
+        for node in nodes:
+            node_json = doc_to_json(node)
+            node_json[DATA_KEY]["embedding"] = None
+            nodes_json.append(node_json)
+        _write_json_atomic(
+            path.with_suffix(".json"),
+            {
+                "documents": [[d.get_doc_id(), d.hash] for d in documents],
+                "nodes": nodes_json,
+            },
+        )
+
+    def load_batch(
+        self, number: int, documents: list[Document]
+    ) -> list[BaseNode] | None:
+        """
+        Embedded nodes saved for a batch of documents, or None if
+        the batch has not been checkpointed (or its documents differ).
+        """
+        path = self.directory / "batches" / f"{number:06d}"
+        if not path.with_suffix(".json").exists():
+            return None
+
+        with open(path.with_suffix(".json"), "r") as f:
+            saved = json.load(f)
+        if saved["documents"] != [[d.get_doc_id(), d.hash] for d in documents]:
+            return None
+
+        nodes = [json_to_doc(node_json) for node_json in saved["nodes"]]
+        embeddings = np.load(path.with_suffix(".npy"))
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding.tolist()
+
+        return nodes
+
+
+def swap_in_directory(staged_dir: pathlib.Path, target_dir: pathlib.Path) -> None:
+    """
+    Replace a directory with a fully written one.
+
+    The existing directory is renamed out of the way and the staged
+    directory renamed into its place, so the target is never partly
+    written (it is only briefly missing between the two renames). The
+    previous directory is restored if the staged one cannot be moved.
+
+    Parameters
+    ----------
+    staged_dir : pathlib.Path
+        Directory to move into place, on the same file system.
+    target_dir : pathlib.Path
+        Directory to replace (which need not exist).
+    """
+    old_dir = target_dir.with_name(f"{target_dir.name}.old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    if target_dir.exists():
+        os.rename(target_dir, old_dir)
+    try:
+        os.rename(staged_dir, target_dir)
+    except OSError:
+        if old_dir.exists():
+            os.rename(old_dir, target_dir)
+        raise
+
+    shutil.rmtree(old_dir, ignore_errors=True)
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Final
+
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.storage.docstore.keyval_docstore import KVDocumentStore
+from llama_index.core.storage.kvstore.types import DEFAULT_COLLECTION, BaseKVStore
+
+DOCSTORE_FORMATS: Final[list[str]] = ["json", "sqlite"]
+
+SQLITE_DOCSTORE_FNAME: Final[str] = "docstore.sqlite"
+
+
+class SQLiteKVStore(BaseKVStore):
+    def __init__(self, db_path: pathlib.Path | str, cache_size: int = 128) -> None:
+        """
+        Key-value store persisted in a SQLite database.
+
+        Values are only read from disk when they are requested, and the
+        `cache_size` most recently read values are kept in memory so that
+        frequently retrieved nodes are not parsed again on every query.
+
+        Parameters
+        ----------
+        db_path : pathlib.Path | str
+            Path to the SQLite database (created if it does not exist).
+        cache_size : int, optional
+            Number of values to keep in the in-memory LRU cache,
+            by default 128.
+        """
+        self.db_path = pathlib.Path(db_path)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # the connection is shared between the threads serving requests
+        # so access to it (and the cache) is serialised with a lock
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            "collection TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (collection, key))"
+        )
+        self._conn.commit()
+
+    def _cache_put(self, collection: str, key: str, val: dict) -> None:
+        self._cache[(collection, key)] = val
+        self._cache.move_to_end((collection, key))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, key: str, val: dict, collection: str = DEFAULT_COLLECTION) -> None:
+        self.put_all([(key, val)], collection=collection)
+
+    async def aput(
+        self, key: str, val: dict, collection: str = DEFAULT_COLLECTION
+    ) -> None:
+        self.put(key, val, collection=collection)
+
+    def put_all(
+        self,
+        kv_pairs: list[tuple[str, dict]],
+        collection: str = DEFAULT_COLLECTION,
+        batch_size: int = 1,
+    ) -> None:
+        # all pairs are written in a single transaction whatever the batch size
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO kv (collection, key, value) "
+                    "VALUES (?, ?, ?)",
+                    [(collection, key, json.dumps(val)) for key, val in kv_pairs],
+                )
+            for key, _ in kv_pairs:
+                self._cache.pop((collection, key), None)
+
+    async def aput_all(
+        self,
+        kv_pairs: list[tuple[str, dict]],
+        collection: str = DEFAULT_COLLECTION,
+        batch_size: int = 1,
+    ) -> None:
+        self.put_all(kv_pairs, collection=collection, batch_size=batch_size)
+
+    def get(self, key: str, collection: str = DEFAULT_COLLECTION) -> dict | None:
+        with self._lock:
+            if (collection, key) in self._cache:
+                self._cache.move_to_end((collection, key))
+                return self._cache[(collection, key)].copy()
+
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE collection = ? AND key = ?",
+                (collection, key),
+            ).fetchone()
+            if row is None:
+                return None
+
+            val = json.loads(row[0])
+            self._cache_put(collection, key, val)
+            return val.copy()
+
+    async def aget(self, key: str, collection: str = DEFAULT_COLLECTION) -> dict | None:
+        return self.get(key, collection=collection)
+
+    def get_all(self, collection: str = DEFAULT_COLLECTION) -> dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM kv WHERE collection = ?", (collection,)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    async def aget_all(self, collection: str = DEFAULT_COLLECTION) -> dict[str, dict]:
+        return self.get_all(collection=collection)
+
+    def delete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM kv WHERE collection = ? AND key = ?", (collection, key)
+                )
+            self._cache.pop((collection, key), None)
+        return cursor.rowcount > 0
+
+    async def adelete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        return self.delete(key, collection=collection)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteDocumentStore(KVDocumentStore):
+    """
+    Document store backed by a `SQLiteKVStore`.
+
+    Unlike llama-index's `SimpleDocumentStore`, which parses the whole
+    `docstore.json` (every node's text and metadata) when an index is
+    loaded, nodes are read from the database only when they are
+    retrieved. Start-up time and memory use therefore do not grow
+    with the amount of text in the index.
+    """
+
+    def __init__(
+        self,
+        sqlite_kvstore: SQLiteKVStore,
+        namespace: str | None = None,
+        batch_size: int = 1,
+    ) -> None:
+        super().__init__(sqlite_kvstore, namespace=namespace, batch_size=batch_size)
+
+    @classmethod
+    def from_persist_dir(
+        cls, persist_dir: pathlib.Path | str, cache_size: int = 128
+    ) -> "SQLiteDocumentStore":
+        """
+        Open the document store persisted in a directory.
+
+        Parameters
+        ----------
+        persist_dir : pathlib.Path | str
+            Directory where the index has been persisted.
+        cache_size : int, optional
+            Number of nodes to keep in memory once read, by default 128.
+
+        Returns
+        -------
+        SQLiteDocumentStore
+            Document store reading from `persist_dir/docstore.sqlite`.
+        """
+        db_path = pathlib.Path(persist_dir) / SQLITE_DOCSTORE_FNAME
+        if not db_path.exists():
+            raise FileNotFoundError(f"No SQLite docstore found at {db_path}")
+
+        logging.info(f"Opening SQLite docstore at {db_path}")
+        return cls(SQLiteKVStore(db_path, cache_size=cache_size))
+
+    @classmethod
+    def from_simple_docstore(
+        cls, docstore: SimpleDocumentStore, persist_dir: pathlib.Path | str
+    ) -> "SQLiteDocumentStore":
+        """
+        Write the contents of an in-memory `SimpleDocumentStore`
+        into a new SQLite docstore.
+
+        Parameters
+        ----------
+        docstore : SimpleDocumentStore
+            Document store to convert.
+        persist_dir : pathlib.Path | str
+            Directory to create `docstore.sqlite` in. Any existing
+            SQLite docstore in this directory is replaced.
+
+        Returns
+        -------
+        SQLiteDocumentStore
+            Document store holding the same nodes.
+        """
+        persist_dir = pathlib.Path(persist_dir)
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        db_path = persist_dir / SQLITE_DOCSTORE_FNAME
+        db_path.unlink(missing_ok=True)
+
+        kvstore = SQLiteKVStore(db_path)
+        for collection, data in docstore._kvstore.to_dict().items():
+            kvstore.put_all(list(data.items()), collection=collection)
+
+        return cls(kvstore, namespace=docstore._namespace)
+
+    def move_to(self, persist_dir: pathlib.Path | str) -> "SQLiteDocumentStore":
+        """
+        Move the database into a directory, replacing any SQLite
+        docstore there, e.g. once an index built alongside the
+        persisted one is saved.
+
+        Parameters
+        ----------
+        persist_dir : pathlib.Path | str
+            Directory to move `docstore.sqlite` into.
+
+        Returns
+        -------
+        SQLiteDocumentStore
+            Document store reading from the moved database
+            (this store if it is already in `persist_dir`).
+        """
+        db_path = pathlib.Path(persist_dir) / SQLITE_DOCSTORE_FNAME
+        kvstore = self._kvstore
+        if kvstore.db_path.resolve() == db_path.resolve():
+            return self
+
+        kvstore.close()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(kvstore.db_path, db_path)
+        return SQLiteDocumentStore(
+            SQLiteKVStore(db_path, cache_size=kvstore.cache_size),
+            namespace=self._namespace,
+        )
@@ -0,0 +1,185 @@
+import json
+import logging
+import pathlib
+import time
+from typing import Any, Final
+
+import numpy as np
+from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+from reginald.models.llama_index.similarity import normalise_rows, top_k_indices
+
+# embedding model used to build the indices and embed queries
+EMBED_MODEL_NAME: Final[str] = "sentence-transformers/all-mpnet-base-v2"
+
+# backends to run the embedding model with: eager PyTorch, or PyTorch
+# with the weights of its linear layers dynamically quantized to int8
+EMBEDDING_BACKENDS: Final[list[str]] = ["torch", "int8"]
+
+# smallest cosine similarity expected between the query embeddings of
+# the "int8" and "torch" backends, within which the "int8" backend can
+# search indices built with the "torch" backend
+INT8_MIN_COSINE: Final[float] = 0.98
+
+EMBEDDING_BACKEND_REPORT_FNAME: Final[str] = "embedding_backend_report.json"
+
+
+def load_embed_model(
+    backend: str = "torch", embed_batch_size: int = 64
+) -> HuggingFaceEmbedding:
+    """
+    Load the embedding model with a backend.
+
+    The "int8" backend quantizes the weights of the linear layers of
+    the model to int8 once, when it is loaded, and computes their
+    activations in int8 (dynamic quantization), which is faster than
+    eager float32 PyTorch on CPU. It only runs on CPU. Its embeddings
+    are within cosine similarity `INT8_MIN_COSINE` of those of the
+    "torch" backend, so it is used with indices built with the "torch"
+    backend (see `embedding_backend_report` to check this for an index).
+
+    Parameters
+    ----------
+    backend : str, optional
+        Backend to use, "torch" (default) or "int8".
+    embed_batch_size : int, optional
+        Number of texts to embed at a time, by default 64.
+
+    Returns
+    -------
+    HuggingFaceEmbedding
+        The embedding model, with the same `model_name` for either backend.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Embedding backend must be one of {EMBEDDING_BACKENDS}, not '{backend}'."
+        )
+
+    embed_model = HuggingFaceEmbedding(
+        model_name=EMBED_MODEL_NAME,
+        embed_batch_size=embed_batch_size,
+        # quantized linear layers only run on CPU
+        device="cpu" if backend == "int8" else None,
+    )
+    if backend == "int8":
+        quantize_embed_model(embed_model)
+
+    return embed_model
+
+
+def quantize_embed_model(embed_model: HuggingFaceEmbedding) -> HuggingFaceEmbedding:
+    """
+    Dynamically quantize the linear layers of an embedding model on CPU
+    to int8 in place. The tokenizer, pooling and normalisation of the
+    model are unchanged.
+    """
+    import torch
+
+    start = time.perf_counter()
+    torch.ao.quantization.quantize_dynamic(
+        embed_model._model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+    logging.info(
+        f"Quantized {embed_model.model_name} to int8 "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return embed_model
+
+
+def embedding_backend_report(
+    reference: HuggingFaceEmbedding,
+    candidate: HuggingFaceEmbedding,
+    queries: list[str],
+    embeddings: np.ndarray,
+    k: int = 3,
+) -> dict[str, Any]:
+    """
+    Compare the query embeddings of an embedding backend with those
+    of a reference backend: how close they are, whether they retrieve
+    the same nodes from an index and how long they take.
+
+    Each query is embedded on its own, as when answering a message.
+
+    Parameters
+    ----------
+    reference : HuggingFaceEmbedding
+        Embedding model with the backend the index was built with.
+    candidate : HuggingFaceEmbedding
+        Embedding model with the backend to compare.
+    queries : list[str]
+        Queries to embed.
+    embeddings : np.ndarray
+        Embedding matrix of the index, one unit-length row per node.
+    k : int, optional
+        Number of nodes to retrieve for each query, by default 3.
+
+    Returns
+    -------
+    dict[str, Any]
+        The recall@k of the nodes retrieved with the candidate's query
+        embeddings against those retrieved with the reference's, the
+        mean and smallest cosine similarity between their query
+        embeddings, and their mean latency per query in milliseconds.
+    """
+    results = {}
+    for name, embed_model in [("reference", reference), ("candidate", candidate)]:
+        # warm up, so one-off set up costs are not counted
+        embed_model.get_query_embedding(queries[0])
+        start = time.perf_counter()
+        query_embeddings = np.array(
+            [embed_model.get_query_embedding(query) for query in queries],
+            dtype=np.float32,
+        )
+        latency_ms = 1000 * (time.perf_counter() - start) / len(queries)
+        results[name] = (query_embeddings, latency_ms)
+
+    reference_embeddings, reference_ms = results["reference"]
+    candidate_embeddings, candidate_ms = results["candidate"]
+    cosines = np.sum(
+        normalise_rows(reference_embeddings) * normalise_rows(candidate_embeddings),
+        axis=1,
+    )
+
+    k = min(k, embeddings.shape[0])
+    hits = sum(
+        len(
+            set(top_k_indices(embeddings @ r, k).tolist())
+            & set(top_k_indices(embeddings @ c, k).tolist())
+        )
+        for r, c in zip(reference_embeddings, candidate_embeddings)
+    )
+
+    return {
+        "n_queries": len(queries),
+        "k": k,
+        "recall_at_k": hits / (k * len(queries)),
+        "mean_cosine": float(np.mean(cosines)),
+        "min_cosine": float(np.min(cosines)),
+        "reference_latency_ms": reference_ms,
+        "candidate_latency_ms": candidate_ms,
+    }
+
+
+def save_embedding_backend_report(
+    report: dict[str, Any], backend: str, directory: pathlib.Path | str
+) -> None:
+    """
+    Log a comparison of an embedding backend with the "torch" backend
+    and save it alongside the index it was measured on.
+    """
+    logging.info(f"{backend} vs torch embedding backend report:")
+    logging.info(
+        f"recall@{report['k']}: {report['recall_at_k']:.3f}, "
+        f"cosine: {report['mean_cosine']:.4f} (min {report['min_cosine']:.4f}), "
+        f"latency: {report['candidate_latency_ms']:.1f} ms "
+        f"vs {report['reference_latency_ms']:.1f} ms "
+        f"over {report['n_queries']} queries"
+    )
+    if backend == "int8" and report["min_cosine"] < INT8_MIN_COSINE:
+        logging.warning(
+            f"Some {backend} query embeddings are further from the torch ones "
+            f"than the expected tolerance (cosine {INT8_MIN_COSINE})."
+        )
+
+    with open(pathlib.Path(directory) / EMBEDDING_BACKEND_REPORT_FNAME, "w") as f:
+        json.dump({"backend": backend, **report}, f, indent=2)
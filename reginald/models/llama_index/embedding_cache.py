@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any, Final
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+EMBEDDING_CACHE_FNAME: Final[str] = "embeddings.sqlite"
+
+
+def text_hash(text: str) -> str:
+    """
+    Content hash used to key cached embeddings.
+
+    Examples
+    --------
+    >>> text_hash("hello")[:16]
+    '2cf24dba5fb0a30e'
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, db_path: pathlib.Path | str, max_entries: int) -> None:
+        """
+        On-disk cache of embeddings keyed by embedding model name
+        and a hash of the embedded text.
+
+        The cache holds at most `max_entries` embeddings. When it is
+        full, the least recently used embeddings are evicted.
+
+        Parameters
+        ----------
+        db_path : pathlib.Path | str
+            Path to the SQLite database (created if it does not exist).
+        max_entries : int
+            Maximum number of embeddings to keep.
+        """
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, "
+            "embedding BLOB NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used "
+            "ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._n_entries = self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._n_entries
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """
+        Look up cached embeddings, marking those found as recently used.
+
+        Parameters
+        ----------
+        model : str
+            Name of the embedding model.
+        hashes : list[str]
+            Hashes of the texts to look up (see `text_hash`).
+
+        Returns
+        -------
+        dict[str, list[float]]
+            Embeddings found in the cache, keyed by text hash.
+        """
+        found = {}
+        with self._lock:
+            # stay well within SQLite's limit on the number of parameters
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i : i + 500]
+                rows = self._conn.execute(
+                    "SELECT text_hash, embedding FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                found.update(
+                    {h: np.frombuffer(e, dtype=np.float32).tolist() for h, e in rows}
+                )
+
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? "
+                        "WHERE model = ? AND text_hash = ?",
+                        [(now, model, h) for h in found],
+                    )
+
+        self.hits += len(found)
+        self.misses += len(set(hashes)) - len(found)
+        return found
+
+    def put_many(self, model: str, embeddings: dict[str, Embedding]) -> None:
+        """
+        Add embeddings to the cache, evicting the least recently
+        used embeddings if the cache is full.
+
+        Parameters
+        ----------
+        model : str
+            Name of the embedding model.
+        embeddings : dict[str, Embedding]
+            Embeddings keyed by the hash of their text.
+        """
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings "
+                    "(model, text_hash, embedding, last_used) VALUES (?, ?, ?, ?)",
+                    [
+                        (model, h, np.asarray(e, dtype=np.float32).tobytes(), now)
+                        for h, e in embeddings.items()
+                    ],
+                )
+                self._n_entries = self._conn.execute(
+                    "SELECT COUNT(*) FROM embeddings"
+                ).fetchone()[0]
+
+                n_evict = self._n_entries - self.max_entries
+                if n_evict > 0:
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN ("
+                        "SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (n_evict,),
+                    )
+                    self._n_entries -= n_evict
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Embedding model which looks up text embeddings in an
+    `EmbeddingCache` before calling the wrapped model, so chunks
+    shared between indices (or unchanged between builds) are only
+    embedded once. Query embeddings are not cached.
+    """
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(
+        self, embed_model: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any
+    ) -> None:
+        """
+        Parameters
+        ----------
+        embed_model : BaseEmbedding
+            Embedding model to call for texts which are not cached.
+        cache : EmbeddingCache
+            Cache to look up and store embeddings in.
+        """
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            callback_manager=embed_model.callback_manager,
+            **kwargs,
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def embed_model(self) -> BaseEmbedding:
+        return self._embed_model
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._embed_model._get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await self._embed_model._aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        hashes = [text_hash(text) for text in texts]
+        cached = self._cache.get_many(self.model_name, hashes)
+
+        # embed each distinct uncached text once
+        missing = {h: text for h, text in zip(hashes, texts) if h not in cached}
+        if missing:
+            new = self._embed_model._get_text_embeddings(list(missing.values()))
+            new = dict(zip(missing.keys(), new))
+            self._cache.put_many(self.model_name, new)
+            cached.update(new)
+
+        return [list(cached[h]) for h in hashes]
+
+    def log_stats(self) -> None:
+        """Log the number of cache hits and misses so far."""
+        logging.info(
+            f"Embedding cache: {self._cache.hits} hits, {self._cache.misses} misses, "
+            f"{len(self._cache)} embeddings cached in {self._cache.db_path}"
+        )
@@ -0,0 +1,103 @@
+import logging
+import pathlib
+
+from git import GitCommandError, Repo
+
+
+class GitMirror:
+    def __init__(
+        self, url: str, path: pathlib.Path | str, auth_url: str | None = None
+    ) -> None:
+        """
+        Local mirror of a git repository which is kept between index
+        builds and updated with shallow fetches.
+
+        The mirror is cloned with a depth of one the first time it is
+        synced and afterwards only new commits are fetched. Commits
+        which were checked out previously stay in the mirror, so the
+        files changed since then can be listed with `changed_files`.
+
+        Parameters
+        ----------
+        url : str
+            URL of the repository. This is the URL stored in the
+            mirror's git config, so it should not contain credentials.
+        path : pathlib.Path | str
+            Directory to keep the mirror in.
+        auth_url : str | None, optional
+            URL (with credentials) to clone and fetch from,
+            by default None (uses `url`).
+        """
+        self.url = url
+        self.path = pathlib.Path(path)
+        self.auth_url = auth_url or url
+
+    @property
+    def exists(self) -> bool:
+        return (self.path / ".git").exists()
+
+    @property
+    def head_sha(self) -> str:
+        """SHA of the commit checked out in the mirror."""
+        return Repo(self.path).head.commit.hexsha
+
+    def sync(self) -> str | None:
+        """
+        Clone the repository, or fetch and check out its latest commit
+        if the mirror already exists.
+
+        Returns
+        -------
+        str | None
+            SHA of the commit checked out before syncing,
+            or None if the mirror was cloned.
+        """
+        if not self.exists:
+            logging.info(f"Cloning {self.url} into {self.path}")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            repo = Repo.clone_from(self.auth_url, self.path, depth=1)
+            repo.remotes.origin.set_url(self.url)
+            return None
+
+        repo = Repo(self.path)
+        previous_sha = repo.head.commit.hexsha
+        branch = repo.active_branch.name
+        logging.info(f"Fetching {self.url} ({branch}) into {self.path}")
+        repo.git.fetch("--depth=1", self.auth_url, branch)
+        repo.head.reset("FETCH_HEAD", index=True, working_tree=True)
+
+        return previous_sha
+
+    def has_commit(self, sha: str) -> bool:
+        """Whether a commit is present in the mirror."""
+        try:
+            Repo(self.path).git.cat_file("-e", f"{sha}^{{commit}}")
+        except GitCommandError:
+            return False
+        return True
+
+    def changed_files(self, since_sha: str) -> tuple[list[str], list[str]]:
+        """
+        Files changed between a commit and the checked out commit.
+
+        Parameters
+        ----------
+        since_sha : str
+            SHA of the earlier commit, which must be in the mirror.
+
+        Returns
+        -------
+        tuple[list[str], list[str]]
+            Paths (relative to the root of the repository) of the files
+            which were added or modified, and of those which were deleted.
+            A renamed file is listed as deleted and added.
+        """
+        diff = Repo(self.path).git.diff(
+            "--name-status", "--no-renames", since_sha, "HEAD"
+        )
+        changed, deleted = [], []
+        for line in diff.splitlines():
+            status, file_path = line.split("\t", 1)
+            (deleted if status == "D" else changed).append(file_path)
+
+        return changed, deleted
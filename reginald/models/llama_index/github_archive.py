@@ -0,0 +1,342 @@
+import hashlib
+import io
+import logging
+import os
+import tarfile
+from typing import Iterator
+
+import httpx
+from llama_index.core import Document
+from llama_index.core.readers.base import BaseReader
+from llama_index.readers.github import GithubRepositoryReader
+from llama_index.readers.github.repository.utils import get_file_extension
+
+GITHUB_API_URL = "https://api.github.com"
+
+# the compare API lists at most 300 changed files
+MAX_COMPARE_FILES = 300
+
+FilterType = GithubRepositoryReader.FilterType
+
+
+def git_blob_sha(content: bytes) -> str:
+    """
+    SHA git gives a file's contents, as used for the document IDs
+    of `GithubRepositoryReader`.
+
+    Examples
+    --------
+    >>> git_blob_sha(b"hello\\n")
+    'ce013625030ba8dba906f756967f9e9ca394464a'
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class _StreamReader(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks,
+    so a response can be streamed into `tarfile`.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+class GithubArchiveReader(BaseReader):
+    def __init__(
+        self,
+        github_token: str | None,
+        owner: str,
+        repo: str,
+        filter_directories: tuple[list[str], FilterType] | None = None,
+        filter_file_extensions: tuple[list[str], FilterType] | None = None,
+        timeout: int = 60,
+        retries: int = 3,
+        api_url: str = GITHUB_API_URL,
+    ) -> None:
+        """
+        Reader for a GitHub repository which downloads the repository
+        as a single gzipped tarball, rather than making an API request
+        for every directory and file as `GithubRepositoryReader` does.
+
+        The tarball is streamed through `tarfile` so it is never held
+        in memory or written to disk in full. The filters and the
+        document metadata ("file_path", "file_name" and "url") match
+        those of `GithubRepositoryReader`, so the two are interchangeable.
+
+        Parameters
+        ----------
+        github_token : str | None
+            GitHub token to authenticate with, or None for public repos.
+        owner : str
+            Owner of the repository.
+        repo : str
+            Name of the repository.
+        filter_directories : tuple[list[str], FilterType] | None, optional
+            Directories to include or exclude, by default None.
+        filter_file_extensions : tuple[list[str], FilterType] | None, optional
+            File extensions to include or exclude, by default None.
+        timeout : int, optional
+            Timeout in seconds for the download, by default 60.
+        retries : int, optional
+            Number of times to retry a failed download, by default 3.
+        api_url : str, optional
+            Base URL of the GitHub API, by default "https://api.github.com".
+        """
+        self.github_token = github_token
+        self.owner = owner
+        self.repo = repo
+        self.filter_directories = filter_directories
+        self.filter_file_extensions = filter_file_extensions
+        self.timeout = timeout
+        self.retries = retries
+        self.api_url = api_url.rstrip("/")
+
+    def _allow_file(self, file_path: str) -> bool:
+        if self.filter_directories is not None:
+            directories, filter_type = self.filter_directories
+            in_directories = any(file_path.startswith(d) for d in directories)
+            if in_directories != (filter_type == FilterType.INCLUDE):
+                return False
+
+        if self.filter_file_extensions is not None:
+            extensions, filter_type = self.filter_file_extensions
+            has_extension = get_file_extension(file_path) in extensions
+            if has_extension != (filter_type == FilterType.INCLUDE):
+                return False
+
+        return True
+
+    def file_url(self, file_path: str, branch: str) -> str:
+        """
+        URL of a file in the repository, as used for the "url" metadata.
+        """
+        return os.path.join(
+            "https://github.com/", self.owner, self.repo, "blob/", branch, file_path
+        )
+
+    def _make_document(
+        self, file_path: str, content: bytes, branch: str
+    ) -> Document | None:
+        try:
+            text = content.decode("utf-8")
+        except UnicodeDecodeError:
+            logging.debug(f"Could not decode {file_path} as utf-8")
+            return None
+
+        return Document(
+            text=text,
+            doc_id=git_blob_sha(content),
+            extra_info={
+                "file_path": file_path,
+                "file_name": file_path.split("/")[-1],
+                "url": self.file_url(file_path, branch),
+            },
+        )
+
+    def _read_archive(self, response: httpx.Response, branch: str) -> list[Document]:
+        documents = []
+        with tarfile.open(
+            fileobj=io.BufferedReader(_StreamReader(response.iter_bytes())),
+            mode="r|gz",
+        ) as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+
+                # strip the "{owner}-{repo}-{sha}/" directory GitHub adds
+                file_path = member.name.partition("/")[2]
+                if not file_path or not self._allow_file(file_path):
+                    continue
+
+                content = archive.extractfile(member).read()
+                document = self._make_document(file_path, content, branch)
+                if document is not None:
+                    documents.append(document)
+
+        return documents
+
+    def _headers(self, accept: str = "application/vnd.github+json") -> dict[str, str]:
+        headers = {"Accept": accept}
+        if self.github_token:
+            headers["Authorization"] = f"Bearer {self.github_token}"
+        return headers
+
+    def _get(
+        self, path: str, accept: str = "application/vnd.github+json", **params
+    ) -> httpx.Response:
+        response = httpx.get(
+            f"{self.api_url}/repos/{self.owner}/{self.repo}/{path}",
+            headers=self._headers(accept),
+            params=params,
+            follow_redirects=True,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response
+
+    def head_sha(self, branch: str) -> str:
+        """
+        SHA of the latest commit on a branch.
+
+        Parameters
+        ----------
+        branch : str
+            Branch (or any other git ref).
+
+        Returns
+        -------
+        str
+            Commit SHA.
+        """
+        return self._get(f"commits/{branch}", accept="application/vnd.github.sha").text
+
+    def changed_files(
+        self, base_sha: str, head_sha: str
+    ) -> tuple[list[str], list[str]] | None:
+        """
+        Files changed between two commits, from the compare API.
+
+        Parameters
+        ----------
+        base_sha : str
+            SHA of the earlier commit.
+        head_sha : str
+            SHA of the later commit.
+
+        Returns
+        -------
+        tuple[list[str], list[str]] | None
+            Paths of the files (passing the filters) which were added or
+            modified, and of those which were deleted. A renamed file is
+            listed as deleted and added. None if the changes cannot be
+            listed, i.e. if `head_sha` is not a descendant of `base_sha`
+            (e.g. after a force push) or there are more changed files than
+            the compare API returns, in which case the whole branch
+            should be loaded instead.
+        """
+        if base_sha == head_sha:
+            return [], []
+
+        try:
+            comparison = self._get(f"compare/{base_sha}...{head_sha}").json()
+        except httpx.HTTPStatusError as e:
+            # the base commit may no longer exist, e.g. after a force push
+            if e.response.status_code == 404:
+                return None
+            raise
+
+        files = comparison.get("files", [])
+        if comparison["status"] != "ahead" or len(files) >= MAX_COMPARE_FILES:
+            return None
+
+        changed, deleted = [], []
+        for file in files:
+            if file["status"] == "removed":
+                deleted.append(file["filename"])
+            elif file["status"] != "unchanged":
+                changed.append(file["filename"])
+            if file["status"] == "renamed":
+                deleted.append(file["previous_filename"])
+
+        return (
+            [f for f in changed if self._allow_file(f)],
+            [f for f in deleted if self._allow_file(f)],
+        )
+
+    def load_files(
+        self, file_paths: list[str], ref: str, branch: str
+    ) -> list[Document]:
+        """
+        Load individual files from the repository.
+
+        Parameters
+        ----------
+        file_paths : list[str]
+            Paths of the files to load.
+        ref : str
+            Commit SHA (or other git ref) to load the files at.
+        branch : str
+            Branch to use in the "url" metadata.
+
+        Returns
+        -------
+        list[Document]
+            One document per file which can be decoded as text.
+        """
+        documents = []
+        for file_path in file_paths:
+            content = self._get(
+                f"contents/{file_path}", accept="application/vnd.github.raw", ref=ref
+            ).content
+            document = self._make_document(file_path, content, branch)
+            if document is not None:
+                documents.append(document)
+
+        return documents
+
+    def load_data(self, branch: str, ref: str | None = None) -> list[Document]:
+        """
+        Load the files in a branch of the repository.
+
+        Parameters
+        ----------
+        branch : str
+            Branch (or any other git ref) to load.
+        ref : str | None, optional
+            Commit SHA to download, by default None (the latest commit
+            on `branch`). `branch` is still used in the "url" metadata.
+
+        Returns
+        -------
+        list[Document]
+            One document per file which passes the filters.
+        """
+        url = f"{self.api_url}/repos/{self.owner}/{self.repo}/tarball/{ref or branch}"
+        headers = self._headers()
+
+        for attempt in range(self.retries + 1):
+            try:
+                with httpx.stream(
+                    "GET",
+                    url,
+                    headers=headers,
+                    follow_redirects=True,
+                    timeout=self.timeout,
+                ) as response:
+                    response.raise_for_status()
+                    documents = self._read_archive(response, branch)
+                break
+            except (httpx.HTTPError, tarfile.TarError) as e:
+                client_error = (
+                    isinstance(e, httpx.HTTPStatusError)
+                    and e.response.status_code < 500
+                )
+                if client_error or attempt == self.retries:
+                    raise
+                logging.warning(
+                    f"Failed to download {self.owner}/{self.repo}@{branch} "
+                    f"(attempt {attempt + 1}/{self.retries + 1}): {e!r}"
+                )
+
+        logging.info(
+            f"Read {len(documents)} files from the "
+            f"{self.owner}/{self.repo}@{branch} tarball"
+        )
+        return documents
@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import pathlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+from llama_index.core import Document
+from llama_index.core.readers.base import BaseReader
+
+from reginald.models.llama_index.github_archive import GITHUB_API_URL
+
+# the most issues the API returns per page
+ISSUES_PER_PAGE = 100
+
+# fields of each issue kept in the snapshot
+ISSUE_FIELDS = [
+    "number",
+    "title",
+    "body",
+    "state",
+    "created_at",
+    "updated_at",
+    "closed_at",
+    "url",
+    "html_url",
+    "assignee",
+    "labels",
+]
+
+
+def _last_page(link_header: str | None) -> int:
+    """
+    Number of the last page from the "Link" header of a paginated response.
+
+    Examples
+    --------
+    >>> _last_page('<https://a.b/issues?page=2>; rel="next", '
+    ...            '<https://a.b/issues?page=7>; rel="last"')
+    7
+    >>> _last_page(None)
+    1
+    """
+    match = re.search(r'[?&]page=(\d+)[^>]*>; rel="last"', link_header or "")
+    return int(match.group(1)) if match else 1
+
+
+class GithubIssuesReader(BaseReader):
+    def __init__(
+        self,
+        github_token: str | None,
+        owner: str,
+        repo: str,
+        snapshot_path: pathlib.Path | str,
+        concurrent_requests: int = 4,
+        timeout: int = 60,
+        api_url: str = GITHUB_API_URL,
+    ) -> None:
+        """
+        Reader for the open issues of a GitHub repository which keeps
+        a local snapshot of the issues between index builds.
+
+        The issues are kept in a JSONL file with one issue per line.
+        After the first full download, only the issues updated since
+        the most recent update in the snapshot need to be fetched
+        (using the `since` parameter of the issues API). Pages of
+        issues are fetched concurrently, and the documents have the
+        same text and metadata as those of `GitHubRepositoryIssuesReader`
+        with "url" set to the issue's page rather than its API URL
+        (which is kept as "api_url").
+
+        Parameters
+        ----------
+        github_token : str | None
+            GitHub token to authenticate with, or None for public repos.
+        owner : str
+            Owner of the repository.
+        repo : str
+            Name of the repository.
+        snapshot_path : pathlib.Path | str
+            Path to the JSONL snapshot of the issues.
+        concurrent_requests : int, optional
+            Number of pages to fetch at once, by default 4.
+        timeout : int, optional
+            Timeout in seconds for each request, by default 60.
+        api_url : str, optional
+            Base URL of the GitHub API, by default "https://api.github.com".
+        """
+        self.github_token = github_token
+        self.owner = owner
+        self.repo = repo
+        self.snapshot_path = pathlib.Path(snapshot_path)
+        self.concurrent_requests = concurrent_requests
+        self.timeout = timeout
+        self.api_url = api_url.rstrip("/")
+
+    def read_snapshot(self) -> dict[int, dict[str, Any]]:
+        """
+        Issues in the snapshot keyed by issue number,
+        or an empty dict if there is no snapshot.
+        """
+        if not self.snapshot_path.exists():
+            return {}
+
+        with open(self.snapshot_path) as f:
+            issues = [json.loads(line) for line in f if line.strip()]
+
+        return {issue["number"]: issue for issue in issues}
+
+    def write_snapshot(self, issues: dict[int, dict[str, Any]]) -> None:
+        """
+        Replace the snapshot with the given issues.
+        """
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first so an interrupted
+        # write does not leave a truncated snapshot
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            for number in sorted(issues):
+                f.write(json.dumps(issues[number]) + "\n")
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _get_page(self, page: int, **params) -> httpx.Response:
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.github_token:
+            headers["Authorization"] = f"Bearer {self.github_token}"
+
+        response = httpx.get(
+            f"{self.api_url}/repos/{self.owner}/{self.repo}/issues",
+            headers=headers,
+            # sort by creation so issues do not move between pages
+            # if they are updated while the pages are fetched
+            params={
+                "sort": "created",
+                "direction": "asc",
+                "per_page": ISSUES_PER_PAGE,
+                "page": page,
+                **params,
+            },
+            follow_redirects=True,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response
+
+    def fetch_issues(
+        self, since: str | None = None, state: str = "all"
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch issues from the API.
+
+        The first page is fetched to find the number of pages from
+        its "Link" header, then the other pages are fetched in a pool
+        of `concurrent_requests` threads.
+
+        Parameters
+        ----------
+        since : str | None, optional
+            ISO 8601 timestamp; only issues updated at or after this
+            time are fetched. By default None (fetch all issues).
+        state : str, optional
+            State of the issues to fetch, "open", "closed" or "all",
+            by default "all".
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            The `ISSUE_FIELDS` of each issue.
+        """
+        params = {"state": state} if since is None else {"state": state, "since": since}
+        first_page = self._get_page(1, **params)
+        n_pages = _last_page(first_page.headers.get("link"))
+
+        pages = [first_page.json()]
+        if n_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrent_requests) as executor:
+                pages += executor.map(
+                    lambda page: self._get_page(page, **params).json(),
+                    range(2, n_pages + 1),
+                )
+
+        issues = [
+            {field: issue.get(field) for field in ISSUE_FIELDS}
+            for page in pages
+            for issue in page
+        ]
+        logging.info(
+            f"Fetched {len(issues)} issues from {n_pages} page(s) of "
+            f"{self.owner}/{self.repo}" + ("" if since is None else f" since {since}")
+        )
+        return issues
+
+    def sync(self, incremental: bool = True) -> dict[int, dict[str, Any]]:
+        """
+        Update the snapshot from the API.
+
+        Parameters
+        ----------
+        incremental : bool, optional
+            Whether to only fetch the issues updated since the most
+            recent update in the snapshot, by default True. Open and
+            closed issues are fetched, so issues closed since are
+            dropped. Otherwise only the open issues are fetched and the
+            snapshot is replaced, which also drops issues which have
+            since been deleted or transferred to another repository.
+
+        Returns
+        -------
+        dict[int, dict[str, Any]]
+            Open issues in the updated snapshot keyed by issue number.
+        """
+        issues = self.read_snapshot() if incremental else {}
+        since = max((issue["updated_at"] for issue in issues.values()), default=None)
+
+        # a full sync only needs the open issues, which are all that is
+        # indexed, but an incremental sync also needs the issues closed
+        # since the snapshot was last updated to drop them
+        fetched = self.fetch_issues(since, state="open" if since is None else "all")
+        issues.update({issue["number"]: issue for issue in fetched})
+        issues = {
+            number: issue
+            for number, issue in issues.items()
+            if issue["state"] == "open"
+        }
+        self.write_snapshot(issues)
+
+        return issues
+
+    @staticmethod
+    def _make_document(issue: dict[str, Any]) -> Document:
+        # same metadata (in the same order) as GitHubRepositoryIssuesReader
+        # with the URLs swapped, so documents hash as they did before
+        metadata = {
+            "state": issue["state"],
+            "created_at": issue["created_at"],
+            "url": issue["html_url"],
+            "source": issue["html_url"],
+        }
+        if issue["closed_at"] is not None:
+            metadata["closed_at"] = issue["closed_at"]
+        if issue["assignee"] is not None:
+            metadata["assignee"] = issue["assignee"]["login"]
+        if issue["labels"] is not None:
+            metadata["labels"] = [label["name"] for label in issue["labels"]]
+        metadata["api_url"] = issue["url"]
+
+        return Document(
+            doc_id=str(issue["number"]),
+            text=f"{issue['title']}\n{issue['body']}",
+            extra_info=metadata,
+        )
+
+    def load_data(
+        self, incremental: bool = True, offline: bool = False
+    ) -> list[Document]:
+        """
+        Load the open issues of the repository.
+
+        Parameters
+        ----------
+        incremental : bool, optional
+            Whether to only fetch the issues updated since the snapshot
+            was last updated, by default True (see `sync`).
+        offline : bool, optional
+            Whether to read the snapshot without fetching anything,
+            by default False.
+
+        Returns
+        -------
+        list[Document]
+            One document per open issue.
+        """
+        issues = self.read_snapshot() if offline else self.sync(incremental)
+
+        # snapshots written before closed issues were dropped may hold some
+        return [
+            self._make_document(issues[number])
+            for number in sorted(issues)
+            if issues[number]["state"] == "open"
+        ]
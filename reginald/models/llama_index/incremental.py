@@ -0,0 +1,208 @@
+import hashlib
+import logging
+from typing import Callable, Iterable, Iterator
+
+from llama_index.core import Document, VectorStoreIndex
+from llama_index.core.ingestion import run_transformations
+
+
+def stable_doc_id(document: Document) -> str:
+    """
+    ID for a document which stays the same between builds.
+
+    The readers give documents IDs which change when the document
+    changes (GitHub blob SHAs) or on every run (random UUIDs and
+    temporary file paths), so the document's URL is used instead,
+    falling back to its file path and then to a hash of its text.
+
+    Examples
+    --------
+    >>> stable_doc_id(Document(text="hello", metadata={"url": "https://a.b/c"}))
+    'https://a.b/c'
+    >>> stable_doc_id(Document(text="hello"))[:12]
+    'sha256:2cf24'
+    """
+    for key in ["url", "file_path"]:
+        if document.metadata.get(key):
+            return str(document.metadata[key])
+
+    return "sha256:" + hashlib.sha256(document.text.encode()).hexdigest()
+
+
+def iter_stable_ids(documents: Iterable[Document]) -> Iterator[Document]:
+    """
+    Set the ID of each document to its `stable_doc_id` as it is
+    read from a stream of documents.
+
+    Documents sharing an ID are numbered in the order they appear,
+    e.g. "https://a.b/c", "https://a.b/c#2".
+
+    Parameters
+    ----------
+    documents : Iterable[Document]
+        Documents to update in place.
+
+    Yields
+    ------
+    Document
+        The same documents.
+    """
+    counts: dict[str, int] = {}
+    for document in documents:
+        doc_id = stable_doc_id(document)
+        counts[doc_id] = counts.get(doc_id, 0) + 1
+        if counts[doc_id] > 1:
+            doc_id = f"{doc_id}#{counts[doc_id]}"
+        document.id_ = doc_id
+        yield document
+
+
+def assign_stable_ids(documents: list[Document]) -> list[Document]:
+    """
+    Set the ID of each document to its `stable_doc_id`
+    (see `iter_stable_ids`).
+
+    Parameters
+    ----------
+    documents : list[Document]
+        Documents to update in place.
+
+    Returns
+    -------
+    list[Document]
+        The same documents.
+    """
+    return list(iter_stable_ids(documents))
+
+
+class IndexUpdateSummary:
+    def __init__(
+        self,
+        added: list[str],
+        updated: list[str],
+        deleted: list[str],
+        unchanged: list[str],
+    ) -> None:
+        """
+        Record of the documents changed by an incremental index update.
+
+        Parameters
+        ----------
+        added : list[str]
+            IDs of documents which were not in the index.
+        updated : list[str]
+            IDs of documents whose content has changed.
+        deleted : list[str]
+            IDs of documents which are no longer in the sources.
+        unchanged : list[str]
+            IDs of documents which were left as they are.
+        """
+        self.added = added
+        self.updated = updated
+        self.deleted = deleted
+        self.unchanged = unchanged
+
+    def __str__(self) -> str:
+        lines = [
+            f"{len(self.added)} added, {len(self.updated)} updated, "
+            f"{len(self.deleted)} deleted, {len(self.unchanged)} unchanged"
+        ]
+        for label, doc_ids in [
+            ("+", self.added),
+            ("~", self.updated),
+            ("-", self.deleted),
+        ]:
+            lines += [f"  {label} {doc_id}" for doc_id in doc_ids]
+
+        return "\n".join(lines)
+
+
+def update_index(
+    index: VectorStoreIndex,
+    documents: list[Document],
+    keep_missing: Callable[[str], bool] | None = None,
+    show_progress: bool = False,
+) -> IndexUpdateSummary:
+    """
+    Bring an existing index in line with a new set of documents.
+
+    Documents are matched to those already in the index by ID and
+    compared using the hash llama-index records for each document
+    in the docstore. Only new and changed documents are chunked and
+    embedded, and the nodes of changed documents and of documents
+    which are no longer present are removed.
+
+    Parameters
+    ----------
+    index : VectorStoreIndex
+        Index to update in place.
+    documents : list[Document]
+        The full set of documents the index should contain,
+        with stable IDs (see `assign_stable_ids`).
+    keep_missing : Callable[[str], bool] | None, optional
+        Function of a document ID which returns True if the document
+        should be kept when it is not in `documents`, by default None
+        (remove all such documents). This is needed if `documents` may
+        be incomplete, e.g. if some sources failed to load or only
+        what changed in a source was loaded.
+    show_progress : bool, optional
+        Whether to show progress bars while embedding, by default False.
+
+    Returns
+    -------
+    IndexUpdateSummary
+        Summary of the documents which changed.
+    """
+    docstore = index.docstore
+    existing = set(docstore.get_all_ref_doc_info() or {})
+
+    added, updated, unchanged = [], [], []
+    to_embed = []
+    for document in documents:
+        doc_id = document.get_doc_id()
+        if doc_id not in existing:
+            added.append(doc_id)
+            to_embed.append(document)
+        elif docstore.get_document_hash(doc_id) != document.hash:
+            updated.append(doc_id)
+            to_embed.append(document)
+        else:
+            unchanged.append(doc_id)
+
+    incoming = {document.get_doc_id() for document in documents}
+    deleted, kept = [], []
+    for doc_id in sorted(existing - incoming):
+        if keep_missing is not None and keep_missing(doc_id):
+            kept.append(doc_id)
+        else:
+            deleted.append(doc_id)
+    unchanged += kept
+
+    # remove the nodes of changed and deleted documents from the
+    # vector store in one go, as deleting document by document
+    # would copy a memory mapped embedding matrix each time
+    to_remove = updated + deleted
+    node_ids = []
+    for doc_id in to_remove:
+        node_ids += docstore.get_ref_doc_info(doc_id).node_ids
+    if node_ids:
+        index.vector_store.delete_nodes(node_ids)
+    for node_id in node_ids:
+        index.index_struct.delete(node_id)
+    for doc_id in to_remove:
+        docstore.delete_ref_doc(doc_id, raise_error=False)
+
+    if to_embed:
+        logging.info(f"Embedding {len(to_embed)} new or changed documents...")
+        nodes = run_transformations(
+            to_embed, index._transformations, show_progress=show_progress
+        )
+        index.insert_nodes(nodes)
+        for document in to_embed:
+            docstore.set_document_hash(document.get_doc_id(), document.hash)
+
+    index.storage_context.index_store.add_index_struct(index.index_struct)
+
+    return IndexUpdateSummary(
+        added=added, updated=updated, deleted=deleted, unchanged=unchanged
+    )
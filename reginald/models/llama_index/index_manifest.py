@@ -0,0 +1,65 @@
+import datetime
+import json
+import logging
+import pathlib
+import uuid
+from typing import Any, Final
+
+MANIFEST_FNAME: Final[str] = "index_manifest.json"
+
+
+def read_manifest(directory: pathlib.Path | str) -> dict[str, Any]:
+    """
+    Read the manifest of a persisted index.
+
+    Parameters
+    ----------
+    directory : pathlib.Path | str
+        Directory where the index has been persisted.
+
+    Returns
+    -------
+    dict[str, Any]
+        Contents of the manifest. Indices persisted before manifests
+        were introduced have no manifest, in which case an empty
+        dictionary is returned.
+    """
+    manifest_path = pathlib.Path(directory) / MANIFEST_FNAME
+    if not manifest_path.exists():
+        return {}
+
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def write_manifest(directory: pathlib.Path | str, **fields: Any) -> dict[str, Any]:
+    """
+    Write the manifest of a persisted index.
+
+    A fresh `build_id` and `created_at` timestamp are recorded
+    alongside the fields passed in.
+
+    Parameters
+    ----------
+    directory : pathlib.Path | str
+        Directory where the index has been persisted.
+    **fields : Any
+        JSON serialisable fields to record in the manifest.
+
+    Returns
+    -------
+    dict[str, Any]
+        Contents of the manifest that was written.
+    """
+    manifest = {
+        "build_id": uuid.uuid4().hex,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        **fields,
+    }
+
+    manifest_path = pathlib.Path(directory) / MANIFEST_FNAME
+    logging.info(f"Writing index manifest to {manifest_path}")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
@@ -5,7 +5,9 @@ from typing import Callable
 from llama_index.core import PromptHelper, Settings
 from llama_index.core.base.llms.base import BaseLLM
 from llama_index.core.settings import _Settings
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+from reginald.models.llama_index.embedding_backend import load_embed_model
+from reginald.models.llama_index.notebooks import NotebookCellRanges
 
 
 def compute_default_chunk_size(max_input_size: int, k: int) -> int:
@@ -35,6 +37,7 @@ def setup_settings(
     chunk_size: int | str | None = None,
     k: int | str | None = None,
     tokenizer: Callable[[str], int] | None = None,
+    embedding_backend: str = "torch",
 ) -> _Settings:
     """
     Helper function to set up the settings.
@@ -62,6 +65,9 @@ def setup_settings(
     tokenizer: Callable[[str], int] | None, optional
         Tokenizer to use. A callable function on a string.
         Can also be None if using the default set by LlamaIndex.
+    embedding_backend : str, optional
+        Backend to run the embedding model with, "torch" (default)
+        or "int8" (see `load_embed_model`).
 
     Returns
     -------
@@ -89,10 +95,7 @@ def setup_settings(
     )
 
     # initialise embedding model to use to create the index vectors
-    embed_model = HuggingFaceEmbedding(
-        model_name="sentence-transformers/all-mpnet-base-v2",
-        embed_batch_size=64,
-    )
+    embed_model = load_embed_model(backend=embedding_backend, embed_batch_size=64)
 
     # construct the prompt helper
     prompt_helper = PromptHelper(
@@ -108,11 +111,16 @@ def setup_settings(
     logging.info(f"Settings llm: {llm}")
     Settings.embed_model = embed_model
     logging.info(f"Settings embed_model: {embed_model}")
-    logging.info(f"Embedding model initialised on device {embed_model._device}")
+    logging.info(
+        f"Embedding model initialised on device {embed_model._device} "
+        f"with the {embedding_backend} backend"
+    )
     Settings.prompt_helper = prompt_helper
     logging.info(f"Settings prompt_helper: {prompt_helper}")
     Settings.chunk_size = chunk_size
     logging.info(f"Settings chunk_size: {chunk_size}")
+    # record which cells of a notebook each node comes from
+    Settings.transformations = [Settings.node_parser, NotebookCellRanges()]
     Settings.tokenizer = tokenizer
     logging.info(f"Settings tokenizer: {tokenizer}")
 
@@ -0,0 +1,208 @@
+import json
+import logging
+from bisect import bisect_right
+from typing import Any, Final, Sequence
+
+from llama_index.core import Document
+from llama_index.core.schema import BaseNode, RelatedNodeInfo, TransformComponent
+
+# document metadata holding the offset in the text and number of each cell
+NOTEBOOK_CELLS_KEY: Final[str] = "notebook_cells"
+
+# node metadata holding the (1-based) cells a node was chunked from
+CELLS_KEY: Final[str] = "cells"
+
+# number of characters of each code cell's outputs to keep
+MAX_OUTPUT_CHARS: Final[int] = 500
+
+
+def _text(value: str | list[str]) -> str:
+    # notebook sources and outputs are strings or lists of lines
+    return value if isinstance(value, str) else "".join(value)
+
+
+def _render_outputs(outputs: list[dict[str, Any]], max_output_chars: int) -> str:
+    """
+    Plain text of the outputs of a code cell, truncated to
+    `max_output_chars` characters. Images, HTML and other rich outputs
+    are dropped (along with the text shown in place of an image),
+    and errors are reduced to their name and message.
+    """
+    texts = []
+    for output in outputs:
+        output_type = output.get("output_type")
+        if output_type == "stream":
+            texts.append(_text(output.get("text", "")))
+        elif output_type in ("execute_result", "display_data"):
+            data = output.get("data", {})
+            if "text/plain" in data and not any(k.startswith("image/") for k in data):
+                texts.append(_text(data["text/plain"]))
+        elif output_type == "error":
+            texts.append(f"{output.get('ename')}: {output.get('evalue')}")
+
+    text = "\n".join(t.strip("\n") for t in texts if t.strip())
+    if len(text) > max_output_chars:
+        text = text[:max_output_chars] + "\n[output truncated]"
+    return text
+
+
+def render_notebook(
+    content: str, max_output_chars: int = MAX_OUTPUT_CHARS
+) -> tuple[str, list[list[int]]]:
+    """
+    Text of a Jupyter notebook for indexing: its markdown cells, its code
+    cells in fenced code blocks and their plain text outputs (truncated),
+    without the execution counts, metadata or rich outputs of the JSON.
+
+    Parameters
+    ----------
+    content : str
+        JSON of the notebook (nbformat 4).
+    max_output_chars : int, optional
+        Number of characters of each code cell's outputs to keep,
+        by default 500. Use 0 to drop the outputs.
+
+    Returns
+    -------
+    tuple[str, list[list[int]]]
+        The text and, for each non-empty cell, the offset of its text
+        and its (1-based) number in the notebook.
+
+    Raises
+    ------
+    ValueError
+        If `content` is not the JSON of a notebook.
+
+    Examples
+    --------
+    >>> notebook = {
+    ...     "metadata": {"kernelspec": {"language": "python"}},
+    ...     "cells": [
+    ...         {"cell_type": "markdown", "source": ["# Title\\n", "Intro"]},
+    ...         {"cell_type": "code", "source": "", "outputs": []},
+    ...         {
+    ...             "cell_type": "code",
+    ...             "execution_count": 2,
+    ...             "source": "print(1 + 1)",
+    ...             "outputs": [
+    ...                 {"output_type": "stream", "name": "stdout", "text": ["2\\n"]},
+    ...                 {"output_type": "display_data", "data": {
+    ...                     "image/png": "iVBORw0KGgo=", "text/plain": "<Figure>"
+    ...                 }},
+    ...             ],
+    ...         },
+    ...     ],
+    ... }
+    >>> text, cells = render_notebook(json.dumps(notebook))
+    >>> print(text)
+    # Title
+    Intro
+    <BLANKLINE>
+    ```python
+    print(1 + 1)
+    ```
+    Output:
+    ```
+    2
+    ```
+    >>> cells
+    [[0, 1], [15, 3]]
+    """
+    try:
+        notebook = json.loads(content)
+        cells = notebook["cells"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Not a Jupyter notebook: {e!r}") from e
+
+    metadata = notebook.get("metadata", {})
+    language = metadata.get("kernelspec", {}).get("language") or metadata.get(
+        "language_info", {}
+    ).get("name", "")
+
+    parts = []
+    offsets = []
+    offset = 0
+    for number, cell in enumerate(cells, start=1):
+        source = _text(cell.get("source", "")).strip("\n")
+        if not source.strip():
+            continue
+
+        if cell.get("cell_type") == "code":
+            part = f"```{language}\n{source}\n```"
+            outputs = _render_outputs(cell.get("outputs", []), max_output_chars)
+            if outputs and max_output_chars > 0:
+                part += f"\nOutput:\n```\n{outputs}\n```"
+        else:
+            part = source
+
+        parts.append(part)
+        offsets.append([offset, number])
+        offset += len(part) + 2
+
+    return "\n\n".join(parts), offsets
+
+
+def notebook_document(
+    document: Document, max_output_chars: int = MAX_OUTPUT_CHARS
+) -> Document:
+    """
+    Replace the raw JSON text of a notebook document with its cells
+    (see `render_notebook`), keeping its ID and metadata and recording
+    where each cell starts in `NOTEBOOK_CELLS_KEY`. Documents which
+    cannot be read as a notebook are returned as they are.
+    """
+    try:
+        text, cells = render_notebook(document.text, max_output_chars)
+    except ValueError as e:
+        logging.debug(f"Keeping {document.doc_id} as it is: {e}")
+        return document
+
+    excluded_keys = [NOTEBOOK_CELLS_KEY, CELLS_KEY]
+    return Document(
+        doc_id=document.doc_id,
+        text=text,
+        metadata={**document.metadata, NOTEBOOK_CELLS_KEY: cells},
+        excluded_embed_metadata_keys=(
+            document.excluded_embed_metadata_keys + excluded_keys
+        ),
+        excluded_llm_metadata_keys=document.excluded_llm_metadata_keys + excluded_keys,
+    )
+
+
+class NotebookCellRanges(TransformComponent):
+    """
+    Transformation which records the cells of a notebook each node was
+    chunked from (e.g. "3-5") in its `CELLS_KEY` metadata, in place of
+    the cell offsets of the notebook document the node was chunked from,
+    which are also dropped from the node's relationships so they are not
+    persisted. Nodes from other documents are left as they are.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NotebookCellRanges"
+
+    def __call__(self, nodes: Sequence[BaseNode], **kwargs: Any) -> list[BaseNode]:
+        for node in nodes:
+            # the node parser copies the document's metadata (and that of
+            # neighbouring nodes) into the node's relationships too
+            for related in node.relationships.values():
+                for info in related if isinstance(related, list) else [related]:
+                    if isinstance(info, RelatedNodeInfo):
+                        info.metadata.pop(NOTEBOOK_CELLS_KEY, None)
+
+            cells = node.metadata.pop(NOTEBOOK_CELLS_KEY, None)
+            if not cells or node.start_char_idx is None:
+                continue
+
+            offsets = [offset for offset, _ in cells]
+            first = bisect_right(offsets, node.start_char_idx) - 1
+            last = bisect_right(offsets, max(node.end_char_idx - 1, 0)) - 1
+            first_cell, last_cell = cells[max(first, 0)][1], cells[max(last, 0)][1]
+            node.metadata[CELLS_KEY] = (
+                str(first_cell)
+                if first_cell == last_cell
+                else f"{first_cell}-{last_cell}"
+            )
+
+        return list(nodes)
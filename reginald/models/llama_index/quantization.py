@@ -0,0 +1,236 @@
+import logging
+import os
+import pathlib
+from typing import Final
+
+import numpy as np
+
+from reginald.models.llama_index.similarity import normalise_rows, top_k_indices
+
+QUANTIZATION_TYPES: Final[list[str]] = ["none", "float16", "int8", "binary"]
+
+SCALES_FNAME: Final[str] = "embedding_scales.npy"
+BINARY_CODES_FNAME: Final[str] = "embedding_codes.npy"
+
+# number of set bits in each possible byte, for hamming distances
+_POPCOUNT: Final[np.ndarray] = np.unpackbits(
+    np.arange(256, dtype=np.uint8)[:, None], axis=1
+).sum(axis=1)
+
+
+def save_npy_atomic(path: pathlib.Path, array: np.ndarray) -> None:
+    """
+    Save an array to a `.npy` file via a temporary file which is then
+    swapped in, as the existing file may be memory mapped by the very
+    store being persisted.
+    """
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class QuantizedEmbeddings:
+    def __init__(
+        self,
+        quantization: str,
+        values: np.ndarray,
+        scales: np.ndarray | None = None,
+        codes: np.ndarray | None = None,
+        n_rescore: int = 100,
+        block_size: int = 16384,
+    ) -> None:
+        """
+        Matrix of unit-length embeddings stored in a reduced precision.
+
+        This behaves like the float32 matrix it was built from for the
+        operations the retrievers use: `embeddings @ query` gives a
+        float32 score for each row, and `embeddings[rows]` gives
+        float32 rows. Rows are converted to float32 a block at a time,
+        so the full float32 matrix is never held in memory.
+
+        - "float16": `values` are the embeddings in half precision.
+        - "int8": `values` are the embeddings scaled by a per-row factor
+          (stored in `scales`) into the range [-127, 127].
+        - "binary": `codes` hold the sign bit of each dimension, packed
+          into bytes. `embeddings @ query` shortlists the `n_rescore`
+          rows closest to the query in hamming distance and rescores
+          only those exactly with the float32 `values` (which can stay
+          on disk as a memory map). All other rows score `-inf`.
+
+        Parameters
+        ----------
+        quantization : str
+            One of "float16", "int8" or "binary".
+        values : np.ndarray
+            2D array of (quantized) embeddings, one row per node.
+        scales : np.ndarray | None, optional
+            Per-row scale factors, required for "int8".
+        codes : np.ndarray | None, optional
+            Packed sign bits, required for "binary".
+        n_rescore : int, optional
+            Size of the shortlist rescored exactly for "binary",
+            by default 100.
+        block_size : int, optional
+            Number of rows converted to float32 at a time, by default 16384.
+        """
+        if quantization not in QUANTIZATION_TYPES[1:]:
+            raise ValueError(
+                f"quantization must be one of {QUANTIZATION_TYPES[1:]}, "
+                f"got '{quantization}'."
+            )
+        if quantization == "int8" and scales is None:
+            raise ValueError("int8 quantization requires per-row scales.")
+        if quantization == "binary" and codes is None:
+            raise ValueError("binary quantization requires packed codes.")
+
+        self.quantization = quantization
+        self.values = values
+        self.scales = scales
+        self.codes = codes
+        self.n_rescore = n_rescore
+        self.block_size = block_size
+
+    @classmethod
+    def from_float(
+        cls, embeddings: np.ndarray, quantization: str, **kwargs
+    ) -> "QuantizedEmbeddings":
+        """
+        Quantize a float32 matrix of unit-length embeddings.
+
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            2D array of unit-length embeddings, one row per node.
+        quantization : str
+            One of "float16", "int8" or "binary".
+
+        Returns
+        -------
+        QuantizedEmbeddings
+            Quantized embeddings.
+
+        Examples
+        --------
+        >>> e = normalise_rows(np.array([[1.0, 2.0, -2.0], [3.0, 0.0, 4.0]]))
+        >>> q = QuantizedEmbeddings.from_float(e, "int8")
+        >>> q.values
+        array([[  64,  127, -127],
+               [  95,    0,  127]], dtype=int8)
+        >>> np.allclose(q @ e[1], e @ e[1], atol=1e-2)
+        True
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if quantization == "float16":
+            return cls("float16", values=embeddings.astype(np.float16), **kwargs)
+
+        if quantization == "int8":
+            scales = np.abs(embeddings).max(axis=1) / 127
+            scales[scales == 0] = 1.0
+            values = np.round(embeddings / scales[:, None]).astype(np.int8)
+            return cls("int8", values=values, scales=scales, **kwargs)
+
+        if quantization == "binary":
+            codes = np.packbits(embeddings > 0, axis=1)
+            return cls("binary", values=embeddings, codes=codes, **kwargs)
+
+        raise ValueError(f"Unknown quantization '{quantization}'.")
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.values.shape
+
+    @property
+    def size(self) -> int:
+        return self.values.size
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self[:], dtype=dtype)
+
+    def __getitem__(self, rows) -> np.ndarray:
+        values = np.asarray(self.values[rows], dtype=np.float32)
+        if self.quantization == "int8":
+            scales = np.asarray(self.scales[rows], dtype=np.float32)
+            values = values * (scales[..., None] if values.ndim > 1 else scales)
+        return values
+
+    def __matmul__(self, query_embedding: np.ndarray) -> np.ndarray:
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        if self.quantization == "binary":
+            return self._binary_scores(query_embedding)
+
+        return np.concatenate(
+            [
+                self[i : i + self.block_size] @ query_embedding
+                for i in range(0, len(self), self.block_size)
+            ]
+            or [np.zeros(0, dtype=np.float32)]
+        )
+
+    def _binary_scores(self, query_embedding: np.ndarray) -> np.ndarray:
+        query_code = np.packbits(query_embedding > 0)
+        distances = np.concatenate(
+            [
+                _POPCOUNT[self.codes[i : i + self.block_size] ^ query_code].sum(axis=1)
+                for i in range(0, len(self), self.block_size)
+            ]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+
+        # rescore the shortlist exactly
+        shortlist = np.sort(top_k_indices(-distances, self.n_rescore))
+        scores = np.full(len(self), -np.inf, dtype=np.float32)
+        scores[shortlist] = self[shortlist] @ query_embedding
+        return scores
+
+    def save(self, directory: pathlib.Path | str, values_path: pathlib.Path) -> None:
+        """
+        Save the quantized embeddings.
+
+        Parameters
+        ----------
+        directory : pathlib.Path | str
+            Directory to save the scales or codes to.
+        values_path : pathlib.Path
+            Path to save `values` to.
+        """
+        directory = pathlib.Path(directory)
+        save_npy_atomic(values_path, np.asarray(self.values))
+        if self.scales is not None:
+            save_npy_atomic(directory / SCALES_FNAME, np.asarray(self.scales))
+        if self.codes is not None:
+            save_npy_atomic(directory / BINARY_CODES_FNAME, np.asarray(self.codes))
+
+    @classmethod
+    def load(
+        cls,
+        directory: pathlib.Path | str,
+        values_path: pathlib.Path,
+        quantization: str,
+        **kwargs,
+    ) -> "QuantizedEmbeddings":
+        """
+        Load saved quantized embeddings, memory mapping the values.
+
+        Binary codes are read into memory as they are scanned
+        in full for every query, whereas only the shortlisted
+        float32 rows are read from the memory map.
+        """
+        directory = pathlib.Path(directory)
+        logging.info(f"Loading {quantization} quantized embeddings from {directory}")
+        scales, codes = None, None
+        if quantization == "int8":
+            scales = np.load(directory / SCALES_FNAME)
+        if quantization == "binary":
+            codes = np.load(directory / BINARY_CODES_FNAME)
+
+        return cls(
+            quantization,
+            values=np.load(values_path, mmap_mode="r"),
+            scales=scales,
+            codes=codes,
+            **kwargs,
+        )
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+
+def embed_queries(embed_model: BaseEmbedding, queries: list[str]) -> list[Embedding]:
+    """
+    Embed a batch of queries in one forward pass if the embedding model
+    supports it, otherwise one at a time.
+    """
+    if isinstance(embed_model, HuggingFaceEmbedding):
+        return embed_model._embed(queries, prompt_name="query")
+    return [embed_model._get_query_embedding(query) for query in queries]
+
+
+class QueryEmbeddingBatcher:
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        """
+        Service which embeds the queries of concurrent requests together.
+
+        Callers of `embed` put their query on a queue and wait for its
+        embedding. A worker thread takes the first query waiting, collects
+        any others which arrive within `max_wait_ms` (up to `max_batch_size`
+        queries), embeds them in one batch and hands each caller its
+        embedding. Queries which arrive while a batch is being embedded
+        are taken together in the next batch.
+
+        The number of batches and queries embedded are counted, so the
+        occupancy of the batches (the mean number of queries per batch
+        as a fraction of `max_batch_size`) can be monitored to tune the
+        batch size and wait.
+
+        Parameters
+        ----------
+        embed_model : BaseEmbedding
+            Embedding model to embed the queries with.
+        max_batch_size : int, optional
+            Maximum number of queries to embed at a time, by default 64.
+        max_wait_ms : float, optional
+            Maximum time to wait for more queries after the first query
+            of a batch arrives in milliseconds, by default 5. If 0, only
+            the queries already waiting are taken.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative.")
+
+        self.embed_model = embed_model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.queries = 0
+        self._queue: queue.SimpleQueue[tuple[str, Future]] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def submit(self, query: str) -> Future:
+        """
+        Queue a query to embed along with those of any concurrent
+        callers, returning a future for its embedding.
+        """
+        future: Future = Future()
+        self._queue.put((query, future))
+        self._start_worker()
+        return future
+
+    def embed(self, query: str) -> Embedding:
+        """
+        Embed a query along with those of any concurrent callers,
+        blocking until its embedding is ready.
+        """
+        return self.submit(query).result()
+
+    def _start_worker(self) -> None:
+        # the worker is started on first use, in the process using it
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="query-embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _next_batch(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            queries = [query for query, _ in batch]
+            try:
+                embeddings = embed_queries(self.embed_model, queries)
+            except Exception as e:
+                logging.error(f"Failed to embed a batch of {len(batch)} queries: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.queries += len(batch)
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(list(embedding))
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Number of batches and queries embedded so far, and the mean
+        number of queries per batch and occupancy of the batches.
+        """
+        with self._lock:
+            batches, queries = self.batches, self.queries
+
+        mean_batch_size = queries / batches if batches else 0.0
+        return {
+            "batches": batches,
+            "queries": queries,
+            "mean_batch_size": mean_batch_size,
+            "batch_occupancy": mean_batch_size / self.max_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+
+class BatchedQueryEmbedding(BaseEmbedding):
+    """
+    Embedding model which embeds queries through a `QueryEmbeddingBatcher`,
+    so the queries of concurrent requests are embedded together.
+    Texts are embedded by the wrapped model directly.
+    """
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _batcher: QueryEmbeddingBatcher = PrivateAttr()
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        embed_model : BaseEmbedding
+            Embedding model to wrap.
+        max_batch_size : int, optional
+            Maximum number of queries to embed at a time, by default 64.
+        max_wait_ms : float, optional
+            Maximum time to wait for more queries to batch with
+            a query in milliseconds, by default 5.
+        """
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            callback_manager=embed_model.callback_manager,
+            **kwargs,
+        )
+        self._embed_model = embed_model
+        self._batcher = QueryEmbeddingBatcher(
+            embed_model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "BatchedQueryEmbedding"
+
+    @property
+    def embed_model(self) -> BaseEmbedding:
+        return self._embed_model
+
+    @property
+    def batcher(self) -> QueryEmbeddingBatcher:
+        return self._batcher
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._batcher.embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await asyncio.wrap_future(self._batcher.submit(query))
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._embed_model._get_text_embedding(text)
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        return self._embed_model._get_text_embeddings(texts)
@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from reginald.models.llama_index.retriever import CompositeRetriever, NumpyRetriever
+
+
+def normalise_message(message: str) -> str:
+    """
+    Normalise a message so that messages which differ only in case,
+    Unicode form or whitespace share cache entries.
+
+    Examples
+    --------
+    >>> normalise_message("  How do I book\\nannual   leave? ")
+    'how do i book annual leave?'
+    """
+    message = unicodedata.normalize("NFKC", message).casefold()
+    return re.sub(r"\s+", " ", message).strip()
+
+
+class LRUCache:
+    def __init__(self, max_size: int, ttl_seconds: float | None = None) -> None:
+        """
+        Thread-safe in-memory cache which evicts its least recently used
+        entries beyond `max_size` entries, and entries older than
+        `ttl_seconds`. Hits and misses are counted.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of entries to keep.
+        ttl_seconds : float | None, optional
+            Time after which an entry expires in seconds,
+            by default None (entries do not expire).
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Value of an entry, or None if it is not cached or has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl_seconds is None
+                or time.monotonic() - entry[0] <= self.ttl_seconds
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry (the hit and miss counts are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Number of entries, hits and misses."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class QueryCache:
+    def __init__(self, max_size: int = 1024, ttl_seconds: float | None = 3600) -> None:
+        """
+        Two level cache of the retrieval for a message: the embedding of
+        each normalised message, and the IDs and scores of the nodes
+        retrieved for it from each version of the index with each k.
+
+        The retrieved nodes are only kept for the version of the index
+        set with `set_index_version`, so they are dropped when a different
+        index is loaded. Embeddings do not depend on the index and are kept.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximum number of entries in each level, by default 1,024.
+        ttl_seconds : float | None, optional
+            Time after which an entry expires in seconds,
+            by default 3,600. If None, entries do not expire.
+        """
+        self.embeddings = LRUCache(max_size, ttl_seconds)
+        self.results = LRUCache(max_size, ttl_seconds)
+        self.index_version: str | None = None
+
+    def set_index_version(self, index_version: str) -> None:
+        """
+        Set the version of the loaded index, dropping the nodes
+        retrieved from any other version.
+        """
+        if index_version != self.index_version:
+            self.results.clear()
+            self.index_version = index_version
+
+    def stats(self) -> dict[str, Any]:
+        """Number of entries, hits and misses of each level."""
+        return {
+            "index_version": self.index_version,
+            "embeddings": self.embeddings.stats(),
+            "results": self.results.stats(),
+        }
+
+
+class CachedRetriever(BaseRetriever):
+    def __init__(
+        self,
+        retriever: NumpyRetriever | CompositeRetriever,
+        embed_model: BaseEmbedding,
+        cache: QueryCache,
+        similarity_top_k: int,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Retriever which looks up the embedding of a message and the nodes
+        retrieved for it in a `QueryCache` before embedding the message
+        and searching the index with the wrapped retriever.
+
+        Parameters
+        ----------
+        retriever : NumpyRetriever | CompositeRetriever
+            Retriever to search the index with on a cache miss.
+        embed_model : BaseEmbedding
+            Embedding model to embed messages with on a cache miss.
+        cache : QueryCache
+            Cache to look up and store embeddings and retrieved nodes in,
+            with the version of the index `retriever` searches set.
+        similarity_top_k : int
+            Number of nodes `retriever` retrieves.
+        """
+        super().__init__(**kwargs)
+        self.retriever = retriever
+        self.embed_model = embed_model
+        self.cache = cache
+        self.similarity_top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        message_key = normalise_message(query_bundle.query_str)
+
+        if query_bundle.embedding is None:
+            embedding = self.cache.embeddings.get(message_key)
+            if embedding is None:
+                embedding = self.embed_model.get_agg_embedding_from_queries(
+                    query_bundle.embedding_strs
+                )
+                self.cache.embeddings.put(message_key, embedding)
+            query_bundle.embedding = embedding
+
+        results_key = (message_key, self.similarity_top_k, self.cache.index_version)
+        results = self.cache.results.get(results_key)
+        if results is not None:
+            nodes = self.retriever.get_nodes([node_id for node_id, _ in results])
+            return [
+                NodeWithScore(node=node, score=score)
+                for node, (_, score) in zip(nodes, results)
+            ]
+
+        nodes = self.retriever.retrieve(query_bundle)
+        self.cache.results.put(results_key, [(n.node.node_id, n.score) for n in nodes])
+        return nodes
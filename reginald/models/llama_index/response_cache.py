@@ -0,0 +1,248 @@
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Final, NamedTuple
+
+from reginald.models.llama_index.query_cache import normalise_message
+
+RESPONSE_CACHE_BACKENDS: Final[list[str]] = ["none", "memory", "sqlite"]
+
+RESPONSE_CACHE_FNAME: Final[str] = "responses.sqlite"
+
+
+class ResponseCacheKey(NamedTuple):
+    """
+    What a response to a query depends on: the (normalised) message,
+    the LLM, the index and version of it searched and the number of
+    nodes retrieved and tokens generated.
+    """
+
+    message: str
+    model_name: str
+    which_index: str
+    index_version: str
+    k: int
+    num_output: int
+
+    @classmethod
+    def create(
+        cls,
+        message: str,
+        model_name: str,
+        which_index: str,
+        index_version: str,
+        k: int,
+        num_output: int,
+    ) -> "ResponseCacheKey":
+        """
+        Key of the response to a message, normalising the message
+        (see `normalise_message`).
+
+        Examples
+        --------
+        >>> key = ResponseCacheKey.create(
+        ...     "What is  REG?", "llama", "reg", "build-1", k=3, num_output=512
+        ... )
+        >>> key.message
+        'what is reg?'
+        >>> key.digest()[:16]
+        'b7285d3a67d28027'
+        """
+        return cls(
+            normalise_message(message),
+            model_name,
+            which_index,
+            index_version,
+            k,
+            num_output,
+        )
+
+    def digest(self) -> str:
+        """Hash of the fields of the key."""
+        return hashlib.sha256(json.dumps(list(self)).encode()).hexdigest()
+
+
+class InMemoryResponseCache:
+    def __init__(self, max_entries: int) -> None:
+        """
+        In-memory cache of responses to queries, which evicts the least
+        recently used responses beyond `max_entries` responses. The number
+        of times each response has been reused is recorded.
+
+        Parameters
+        ----------
+        max_entries : int
+            Maximum number of responses to keep.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[ResponseCacheKey, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: ResponseCacheKey) -> str | None:
+        """Cached response for a key, or None if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            self.hits += 1
+            return entry["response"]
+
+    def put(self, key: ResponseCacheKey, response: str) -> None:
+        """Cache a response, evicting the least recently used if full."""
+        with self._lock:
+            self._entries[key] = {"response": response, "hits": 0}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Key and number of hits of each cached response, most hit first."""
+        with self._lock:
+            entries = [
+                {**key._asdict(), "hits": entry["hits"]}
+                for key, entry in self._entries.items()
+            ]
+        return sorted(entries, key=lambda e: e["hits"], reverse=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Number of responses cached, hits and misses."""
+        return {
+            "backend": "memory",
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SQLiteResponseCache:
+    def __init__(self, db_path: pathlib.Path | str, max_entries: int) -> None:
+        """
+        On-disk cache of responses to queries, kept between runs of the
+        app. The least recently used responses are evicted beyond
+        `max_entries` responses, and the number of times each response
+        has been reused is recorded with it.
+
+        Parameters
+        ----------
+        db_path : pathlib.Path | str
+            Path to the SQLite database (created if it does not exist).
+        max_entries : int
+            Maximum number of responses to keep.
+        """
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, message TEXT NOT NULL, model_name TEXT NOT NULL, "
+            "which_index TEXT NOT NULL, index_version TEXT NOT NULL, "
+            "k INTEGER NOT NULL, num_output INTEGER NOT NULL, "
+            "response TEXT NOT NULL, hits INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: ResponseCacheKey) -> str | None:
+        """Cached response for a key, or None if there is none."""
+        digest = key.digest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE responses SET hits = hits + 1, last_used = ? WHERE key = ?",
+                    (time.time(), digest),
+                )
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: ResponseCacheKey, response: str) -> None:
+        """Cache a response, evicting the least recently used if full."""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                    (key.digest(), *key, response, now, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN ("
+                    "SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Key and number of hits of each cached response, most hit first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(ResponseCacheKey._fields)}, hits "
+                "FROM responses ORDER BY hits DESC"
+            ).fetchall()
+        return [dict(zip([*ResponseCacheKey._fields, "hits"], row)) for row in rows]
+
+    def stats(self) -> dict[str, Any]:
+        """Number of responses cached, hits and misses (since started)."""
+        return {
+            "backend": "sqlite",
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def load_response_cache(
+    backend: str, directory: pathlib.Path | str, max_entries: int
+) -> InMemoryResponseCache | SQLiteResponseCache | None:
+    """
+    Response cache with a backend: None for "none", an
+    `InMemoryResponseCache` for "memory" or a `SQLiteResponseCache`
+    kept in `directory` for "sqlite".
+    """
+    if backend not in RESPONSE_CACHE_BACKENDS:
+        raise ValueError(
+            f"Response cache must be one of {RESPONSE_CACHE_BACKENDS}, not '{backend}'."
+        )
+    if backend == "memory":
+        return InMemoryResponseCache(max_entries)
+    if backend == "sqlite":
+        return SQLiteResponseCache(
+            pathlib.Path(directory) / RESPONSE_CACHE_FNAME, max_entries
+        )
+    return None
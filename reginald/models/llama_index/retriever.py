@@ -0,0 +1,223 @@
+import heapq
+import threading
+from typing import Any
+
+import numpy as np
+from llama_index.core import VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryBundle
+from llama_index.core.storage.docstore.types import BaseDocumentStore
+
+from reginald.models.llama_index.ann_index import IVFIndex
+from reginald.models.llama_index.similarity import normalise_rows, top_k_indices
+from reginald.models.llama_index.vector_store import embedding_matrix
+
+
+class NumpyRetriever(BaseRetriever):
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        node_ids: list[str],
+        docstore: BaseDocumentStore,
+        embed_model: BaseEmbedding,
+        similarity_top_k: int = 3,
+        ann_index: IVFIndex | None = None,
+        n_probe: int = 8,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Retriever which scores all nodes with a single matrix-vector
+        product over a matrix of unit-length float32 embeddings and
+        selects the top-k with `np.argpartition`.
+
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            2D array of unit-length embeddings, one row per node.
+            This can be a memory map, in which case it is not copied.
+        node_ids : list[str]
+            Node ID for each row of `embeddings`.
+        docstore : BaseDocumentStore
+            Document store to fetch the retrieved nodes from.
+        embed_model : BaseEmbedding
+            Embedding model used to embed queries.
+        similarity_top_k : int, optional
+            Number of nodes to retrieve, by default 3.
+        ann_index : IVFIndex | None, optional
+            Approximate nearest neighbour index over `embeddings`,
+            by default None (scores every node exactly).
+        n_probe : int, optional
+            Number of IVF lists to search if using `ann_index`,
+            by default 8.
+        """
+        super().__init__(**kwargs)
+        if ann_index is not None and ann_index.n_vectors != len(node_ids):
+            raise ValueError(
+                f"ANN index covers {ann_index.n_vectors} embeddings "
+                f"but there are {len(node_ids)} nodes."
+            )
+
+        self._embeddings = embeddings
+        self._node_ids = node_ids
+        self._docstore = docstore
+        self._embed_model = embed_model
+        self.similarity_top_k = similarity_top_k
+        self.ann_index = ann_index
+        self.n_probe = n_probe
+
+    @classmethod
+    def from_index(
+        cls, index: VectorStoreIndex, similarity_top_k: int = 3, **kwargs: Any
+    ) -> "NumpyRetriever":
+        """
+        Create a retriever over the embeddings of a `VectorStoreIndex`.
+
+        Parameters
+        ----------
+        index : VectorStoreIndex
+            Index backed by a `MemmapVectorStore` or a `SimpleVectorStore`.
+        similarity_top_k : int, optional
+            Number of nodes to retrieve, by default 3.
+
+        Returns
+        -------
+        NumpyRetriever
+            Retriever over all nodes in the index.
+        """
+        embeddings, node_ids = embedding_matrix(index.vector_store)
+
+        return cls(
+            embeddings=embeddings,
+            node_ids=node_ids,
+            docstore=index.docstore,
+            embed_model=index._embed_model,
+            similarity_top_k=similarity_top_k,
+            **kwargs,
+        )
+
+    def _get_query_embedding(self, query_bundle: QueryBundle) -> np.ndarray:
+        if query_bundle.embedding is None:
+            query_bundle.embedding = self._embed_model.get_agg_embedding_from_queries(
+                query_bundle.embedding_strs
+            )
+        return normalise_rows([query_bundle.embedding])[0]
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        if len(self._node_ids) == 0:
+            return []
+
+        query_embedding = self._get_query_embedding(query_bundle)
+        if self.ann_index is not None:
+            top, scores = self.ann_index.search(
+                self._embeddings,
+                query_embedding,
+                k=self.similarity_top_k,
+                n_probe=self.n_probe,
+            )
+        else:
+            scores = self._embeddings @ query_embedding
+            top = top_k_indices(scores, self.similarity_top_k)
+            scores = scores[top]
+
+        nodes = self.get_nodes([self._node_ids[i] for i in top])
+
+        return [
+            NodeWithScore(node=node, score=float(score))
+            for node, score in zip(nodes, scores)
+        ]
+
+    def get_nodes(self, node_ids: list[str]) -> list[BaseNode]:
+        """Nodes of the index with the given IDs."""
+        return self._docstore.get_nodes(node_ids)
+
+
+class CompositeRetriever(BaseRetriever):
+    def __init__(
+        self,
+        retrievers: list[NumpyRetriever],
+        similarity_top_k: int = 3,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Retriever over the source indices of a composite index, which
+        retrieves the top-k nodes from each source index and keeps the
+        top-k of those by score.
+
+        The query is embedded once and the embedding reused for each
+        source index, so the source indices must have been built with
+        the same embedding model.
+
+        Parameters
+        ----------
+        retrievers : list[NumpyRetriever]
+            Retriever for each source index.
+        similarity_top_k : int, optional
+            Number of nodes to retrieve, by default 3.
+        """
+        super().__init__(**kwargs)
+        self.retrievers = retrievers
+        self.similarity_top_k = similarity_top_k
+        for retriever in self.retrievers:
+            retriever.similarity_top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        # the first retriever sets the query embedding of the bundle
+        # for the others
+        results = [
+            node
+            for retriever in self.retrievers
+            for node in retriever.retrieve(query_bundle)
+        ]
+
+        return heapq.nlargest(self.similarity_top_k, results, key=lambda n: n.score)
+
+    def get_nodes(self, node_ids: list[str]) -> list[BaseNode]:
+        """Nodes of the source indices with the given IDs."""
+        nodes = []
+        for node_id in node_ids:
+            for retriever in self.retrievers:
+                if retriever._docstore.document_exists(node_id):
+                    nodes.append(retriever._docstore.get_node(node_id))
+                    break
+            else:
+                raise ValueError(f"Node {node_id} is not in any source index.")
+        return nodes
+
+
+class PrefetchedRetriever(BaseRetriever):
+    def __init__(self, retriever: BaseRetriever, **kwargs: Any) -> None:
+        """
+        Retriever which returns the nodes retrieved ahead of time for a
+        message by `prefetch` in the same thread, otherwise retrieves them
+        with `retriever`.
+
+        A chat engine retrieves the nodes for a message inside its `chat`
+        method, so this lets the nodes be retrieved (and the message
+        embedded along with those of concurrent requests) before waiting
+        for the LLM.
+
+        Parameters
+        ----------
+        retriever : BaseRetriever
+            Retriever to retrieve the nodes with.
+        """
+        super().__init__(**kwargs)
+        self.retriever = retriever
+        self._prefetched = threading.local()
+
+    def prefetch(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        """
+        Retrieve the nodes for a query, to be returned by the next
+        retrieval for it in this thread.
+        """
+        nodes = self.retriever.retrieve(query_bundle)
+        self._prefetched.value = (query_bundle.query_str, nodes)
+        return nodes
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        prefetched = getattr(self._prefetched, "value", None)
+        self._prefetched.value = None
+        if prefetched is not None and prefetched[0] == query_bundle.query_str:
+            return prefetched[1]
+        return self.retriever.retrieve(query_bundle)
@@ -0,0 +1,163 @@
+import logging
+import os
+import pathlib
+from typing import Final, Iterator
+
+import pandas as pd
+from llama_index.core import Document
+
+# columns of a scrape of a website: the URL and text of each page
+SCRAPE_COLUMNS: Final[list[str]] = ["url", "body"]
+
+# number of pages to read at a time
+SCRAPE_CHUNK_SIZE: Final[int] = 1_000
+
+
+def _iter_csv_columns(
+    path: pathlib.Path, chunk_size: int
+) -> Iterator[tuple[list, list]]:
+    for chunk in pd.read_csv(
+        path, usecols=SCRAPE_COLUMNS, dtype=str, chunksize=chunk_size
+    ):
+        chunk = chunk[chunk["body"].notna()]
+        yield chunk["url"].tolist(), chunk["body"].tolist()
+
+
+def _iter_parquet_columns(
+    path: pathlib.Path, chunk_size: int
+) -> Iterator[tuple[list, list]]:
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(
+        batch_size=chunk_size, columns=SCRAPE_COLUMNS
+    ):
+        urls = batch.column("url").to_pylist()
+        bodies = batch.column("body").to_pylist()
+        keep = [body is not None for body in bodies]
+        yield (
+            [url for url, k in zip(urls, keep) if k],
+            [body for body, k in zip(bodies, keep) if k],
+        )
+
+
+def iter_scrape_documents(
+    path: pathlib.Path | str, chunk_size: int = SCRAPE_CHUNK_SIZE
+) -> Iterator[Document]:
+    """
+    Documents for the pages of a scraped website, read lazily a chunk
+    of rows at a time from a CSV or Parquet file with "url" and "body"
+    columns. Pages with no body are skipped.
+
+    The columns of each chunk are converted to lists in one go rather
+    than row by row, so only `chunk_size` pages are held in memory at
+    once and the documents can be fed straight into an index build.
+
+    Parameters
+    ----------
+    path : pathlib.Path | str
+        Path to the scrape, a ".csv" file or a ".parquet" file
+        (which requires `pyarrow`, see `write_scrape_snapshot`).
+    chunk_size : int, optional
+        Number of rows to read at a time, by default 1,000.
+
+    Yields
+    ------
+    Document
+        Document with the text of a page and its URL in the metadata.
+    """
+    path = pathlib.Path(path)
+    if path.suffix == ".parquet":
+        chunks = _iter_parquet_columns(path, chunk_size)
+    else:
+        chunks = _iter_csv_columns(path, chunk_size)
+
+    for urls, bodies in chunks:
+        for url, body in zip(urls, bodies):
+            yield Document(text=body, extra_info={"url": url})
+
+
+def write_scrape_snapshot(
+    csv_path: pathlib.Path | str,
+    snapshot_path: pathlib.Path | str,
+    chunk_size: int = SCRAPE_CHUNK_SIZE,
+) -> None:
+    """
+    Convert a CSV scrape to a Parquet snapshot with string typed
+    "url" and "body" columns, which is much faster to read than
+    parsing the CSV again. The CSV is converted a chunk at a time.
+
+    Requires `pyarrow`.
+
+    Parameters
+    ----------
+    csv_path : pathlib.Path | str
+        Path to the CSV scrape.
+    snapshot_path : pathlib.Path | str
+        Path to write the Parquet snapshot to.
+    chunk_size : int, optional
+        Number of rows to convert at a time, by default 1,000.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in SCRAPE_COLUMNS])
+    snapshot_path = pathlib.Path(snapshot_path)
+
+    # write to a temporary file first so an interrupted
+    # write does not leave a truncated snapshot
+    tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.tmp")
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for chunk in pd.read_csv(
+            csv_path, usecols=SCRAPE_COLUMNS, dtype=str, chunksize=chunk_size
+        ):
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+    os.replace(tmp_path, snapshot_path)
+
+
+def scrape_path(
+    csv_path: pathlib.Path | str, snapshot_dir: pathlib.Path | str
+) -> pathlib.Path:
+    """
+    Path to read a CSV scrape from: its Parquet snapshot in `snapshot_dir`
+    if `pyarrow` is installed, writing the snapshot first if there is none
+    or the CSV has changed since, otherwise the CSV itself.
+
+    The snapshot is kept in its own directory rather than alongside
+    the CSV, which may be tracked in version control.
+
+    Parameters
+    ----------
+    csv_path : pathlib.Path | str
+        Path to the CSV scrape.
+    snapshot_dir : pathlib.Path | str
+        Directory to keep the Parquet snapshot in.
+
+    Returns
+    -------
+    pathlib.Path
+        Path to the snapshot or the CSV.
+    """
+    csv_path = pathlib.Path(csv_path)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logging.info(
+            f"Install pyarrow (the 'snapshots' extra) to read {csv_path.name} "
+            "from a snapshot"
+        )
+        return csv_path
+
+    snapshot_dir = pathlib.Path(snapshot_dir)
+    snapshot_path = snapshot_dir / csv_path.with_suffix(".parquet").name
+    if (
+        not snapshot_path.exists()
+        or snapshot_path.stat().st_mtime < csv_path.stat().st_mtime
+    ):
+        logging.info(f"Writing a snapshot of {csv_path} to {snapshot_path}")
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        write_scrape_snapshot(csv_path, snapshot_path)
+
+    return snapshot_path
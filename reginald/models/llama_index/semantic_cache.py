@@ -0,0 +1,172 @@
+import datetime
+import json
+import logging
+import pathlib
+import threading
+import time
+from typing import Any, Final, Hashable
+
+import numpy as np
+from llama_index.core.base.embeddings.base import Embedding
+
+from reginald.models.llama_index.similarity import normalise_rows
+
+SEMANTIC_HITS_FNAME: Final[str] = "semantic_hits.jsonl"
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        max_entries: int,
+        threshold: float = 0.95,
+        audit_log_path: pathlib.Path | str | None = None,
+    ) -> None:
+        """
+        In-memory cache of answers to queries, looked up by the similarity
+        of query embeddings, so paraphrases of a question which has been
+        answered reuse its answer.
+
+        An answer is reused if the cosine similarity between the embedding
+        of the new query and that of the query it answered is at least
+        `threshold`, and it was given in the same context (the LLM, index
+        and version of it, and so on). Each semantic hit is appended to
+        an audit log, with both queries and their similarity, so the
+        threshold can be tuned. The least recently used answers are
+        evicted beyond `max_entries` answers.
+
+        Parameters
+        ----------
+        max_entries : int
+            Maximum number of answers to keep.
+        threshold : float, optional
+            Smallest cosine similarity between query embeddings
+            to reuse an answer, by default 0.95.
+        audit_log_path : pathlib.Path | str | None, optional
+            JSON lines file to append semantic hits to,
+            by default None (hits are only logged).
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.audit_log_path = (
+            pathlib.Path(audit_log_path) if audit_log_path is not None else None
+        )
+        self.hits = 0
+        self.misses = 0
+
+        # one row of `_embeddings` per entry, with entries replaced
+        # in place when the least recently used is evicted, and the
+        # rows of the entries of each context so only those are scored
+        self._embeddings: np.ndarray | None = None
+        self._entries: list[dict[str, Any]] = []
+        self._rows: dict[Hashable, list[int]] = {}
+        self._lock = threading.Lock()
+        # hits are audited outside `_lock`, with their own lock
+        # so the lines of concurrent hits are not interleaved
+        self._audit_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, embedding: Embedding, context: Hashable, message: str) -> str | None:
+        """
+        Answer to the most similar query answered in the same context,
+        if it is within the threshold, otherwise None.
+
+        Parameters
+        ----------
+        embedding : Embedding
+            Embedding of the query.
+        context : Hashable
+            What the answer depends on other than the query.
+        message : str
+            The query, for the audit log.
+        """
+        query = normalise_rows([embedding])[0]
+        with self._lock:
+            rows = self._rows.get(context)
+            if not rows:
+                self.misses += 1
+                return None
+
+            scores = self._embeddings[rows] @ query
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[rows[best]]
+            entry["hits"] += 1
+            entry["last_used"] = time.monotonic()
+            self.hits += 1
+
+        # write the audit log without holding up other lookups
+        self._audit(message, entry, similarity)
+        return entry["answer"]
+
+    def put(
+        self, embedding: Embedding, context: Hashable, message: str, answer: str
+    ) -> None:
+        """
+        Cache an answer to a query, evicting the least recently used
+        answer if the cache is full.
+        """
+        embedding = normalise_rows([embedding])[0]
+        entry = {
+            "context": context,
+            "message": message,
+            "answer": answer,
+            "hits": 0,
+            "last_used": time.monotonic(),
+        }
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros(
+                    (self.max_entries, embedding.shape[0]), dtype=np.float32
+                )
+
+            if len(self._entries) < self.max_entries:
+                row = len(self._entries)
+                self._entries.append(entry)
+            else:
+                row = min(
+                    range(len(self._entries)),
+                    key=lambda i: self._entries[i]["last_used"],
+                )
+                evicted = self._rows[self._entries[row]["context"]]
+                evicted.remove(row)
+                if not evicted:
+                    del self._rows[self._entries[row]["context"]]
+                self._entries[row] = entry
+            self._embeddings[row] = embedding
+            self._rows.setdefault(context, []).append(row)
+
+    def _audit(self, message: str, entry: dict[str, Any], similarity: float) -> None:
+        record = {
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "message": message,
+            "cached_message": entry["message"],
+            "similarity": round(similarity, 4),
+            "threshold": self.threshold,
+            "context": list(entry["context"]),
+        }
+        logging.info(
+            f"Semantic cache hit (similarity {similarity:.3f}): '{message}' "
+            f"answered as '{entry['message']}'"
+        )
+        if self.audit_log_path is not None:
+            with self._audit_lock:
+                self.audit_log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.audit_log_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def stats(self) -> dict[str, Any]:
+        """Number of answers cached, hits and misses."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
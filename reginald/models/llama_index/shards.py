@@ -0,0 +1,156 @@
+import hashlib
+import logging
+from typing import Any, Final, Iterable
+
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.storage.storage_context import DEFAULT_VECTOR_STORE
+
+from reginald.models.llama_index.vector_store import embedding_matrix
+
+# shards of an index are kept in `{which_index}.shards/{shard}`
+SHARDS_SUFFIX: Final[str] = ".shards"
+
+
+def shard_of(doc_id: str, num_shards: int) -> int:
+    """
+    Shard a document belongs to when the documents of an index are split
+    between `num_shards` shards by a hash of their (stable) IDs.
+
+    Unlike `hash`, the hash used does not change between processes,
+    so every machine building a shard agrees on where each document goes.
+
+    Examples
+    --------
+    >>> shard_of("https://example.com/page", 1)
+    0
+    >>> [shard_of(doc_id, 3) for doc_id in ["a", "b", "c", "d"]]
+    [1, 1, 2, 2]
+    """
+    digest = hashlib.sha256(doc_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def check_shard_coverage(manifests: list[dict[str, Any]], sources: list[str]) -> None:
+    """
+    Check a set of shards covers each source of an index exactly once.
+
+    Each source must either be in a single shard built from all of its
+    documents, or in shards `0, ..., num_shards - 1` which each hold the
+    documents hashed to them (see `shard_of`).
+
+    Parameters
+    ----------
+    manifests : list[dict[str, Any]]
+        Manifests of the shards, with the `shard`, `num_shards` and
+        `sources` recorded when each shard was built.
+    sources : list[str]
+        Sources of the index.
+
+    Raises
+    ------
+    ValueError
+        If a source is missing from the shards or is in too many of them.
+
+    Examples
+    --------
+    >>> check_shard_coverage(
+    ...     [
+    ...         {"shard": 0, "num_shards": None, "sources": ["a"]},
+    ...         {"shard": 1, "num_shards": 2, "sources": ["b"]},
+    ...         {"shard": 0, "num_shards": 2, "sources": ["b"]},
+    ...     ],
+    ...     ["a", "b"],
+    ... )
+    >>> check_shard_coverage([{"shard": 0, "num_shards": 2, "sources": ["a"]}], ["a"])
+    Traceback (most recent call last):
+    ...
+    ValueError: Shards of 'a' are [0] but should be [0, 1].
+    """
+    for source in sources:
+        covering = [m for m in manifests if source in m["sources"]]
+        if not covering:
+            raise ValueError(f"No shard holds the documents of '{source}'.")
+
+        num_shards = {m["num_shards"] or 1 for m in covering}
+        if len(num_shards) > 1:
+            raise ValueError(
+                f"'{source}' is split into different numbers of shards: "
+                f"{sorted(num_shards)}."
+            )
+
+        # shards built from all the documents of a source hold hash range 0/1
+        shards = sorted(m["shard"] if m["num_shards"] else 0 for m in covering)
+        expected = list(range(num_shards.pop()))
+        if shards != expected:
+            raise ValueError(
+                f"Shards of '{source}' are {shards} but should be {expected}."
+            )
+
+
+def merge_shards(
+    shards: Iterable[StorageContext],
+    storage_context: StorageContext,
+    embed_model: BaseEmbedding,
+    batch_size: int,
+) -> VectorStoreIndex:
+    """
+    Merge the partial indices built for the shards of an index into one.
+
+    The nodes of each shard are copied, with the embeddings computed when
+    the shard was built, into the stores of `storage_context` a batch at
+    a time, shard by shard in the order given and in the order they were
+    added within each shard. Nothing is embedded again.
+
+    Parameters
+    ----------
+    shards : Iterable[StorageContext]
+        Storage contexts of the persisted shards.
+    storage_context : StorageContext
+        Storage context to merge the nodes into.
+    embed_model : BaseEmbedding
+        Embedding model the shards were built with.
+    batch_size : int
+        Number of nodes to copy at a time.
+
+    Returns
+    -------
+    VectorStoreIndex
+        The merged index.
+
+    Raises
+    ------
+    ValueError
+        If a document is in more than one shard.
+    """
+    index = VectorStoreIndex(
+        nodes=[], storage_context=storage_context, embed_model=embed_model
+    )
+
+    for shard in shards:
+        doc_ids = list(shard.docstore.get_all_ref_doc_info() or {})
+        for doc_id in doc_ids:
+            if index.docstore.get_document_hash(doc_id) is not None:
+                raise ValueError(f"Document '{doc_id}' is in more than one shard.")
+
+        # rows of the embedding matrix are in the order the nodes were added
+        embeddings, node_ids = embedding_matrix(
+            shard.vector_stores[DEFAULT_VECTOR_STORE]
+        )
+        for start in range(0, len(node_ids), batch_size):
+            nodes = shard.docstore.get_nodes(node_ids[start : start + batch_size])
+            for node, embedding in zip(nodes, embeddings[start : start + batch_size]):
+                node.embedding = embedding.tolist()
+            index.insert_nodes(nodes)
+
+        for doc_id in doc_ids:
+            index.docstore.set_document_hash(
+                doc_id, shard.docstore.get_document_hash(doc_id)
+            )
+
+        logging.info(
+            f"Merged {len(node_ids)} nodes of {len(doc_ids)} documents "
+            f"({len(index.index_struct.nodes_dict)} nodes in total)"
+        )
+
+    return index
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row of a matrix to unit length so that dot products
+    between rows are cosine similarities.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        2D array of embeddings (one embedding per row).
+
+    Returns
+    -------
+    np.ndarray
+        float32 array with unit-length rows (rows of zeros are left as zeros).
+
+    Examples
+    --------
+    >>> normalise_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    array([[0.6, 0.8],
+           [0. , 0. ]], dtype=float32)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Find the positions of the `k` highest scores, best first.
+
+    Uses `np.argpartition` so that only the `k` selected scores
+    are sorted, rather than the whole array.
+
+    Parameters
+    ----------
+    scores : np.ndarray
+        1D array of scores.
+    k : int
+        Number of positions to return.
+
+    Returns
+    -------
+    np.ndarray
+        Positions of the `k` highest scores in descending order of score.
+
+    Examples
+    --------
+    >>> top_k_indices(np.array([0.1, 0.9, 0.5, 0.7]), 2)
+    array([1, 3])
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
@@ -0,0 +1,138 @@
+import datetime
+import json
+import logging
+import os
+import pathlib
+from typing import Final
+
+from llama_index.core import Document
+
+SOURCE_SNAPSHOT_SUFFIX: Final[str] = ".parquet"
+
+
+class SourceSnapshots:
+    def __init__(self, directory: pathlib.Path | str) -> None:
+        """
+        Columnar snapshots of the documents loaded from each source,
+        from which an index can be rebuilt without fetching anything.
+
+        Each source is kept in a Parquet file with one row per document
+        holding its ID, text, metadata (as JSON, as the metadata of the
+        sources differ) and the metadata keys excluded from embedding
+        and LLM prompts, so documents read back are the same as those
+        which were loaded (with the same hashes). The commits the source
+        was loaded from and when it was loaded are kept in the file's
+        key-value metadata.
+
+        Requires `pyarrow`.
+
+        Parameters
+        ----------
+        directory : pathlib.Path | str
+            Directory to keep the snapshots in.
+        """
+        self.directory = pathlib.Path(directory)
+
+    @staticmethod
+    def available() -> bool:
+        """Whether pyarrow is installed, so snapshots can be used."""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def path(self, source: str) -> pathlib.Path:
+        """Path to the snapshot of a source."""
+        return self.directory / f"{source}{SOURCE_SNAPSHOT_SUFFIX}"
+
+    def save(
+        self, source: str, documents: list[Document], source_shas: dict[str, str]
+    ) -> None:
+        """
+        Replace the snapshot of a source with the documents loaded from
+        it and the commits they were loaded from.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(
+            {
+                "doc_id": [d.doc_id for d in documents],
+                "text": [d.text for d in documents],
+                "metadata": [json.dumps(d.metadata) for d in documents],
+                "excluded_embed_metadata_keys": [
+                    d.excluded_embed_metadata_keys for d in documents
+                ],
+                "excluded_llm_metadata_keys": [
+                    d.excluded_llm_metadata_keys for d in documents
+                ],
+            },
+            schema=pa.schema(
+                [
+                    ("doc_id", pa.string()),
+                    ("text", pa.string()),
+                    ("metadata", pa.string()),
+                    ("excluded_embed_metadata_keys", pa.list_(pa.string())),
+                    ("excluded_llm_metadata_keys", pa.list_(pa.string())),
+                ],
+                metadata={
+                    "source_shas": json.dumps(source_shas),
+                    "loaded_at": datetime.datetime.now(
+                        datetime.timezone.utc
+                    ).isoformat(),
+                },
+            ),
+        )
+
+        path = self.path(source)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        logging.info(f"Saved a snapshot of {len(documents)} documents to {path}")
+
+    def load(self, source: str) -> tuple[list[Document], dict[str, str]]:
+        """
+        Documents and commit SHAs in the snapshot of a source.
+
+        Raises
+        ------
+        FileNotFoundError
+            If there is no snapshot of the source.
+        """
+        import pyarrow.parquet as pq
+
+        path = self.path(source)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"No snapshot of {source} in {self.directory}. Create the index "
+                "without --from-snapshot first to snapshot its sources."
+            )
+
+        table = pq.read_table(path)
+        schema_metadata = table.schema.metadata
+        logging.info(
+            f"Reading {table.num_rows} documents from the snapshot of {source} "
+            f"loaded at {schema_metadata[b'loaded_at'].decode()}"
+        )
+
+        columns = table.to_pydict()
+        documents = [
+            Document(
+                doc_id=doc_id,
+                text=text,
+                metadata=json.loads(metadata),
+                excluded_embed_metadata_keys=embed_keys,
+                excluded_llm_metadata_keys=llm_keys,
+            )
+            for doc_id, text, metadata, embed_keys, llm_keys in zip(
+                columns["doc_id"],
+                columns["text"],
+                columns["metadata"],
+                columns["excluded_embed_metadata_keys"],
+                columns["excluded_llm_metadata_keys"],
+            )
+        ]
+
+        return documents, json.loads(schema_metadata[b"source_shas"])
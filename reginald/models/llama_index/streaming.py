@@ -0,0 +1,298 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, TypeVar
+
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.indices.utils import embed_nodes
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.schema import BaseComponent, BaseNode
+
+from reginald.models.llama_index.checkpoint import BuildCheckpoint
+from reginald.models.llama_index.embedding_cache import CachedEmbedding, EmbeddingCache
+
+T = TypeVar("T")
+
+# component class and config, from which a worker process rebuilds
+# a component (pickling components drops their private attributes)
+ComponentSpec = tuple[type[BaseComponent], dict[str, Any]]
+
+# embedding model and transformations of the current worker process
+_worker: dict[str, Any] = {}
+
+
+def batched(iterable: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    """
+    Split an iterable into lists of at most `batch_size` items.
+
+    Examples
+    --------
+    >>> list(batched(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _component_spec(component: BaseComponent) -> ComponentSpec:
+    return type(component), component.to_dict()
+
+
+def _init_worker(
+    embed_model_spec: ComponentSpec,
+    transformation_specs: list[ComponentSpec],
+    cache_spec: tuple[str, int] | None,
+) -> None:
+    """
+    Load the embedding model (and open the embedding cache) once
+    in each worker process.
+    """
+    cls, config = embed_model_spec
+    embed_model = cls.from_dict(config)
+    if cache_spec is not None:
+        embed_model = CachedEmbedding(embed_model, EmbeddingCache(*cache_spec))
+
+    _worker["embed_model"] = embed_model
+    _worker["transformations"] = [
+        cls.from_dict(config) for cls, config in transformation_specs
+    ]
+
+
+def _chunk_and_embed(
+    documents: list[Document],
+) -> tuple[list[BaseNode], dict[str, Any]]:
+    """
+    Chunk and embed a batch of documents in a worker process.
+
+    Returns the embedded nodes and the worker's throughput for the batch.
+    """
+    start = time.perf_counter()
+    nodes = run_transformations(documents, _worker["transformations"])
+    embeddings = embed_nodes(nodes, _worker["embed_model"])
+    for node in nodes:
+        node.embedding = embeddings[node.node_id]
+
+    return nodes, {
+        "worker": os.getpid(),
+        "documents": len(documents),
+        "embeddings": len(nodes),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class BuildStats:
+    def __init__(self) -> None:
+        """
+        Number of documents and embeddings each worker has processed
+        during an index build, and the time it spent doing so, along
+        with the number of batches read from checkpoints instead.
+        """
+        self.workers: dict[int, dict[str, float]] = {}
+        self.resumed_batches = 0
+
+    def add(self, worker: int, documents: int, embeddings: int, seconds: float) -> None:
+        totals = self.workers.setdefault(
+            worker, {"documents": 0, "embeddings": 0, "seconds": 0.0}
+        )
+        totals["documents"] += documents
+        totals["embeddings"] += embeddings
+        totals["seconds"] += seconds
+
+    def __str__(self) -> str:
+        lines = [f"{self.resumed_batches} batches read from checkpoints"]
+        for worker, totals in self.workers.items():
+            seconds = max(totals["seconds"], 1e-9)
+            lines.append(
+                f"worker {worker}: {totals['documents']:.0f} docs "
+                f"({totals['documents'] / seconds:.1f} docs/s), "
+                f"{totals['embeddings']:.0f} embeddings "
+                f"({totals['embeddings'] / seconds:.1f} embeddings/s)"
+            )
+        return "\n".join(lines)
+
+
+def _embedded_batches(
+    documents: Iterable[Document],
+    index: VectorStoreIndex,
+    batch_size: int,
+    workers: int,
+    stats: BuildStats,
+    checkpoint: BuildCheckpoint | None = None,
+) -> Iterator[tuple[list[Document], list[BaseNode]]]:
+    """
+    Batches of documents with their embedded nodes, in the order of
+    `documents`, chunked and embedded in a pool of worker processes.
+
+    At most two batches per worker are in flight at once, so the
+    documents are still read lazily.
+    """
+    embed_model = index._embed_model
+    cache_spec = None
+    if isinstance(embed_model, CachedEmbedding):
+        cache_spec = (str(embed_model.cache.db_path), embed_model.cache.max_entries)
+        embed_model = embed_model.embed_model
+
+    # spawn rather than fork, as forking while the loaders' threads
+    # are running can leave locks held in the workers
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            _component_spec(embed_model),
+            [_component_spec(t) for t in index._transformations],
+            cache_spec,
+        ),
+    ) as executor:
+        batches = enumerate(batched(documents, batch_size))
+        pending: deque[tuple[int, list[Document], list[BaseNode] | Future]] = deque()
+        while True:
+            while len(pending) < 2 * workers and (item := next(batches, None)):
+                number, batch = item
+                nodes = _checkpointed_nodes(checkpoint, number, batch, stats)
+                if nodes is None:
+                    nodes = executor.submit(_chunk_and_embed, batch)
+                pending.append((number, batch, nodes))
+            if not pending:
+                break
+
+            number, batch, nodes = pending.popleft()
+            if isinstance(nodes, Future):
+                nodes, batch_stats = nodes.result()
+                stats.add(**batch_stats)
+                if checkpoint is not None:
+                    checkpoint.save_batch(number, batch, nodes)
+            yield batch, nodes
+
+
+def _local_batches(
+    documents: Iterable[Document],
+    index: VectorStoreIndex,
+    batch_size: int,
+    stats: BuildStats,
+    checkpoint: BuildCheckpoint | None = None,
+    show_progress: bool = False,
+) -> Iterator[tuple[list[Document], list[BaseNode]]]:
+    """
+    Batches of documents with their embedded nodes, in the order of
+    `documents`, chunked and embedded in this process.
+    """
+    for number, batch in enumerate(batched(documents, batch_size)):
+        nodes = _checkpointed_nodes(checkpoint, number, batch, stats)
+        if nodes is None:
+            start = time.perf_counter()
+            nodes = run_transformations(
+                batch, index._transformations, show_progress=show_progress
+            )
+            embeddings = embed_nodes(nodes, index._embed_model, show_progress)
+            for node in nodes:
+                node.embedding = embeddings[node.node_id]
+
+            stats.add(os.getpid(), len(batch), len(nodes), time.perf_counter() - start)
+            if checkpoint is not None:
+                checkpoint.save_batch(number, batch, nodes)
+
+        yield batch, nodes
+
+
+def _checkpointed_nodes(
+    checkpoint: BuildCheckpoint | None,
+    number: int,
+    batch: list[Document],
+    stats: BuildStats,
+) -> list[BaseNode] | None:
+    if checkpoint is None:
+        return None
+
+    nodes = checkpoint.load_batch(number, batch)
+    if nodes is not None:
+        stats.resumed_batches += 1
+    return nodes
+
+
+def build_index(
+    documents: Iterable[Document],
+    storage_context: StorageContext,
+    embed_model: BaseEmbedding,
+    batch_size: int,
+    workers: int = 1,
+    checkpoint: BuildCheckpoint | None = None,
+    show_progress: bool = False,
+) -> VectorStoreIndex:
+    """
+    Build an index from a stream of documents, a batch at a time.
+
+    Each batch of documents is chunked into nodes, embedded and added
+    to the stores in `storage_context` as the documents are read,
+    so only a few batches of documents and nodes are held in memory at
+    once (on top of what the stores themselves hold). The resulting index
+    is the same as that of `VectorStoreIndex.from_documents`.
+
+    With more than one worker, batches are chunked and embedded in a
+    pool of worker processes, each of which loads the embedding model
+    once. The nodes are added to the index in the order of `documents`
+    whichever worker finishes first, so the index does not depend on
+    the number of workers. The embedding model and transformations
+    must be rebuildable from their `to_dict` config in a new process.
+
+    Parameters
+    ----------
+    documents : Iterable[Document]
+        Documents to index, which may be a generator.
+    storage_context : StorageContext
+        Storage context to add the nodes to.
+    embed_model : BaseEmbedding
+        Embedding model to embed the nodes with.
+    batch_size : int
+        Number of documents to chunk and embed at a time.
+    workers : int, optional
+        Number of worker processes to chunk and embed with, by default 1
+        (chunk and embed in this process).
+    checkpoint : BuildCheckpoint | None, optional
+        Checkpoints to save the embedded nodes of each batch to, and to
+        read batches saved by an interrupted build from instead of
+        chunking and embedding them again, by default None.
+    show_progress : bool, optional
+        Whether to show progress bars while chunking and embedding,
+        by default False.
+
+    Returns
+    -------
+    VectorStoreIndex
+        The index.
+    """
+    index = VectorStoreIndex(
+        nodes=[], storage_context=storage_context, embed_model=embed_model
+    )
+
+    stats = BuildStats()
+    if workers > 1:
+        batches = _embedded_batches(
+            documents, index, batch_size, workers, stats, checkpoint
+        )
+    else:
+        batches = _local_batches(
+            documents, index, batch_size, stats, checkpoint, show_progress
+        )
+
+    n_documents = 0
+    for batch, nodes in batches:
+        # embeddings computed already are not recomputed
+        index.insert_nodes(nodes)
+        for document in batch:
+            index.docstore.set_document_hash(document.get_doc_id(), document.hash)
+
+        n_documents += len(batch)
+        logging.info(
+            f"Indexed {n_documents} documents "
+            f"({len(index.index_struct.nodes_dict)} nodes)"
+        )
+
+    logging.info(f"Build throughput:\n{stats}")
+    return index
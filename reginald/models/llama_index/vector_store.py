@@ -0,0 +1,365 @@
+import json
+import logging
+import os
+import pathlib
+from typing import Any, Final
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+
+from reginald.models.llama_index.quantization import (
+    QUANTIZATION_TYPES,
+    QuantizedEmbeddings,
+    save_npy_atomic,
+)
+from reginald.models.llama_index.similarity import normalise_rows, top_k_indices
+
+EMBEDDINGS_FNAME: Final[str] = "embeddings.npy"
+NODE_IDS_FNAME: Final[str] = "node_ids.json"
+
+
+def embedding_matrix(
+    vector_store: BasePydanticVectorStore,
+) -> tuple[np.ndarray, list[str]]:
+    """
+    Get the embeddings held by a vector store as one matrix.
+
+    Parameters
+    ----------
+    vector_store : BasePydanticVectorStore
+        A `MemmapVectorStore` (whose matrix is returned without copying)
+        or a `SimpleVectorStore`.
+
+    Returns
+    -------
+    tuple[np.ndarray, list[str]]
+        Matrix of unit-length float32 embeddings (one row per node)
+        and the node ID of each row.
+    """
+    if isinstance(vector_store, MemmapVectorStore):
+        return vector_store.embeddings, vector_store.node_ids
+
+    if isinstance(vector_store, SimpleVectorStore):
+        embedding_dict = vector_store.data.embedding_dict
+        node_ids = list(embedding_dict.keys())
+        embeddings = normalise_rows(
+            [embedding_dict[node_id] for node_id in node_ids]
+            if node_ids
+            else np.zeros((0, 0))
+        )
+        return embeddings, node_ids
+
+    raise ValueError(f"Unsupported vector store type {type(vector_store).__name__}")
+
+
+def _load_embeddings(
+    persist_dir: pathlib.Path, quantization: str
+) -> np.ndarray | QuantizedEmbeddings:
+    if quantization == "none":
+        return np.load(persist_dir / EMBEDDINGS_FNAME, mmap_mode="r")
+
+    return QuantizedEmbeddings.load(
+        persist_dir, persist_dir / EMBEDDINGS_FNAME, quantization=quantization
+    )
+
+
+class MemmapVectorStore(BasePydanticVectorStore):
+    """
+    Vector store holding all embeddings in one contiguous float32 matrix.
+
+    When persisted, the matrix is written as a `.npy` file of
+    unit-length rows, alongside a compact table of node IDs. Loading
+    opens the matrix with `np.memmap`, so start-up does no parsing and
+    the pages are shared between processes through the page cache.
+    Adding or deleting nodes copies the matrix into memory, which is
+    fine at index build time but should be avoided when serving.
+
+    The matrix can be persisted in a reduced precision by setting
+    `quantization` (see `QuantizedEmbeddings`).
+
+    A store created with `spilling_to` appends the embeddings added to
+    it to a file on disk instead, so building a large index does not
+    hold (or repeatedly copy) the whole matrix in memory.
+    """
+
+    stores_text: bool = False
+    quantization: str = "none"
+
+    _embeddings: np.ndarray | QuantizedEmbeddings = PrivateAttr()
+    _node_ids: list[str] = PrivateAttr()
+    _ref_doc_ids: list[str] = PrivateAttr()
+    _positions: dict[str, int] = PrivateAttr()
+    _spill_path: pathlib.Path | None = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        embeddings: np.ndarray | QuantizedEmbeddings | None = None,
+        node_ids: list[str] | None = None,
+        ref_doc_ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        embeddings : np.ndarray | QuantizedEmbeddings | None, optional
+            2D array of unit-length embeddings, one row per node,
+            by default None (empty store).
+        node_ids : list[str] | None, optional
+            Node ID for each row of `embeddings`, by default None.
+        ref_doc_ids : list[str] | None, optional
+            Reference document ID for each row of `embeddings`,
+            by default None.
+        """
+        super().__init__(**kwargs)
+        if self.quantization not in QUANTIZATION_TYPES:
+            raise ValueError(
+                f"quantization must be one of {QUANTIZATION_TYPES}, "
+                f"got '{self.quantization}'."
+            )
+
+        node_ids = node_ids or []
+        if embeddings is None:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+        if len(node_ids) != embeddings.shape[0]:
+            raise ValueError(
+                f"Got {embeddings.shape[0]} embeddings but {len(node_ids)} node IDs."
+            )
+
+        self._embeddings = embeddings
+        self._node_ids = list(node_ids)
+        self._ref_doc_ids = list(ref_doc_ids or ["None"] * len(node_ids))
+        self._positions = {node_id: i for i, node_id in enumerate(self._node_ids)}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MemmapVectorStore"
+
+    @classmethod
+    def from_simple_vector_store(
+        cls, vector_store: SimpleVectorStore
+    ) -> "MemmapVectorStore":
+        """
+        Convert an in-memory `SimpleVectorStore` into a `MemmapVectorStore`.
+
+        Parameters
+        ----------
+        vector_store : SimpleVectorStore
+            Vector store to convert.
+
+        Returns
+        -------
+        MemmapVectorStore
+            Vector store holding the same embeddings.
+        """
+        embeddings, node_ids = embedding_matrix(vector_store)
+        ref_doc_ids = [
+            vector_store.data.text_id_to_ref_doc_id.get(node_id, "None")
+            for node_id in node_ids
+        ]
+
+        return cls(embeddings=embeddings, node_ids=node_ids, ref_doc_ids=ref_doc_ids)
+
+    @classmethod
+    def spilling_to(cls, spill_path: pathlib.Path | str) -> "MemmapVectorStore":
+        """
+        Create an empty store which appends the embeddings added to it
+        to a raw float32 file and memory maps that file, rather than
+        holding the embeddings in memory.
+
+        The file is removed when the store is persisted (the store then
+        memory maps the persisted matrix) or when nodes are deleted
+        (the store then holds the remaining embeddings in memory).
+
+        Parameters
+        ----------
+        spill_path : pathlib.Path | str
+            Path of the file to append embeddings to. Any existing
+            file at this path is replaced.
+
+        Returns
+        -------
+        MemmapVectorStore
+            Empty vector store.
+        """
+        store = cls()
+        store._spill_path = pathlib.Path(spill_path)
+        store._spill_path.parent.mkdir(parents=True, exist_ok=True)
+        store._spill_path.unlink(missing_ok=True)
+        return store
+
+    @classmethod
+    def from_persist_dir(
+        cls, persist_dir: pathlib.Path | str, quantization: str = "none"
+    ) -> "MemmapVectorStore":
+        """
+        Open a persisted `MemmapVectorStore` without reading the
+        embeddings into memory.
+
+        Parameters
+        ----------
+        persist_dir : pathlib.Path | str
+            Directory where the index has been persisted.
+        quantization : str, optional
+            Quantization the store was persisted with, by default "none".
+
+        Returns
+        -------
+        MemmapVectorStore
+            Vector store backed by a read-only memory map.
+        """
+        persist_dir = pathlib.Path(persist_dir)
+        logging.info(f"Memory mapping embeddings from {persist_dir}")
+        embeddings = _load_embeddings(persist_dir, quantization)
+
+        with open(persist_dir / NODE_IDS_FNAME, "r") as f:
+            node_table = json.load(f)
+
+        return cls(
+            embeddings=embeddings,
+            node_ids=node_table["node_ids"],
+            ref_doc_ids=node_table["ref_doc_ids"],
+            quantization=quantization,
+        )
+
+    @property
+    def client(self) -> None:
+        return None
+
+    @property
+    def embeddings(self) -> np.ndarray | QuantizedEmbeddings:
+        """Matrix of unit-length embeddings, one row per node."""
+        return self._embeddings
+
+    @property
+    def node_ids(self) -> list[str]:
+        """Node ID for each row of `embeddings`."""
+        return self._node_ids
+
+    def get(self, text_id: str) -> list[float]:
+        return self._embeddings[self._positions[text_id]].tolist()
+
+    def add(self, nodes: list[BaseNode], **add_kwargs: Any) -> list[str]:
+        if not nodes:
+            return []
+
+        new_embeddings = normalise_rows([node.get_embedding() for node in nodes])
+        if self._spill_path is not None:
+            with open(self._spill_path, "ab") as f:
+                f.write(new_embeddings.tobytes())
+            self._embeddings = np.memmap(
+                self._spill_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._node_ids) + len(nodes), new_embeddings.shape[1]),
+            )
+        elif self._embeddings.size == 0:
+            self._embeddings = new_embeddings
+        else:
+            self._embeddings = np.vstack([self._embeddings, new_embeddings])
+
+        for node in nodes:
+            self._positions[node.node_id] = len(self._node_ids)
+            self._node_ids.append(node.node_id)
+            self._ref_doc_ids.append(node.ref_doc_id or "None")
+
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._keep([ref != ref_doc_id for ref in self._ref_doc_ids])
+
+    def delete_nodes(
+        self,
+        node_ids: list[str] | None = None,
+        filters: Any = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        if filters is not None:
+            raise NotImplementedError("MemmapVectorStore does not support filters.")
+        to_delete = set(node_ids or [])
+        self._keep([node_id not in to_delete for node_id in self._node_ids])
+
+    def _keep(self, mask: list[bool]) -> None:
+        if all(mask):
+            return
+
+        mask = np.asarray(mask, dtype=bool)
+        self._embeddings = np.ascontiguousarray(self._embeddings[mask])
+        self._remove_spill()
+        self._node_ids = [n for n, keep in zip(self._node_ids, mask) if keep]
+        self._ref_doc_ids = [r for r, keep in zip(self._ref_doc_ids, mask) if keep]
+        self._positions = {node_id: i for i, node_id in enumerate(self._node_ids)}
+
+    def _remove_spill(self) -> None:
+        if self._spill_path is not None:
+            self._spill_path.unlink(missing_ok=True)
+            self._spill_path = None
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"MemmapVectorStore does not support mode {query.mode}")
+        if query.filters is not None:
+            raise NotImplementedError("MemmapVectorStore does not support filters.")
+        if len(self._node_ids) == 0:
+            return VectorStoreQueryResult(similarities=[], ids=[])
+
+        query_embedding = normalise_rows([query.query_embedding])[0]
+        similarities = self._embeddings @ query_embedding
+
+        if query.node_ids is not None:
+            allowed = [
+                self._positions[n] for n in query.node_ids if n in self._positions
+            ]
+            candidates = np.asarray(allowed, dtype=np.int64)
+        else:
+            candidates = np.arange(len(self._node_ids))
+
+        top = candidates[
+            top_k_indices(similarities[candidates], query.similarity_top_k)
+        ]
+
+        return VectorStoreQueryResult(
+            similarities=similarities[top].tolist(),
+            ids=[self._node_ids[i] for i in top],
+        )
+
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        """
+        Persist the store next to `persist_path`.
+
+        `StorageContext.persist` passes the path of the JSON file a
+        `SimpleVectorStore` would write, so the embeddings and node table
+        are written into the same directory instead.
+        """
+        persist_dir = pathlib.Path(os.path.dirname(persist_path))
+        persist_dir.mkdir(parents=True, exist_ok=True)
+
+        embeddings = self._embeddings
+        if self.quantization == "none":
+            save_npy_atomic(
+                persist_dir / EMBEDDINGS_FNAME, np.asarray(embeddings, dtype=np.float32)
+            )
+        else:
+            if not (
+                isinstance(embeddings, QuantizedEmbeddings)
+                and embeddings.quantization == self.quantization
+            ):
+                embeddings = QuantizedEmbeddings.from_float(
+                    np.asarray(embeddings), self.quantization
+                )
+            embeddings.save(persist_dir, persist_dir / EMBEDDINGS_FNAME)
+
+        with open(persist_dir / NODE_IDS_FNAME, "w") as f:
+            json.dump({"node_ids": self._node_ids, "ref_doc_ids": self._ref_doc_ids}, f)
+
+        if self._spill_path is not None:
+            # map the persisted matrix rather than the spill file
+            self._embeddings = _load_embeddings(persist_dir, self.quantization)
+            self._remove_spill()
@@ -22,6 +22,16 @@ def setup_llm(
     is_path: bool | str | None = None,
     n_gpu_layers: int | str | None = None,
     device: str | None = None,
+    ann_index: str | None = None,
+    ann_n_probe: int | str | None = None,
+    embedding_backend: str | None = None,
+    query_batch_size: int | str | None = None,
+    query_batch_wait_ms: float | str | None = None,
+    query_cache_size: int | str | None = None,
+    query_cache_ttl: float | str | None = None,
+    response_cache: str | None = None,
+    response_cache_size: int | str | None = None,
+    semantic_cache_threshold: float | str | None = None,
 ) -> ResponseModel:
     """
     Set up a query or chat engine with an LLM.
@@ -86,6 +96,51 @@ def setup_llm(
     device : str | None, optional
         Select which device to use, by default None (uses "auto").
         Ignored if not using "llama-index-llama-cpp" or "llama-index-hf" models
+    ann_index : str | None, optional
+        Approximate nearest neighbour index to use for retrieval,
+        by default None (uses "none", i.e. exact search).
+        Ignored if not using llama-index
+    ann_n_probe : int | str | None, optional
+        Number of IVF lists to search if `ann_index` is "ivf",
+        by default None (uses 8). If this is a string, it is converted
+        to an integer
+    embedding_backend : str | None, optional
+        Backend to embed queries with, by default None (uses "torch").
+        Options are "torch" or "int8". Ignored if not using llama-index
+    query_batch_size : int | str | None, optional
+        Maximum number of queries of concurrent requests to embed
+        together, by default None (uses 1, so each query is embedded
+        on its own). If this is a string, it is converted to an integer.
+        Ignored if not using llama-index
+    query_batch_wait_ms : float | str | None, optional
+        Maximum time to wait for the queries of other requests to embed
+        with a query in milliseconds, by default None (uses 2).
+        If this is a string, it is converted to a float.
+        Ignored if not using llama-index
+    query_cache_size : int | str | None, optional
+        Maximum number of message embeddings, and of sets of nodes
+        retrieved for a message, to cache, by default None (uses 0, so
+        nothing is cached). If this is a string, it is converted
+        to an integer. Ignored if not using llama-index
+    query_cache_ttl : float | str | None, optional
+        Time after which cached embeddings and retrieved nodes expire
+        in seconds, by default None (uses 3,600). If 0, they do not
+        expire. If this is a string, it is converted to a float.
+        Ignored if not using llama-index
+    response_cache : str | None, optional
+        Cache of the responses to messages in query mode, by default None
+        (uses "none"). Options are "none", "memory" or "sqlite".
+        Ignored if not using llama-index
+    response_cache_size : int | str | None, optional
+        Maximum number of responses to cache, by default None (uses 1,024).
+        If this is a string, it is converted to an integer.
+        Ignored if not using llama-index
+    semantic_cache_threshold : float | str | None, optional
+        Smallest cosine similarity between the embeddings of a message
+        and a previous message to reuse the response to it in query mode,
+        by default None (uses 0, which disables the semantic cache).
+        If this is a string, it is converted to a float.
+        Ignored if not using llama-index
 
     Returns
     -------
@@ -173,6 +228,60 @@ def setup_llm(
     if device is None:
         device = DEFAULT_ARGS["device"]
 
+    # default for ann_index
+    if ann_index is None:
+        ann_index = DEFAULT_ARGS["ann_index"]
+
+    # default for ann_n_probe
+    if ann_n_probe is None:
+        ann_n_probe = DEFAULT_ARGS["ann_n_probe"]
+    if isinstance(ann_n_probe, str):
+        ann_n_probe = int(ann_n_probe)
+
+    # default for embedding_backend
+    if embedding_backend is None:
+        embedding_backend = DEFAULT_ARGS["embedding_backend"]
+
+    # default for query_batch_size
+    if query_batch_size is None:
+        query_batch_size = DEFAULT_ARGS["query_batch_size"]
+    if isinstance(query_batch_size, str):
+        query_batch_size = int(query_batch_size)
+
+    # default for query_batch_wait_ms
+    if query_batch_wait_ms is None:
+        query_batch_wait_ms = DEFAULT_ARGS["query_batch_wait_ms"]
+    if isinstance(query_batch_wait_ms, str):
+        query_batch_wait_ms = float(query_batch_wait_ms)
+
+    # default for query_cache_size
+    if query_cache_size is None:
+        query_cache_size = DEFAULT_ARGS["query_cache_size"]
+    if isinstance(query_cache_size, str):
+        query_cache_size = int(query_cache_size)
+
+    # default for query_cache_ttl
+    if query_cache_ttl is None:
+        query_cache_ttl = DEFAULT_ARGS["query_cache_ttl"]
+    if isinstance(query_cache_ttl, str):
+        query_cache_ttl = float(query_cache_ttl)
+
+    # default for response_cache
+    if response_cache is None:
+        response_cache = DEFAULT_ARGS["response_cache"]
+
+    # default for response_cache_size
+    if response_cache_size is None:
+        response_cache_size = DEFAULT_ARGS["response_cache_size"]
+    if isinstance(response_cache_size, str):
+        response_cache_size = int(response_cache_size)
+
+    # default for semantic_cache_threshold
+    if semantic_cache_threshold is None:
+        semantic_cache_threshold = DEFAULT_ARGS["semantic_cache_threshold"]
+    if isinstance(semantic_cache_threshold, str):
+        semantic_cache_threshold = float(semantic_cache_threshold)
+
     # set up response model
     model = ModelMapper.get_model(model)
     response_model = model(
@@ -189,6 +298,16 @@ def setup_llm(
         is_path=is_path,
         n_gpu_layers=n_gpu_layers,
         device=device,
+        ann_index=ann_index,
+        ann_n_probe=ann_n_probe,
+        embedding_backend=embedding_backend,
+        query_batch_size=query_batch_size,
+        query_batch_wait_ms=query_batch_wait_ms,
+        query_cache_size=query_cache_size,
+        query_cache_ttl=query_cache_ttl,
+        response_cache=response_cache,
+        response_cache_size=response_cache_size,
+        semantic_cache_threshold=semantic_cache_threshold,
     )
 
     return response_model
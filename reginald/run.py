@@ -59,6 +59,18 @@ def main(
         from reginald.models.create_index import create_index
 
         create_index(data_dir=data_dir, which_index=which_index, **kwargs)
+    elif cli == "merge_shards":
+        from reginald.models.create_index import merge_shards
+
+        merge_shards(data_dir=data_dir, which_index=which_index, **kwargs)
+    elif cli == "benchmark_embedding_backend":
+        from reginald.models.benchmark_embedding_backend import (
+            benchmark_embedding_backend,
+        )
+
+        benchmark_embedding_backend(
+            data_dir=data_dir, which_index=which_index, **kwargs
+        )
     elif cli == "download":
         from reginald.models.download_from_fileshare import download_from_fileshare
 
@@ -0,0 +1,54 @@
+import pytest
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+
+from reginald.models.llama_index import llama_utils
+from reginald.models.llama_index.base import LlamaIndex
+
+
+class CountingEmbedding(MockEmbedding):
+    """Mock embedding model which records the texts and queries it embeds."""
+
+    texts: list[str] = Field(default_factory=list)
+    queries: list[str] = Field(default_factory=list)
+    # the device the model runs on, like `HuggingFaceEmbedding`
+    _device: str = PrivateAttr(default="cpu")
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        self.texts.append(text)
+        return super()._get_text_embedding(text)
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        self.queries.append(query)
+        return super()._get_query_embedding(query)
+
+
+@pytest.fixture
+def embed_model() -> CountingEmbedding:
+    return CountingEmbedding(embed_dim=8)
+
+
+class MockLlamaIndex(LlamaIndex):
+    """`LlamaIndex` model with a mock LLM."""
+
+    def _prep_llm(self) -> MockLLM:
+        return MockLLM(max_tokens=8)
+
+    def _prep_tokenizer(self) -> None:
+        return None
+
+
+@pytest.fixture
+def mock_llm_llama_index() -> type[MockLlamaIndex]:
+    """`LlamaIndex` model class with a mock LLM."""
+    return MockLlamaIndex
+
+
+@pytest.fixture
+def mock_llama_index(
+    mock_llm_llama_index, embed_model, monkeypatch
+) -> type[MockLlamaIndex]:
+    """`LlamaIndex` model class with a mock LLM and `embed_model`."""
+    monkeypatch.setattr(llama_utils, "load_embed_model", lambda **_: embed_model)
+    return mock_llm_llama_index
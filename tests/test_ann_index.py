@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from reginald.models.llama_index.ann_index import IVFIndex, recall_latency_report
+from reginald.models.llama_index.similarity import normalise_rows
+
+
+def test_ivf_index(tmp_path):
+    """Test an IVF index finds exact neighbours when probing every list."""
+    rng = np.random.default_rng(0)
+    embeddings = normalise_rows(rng.normal(size=(100, 8)))
+    ivf_index = IVFIndex.build(embeddings, n_lists=4)
+    ivf_index.save(tmp_path)
+    ivf_index = IVFIndex.load(tmp_path)
+
+    query = embeddings[7]
+    positions, _ = ivf_index.search(embeddings, query, k=3, n_probe=4)
+    assert positions.tolist() == np.argsort(-(embeddings @ query))[:3].tolist()
+    report = recall_latency_report(ivf_index, embeddings, n_probes=[4])
+    assert report[0]["recall_at_k"] == pytest.approx(1.0)
+
+
+def test_empty_ivf_index(tmp_path):
+    """Test an IVF index of no embeddings can be saved, loaded and searched."""
+    embeddings = np.zeros((0, 8), dtype=np.float32)
+    ivf_index = IVFIndex.build(embeddings)
+    ivf_index.save(tmp_path)
+    ivf_index = IVFIndex.load(tmp_path)
+
+    assert (ivf_index.n_lists, ivf_index.n_vectors) == (0, 0)
+    positions, scores = ivf_index.search(embeddings, np.ones(8), k=3, n_probe=8)
+    assert positions.size == scores.size == 0
+    assert recall_latency_report(ivf_index, embeddings) == []
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+
+from reginald.defaults import LLAMA_INDEX_DIR
+from reginald.models.app import create_reginald_app
+
+
+@pytest.fixture
+def data_dir(embed_model, tmp_path):
+    """Data directory with a small index."""
+    index = VectorStoreIndex.from_documents(
+        [
+            Document(text=f"Page {i}", metadata={"url": f"https://a.b/{i}"})
+            for i in range(5)
+        ],
+        storage_context=StorageContext.from_defaults(),
+        embed_model=embed_model,
+    )
+    index.storage_context.persist(tmp_path / LLAMA_INDEX_DIR / "test")
+    return tmp_path
+
+
+@pytest.mark.parametrize("mode", ["chat", "query"])
+def test_concurrent_requests_batch_queries(data_dir, mock_llama_index, mode):
+    """Test the queries of concurrent requests are embedded together."""
+    model = mock_llama_index(
+        model_name="mock",
+        max_input_size=4096,
+        data_dir=data_dir,
+        which_index="test",
+        mode=mode,
+        num_output=8,
+        query_batch_size=8,
+        query_batch_wait_ms=200,
+        query_cache_size=0,
+    )
+    n_requests = 8
+    with TestClient(create_reginald_app(model)) as client:
+
+        def direct_message(i: int) -> str:
+            response = client.post(
+                "/direct_message", json={"message": f"Page {i}", "user_id": str(i)}
+            )
+            response.raise_for_status()
+            return response.json()["message"]
+
+        with ThreadPoolExecutor(max_workers=n_requests) as executor:
+            messages = list(executor.map(direct_message, range(n_requests)))
+        stats = client.get("/metrics").json()["query_embedding"]
+
+    assert all("https://a.b/" in message for message in messages)
+    assert stats["queries"] == n_requests
+    assert stats["batch_occupancy"] * 8 > 1
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+from llama_index.core import Document, StorageContext
+
+from reginald.models.llama_index import checkpoint as checkpoint_module
+from reginald.models.llama_index.checkpoint import BuildCheckpoint, swap_in_directory
+from reginald.models.llama_index.streaming import build_index
+
+CONFIG = {"which_index": "reg", "embed_model": "mock"}
+
+
+def pages(*texts: str) -> list[Document]:
+    return [Document(text=text, doc_id=f"page-{i}") for i, text in enumerate(texts)]
+
+
+def build(documents, directory, embed_model, config=CONFIG, resume=True):
+    checkpoint = BuildCheckpoint(directory)
+    checkpoint.start(config, resume=resume)
+    return build_index(
+        documents,
+        storage_context=StorageContext.from_defaults(),
+        embed_model=embed_model,
+        batch_size=2,
+        checkpoint=checkpoint,
+    )
+
+
+def interrupted(documents, after: int):
+    """Stream of documents which fails after yielding `after` of them."""
+    yield from documents[:after]
+    raise KeyboardInterrupt
+
+
+def test_resume_build(embed_model, tmp_path):
+    """Test a resumed build only embeds the batches which were not completed."""
+    documents = pages("A", "B", "C", "D", "E")
+    with pytest.raises(KeyboardInterrupt):
+        build(interrupted(documents, after=4), tmp_path, embed_model, resume=False)
+    assert embed_model.texts == ["A", "B", "C", "D"]
+
+    embed_model.texts.clear()
+    index = build(documents, tmp_path, embed_model)
+    assert embed_model.texts == ["E"]
+    assert sorted(index.docstore.get_all_ref_doc_info()) == [
+        f"page-{i}" for i in range(5)
+    ]
+    assert len(index.index_struct.nodes_dict) == 5
+    node_id = next(iter(index.index_struct.nodes_dict))
+    assert index.vector_store.get(node_id) == [0.5] * 8
+
+
+def test_changed_documents_invalidate_batch(embed_model, tmp_path):
+    """Test a batch whose documents have changed is embedded again."""
+    build(pages("A", "B", "C", "D"), tmp_path, embed_model, resume=False)
+
+    embed_model.texts.clear()
+    index = build(pages("A", "B", "New C", "D"), tmp_path, embed_model)
+    assert embed_model.texts == ["New C", "D"]
+    node_texts = sorted(node.text for node in index.docstore.docs.values())
+    assert node_texts == ["A", "B", "D", "New C"]
+
+
+def test_config_mismatch_discards_checkpoints(embed_model, tmp_path):
+    """Test checkpoints saved with different settings are not resumed from."""
+    build(pages("A", "B"), tmp_path, embed_model, resume=False)
+    (tmp_path / "sources" / "stale.json").write_text("{}")
+
+    embed_model.texts.clear()
+    build(pages("A", "B"), tmp_path, embed_model, config={**CONFIG, "k": 5})
+    assert embed_model.texts == ["A", "B"]
+    assert not (tmp_path / "sources" / "stale.json").exists()
+
+    # checkpoints with the same settings are used unless not resuming
+    embed_model.texts.clear()
+    build(pages("A", "B"), tmp_path, embed_model, config={**CONFIG, "k": 5})
+    assert embed_model.texts == []
+    build(pages("A", "B"), tmp_path, embed_model, resume=False)
+    assert embed_model.texts == ["A", "B"]
+
+
+def test_swap_in_directory(tmp_path):
+    """Test a staged directory replaces the target."""
+    staged_dir, target_dir = tmp_path / "index.build", tmp_path / "index"
+    for directory, text in [(staged_dir, "new"), (target_dir, "old")]:
+        directory.mkdir()
+        (directory / "index.json").write_text(text)
+
+    swap_in_directory(staged_dir, target_dir)
+    assert (target_dir / "index.json").read_text() == "new"
+    assert not staged_dir.exists()
+    assert not (tmp_path / "index.old").exists()
+
+
+def test_swap_in_directory_restores_target(monkeypatch, tmp_path):
+    """Test the target is restored if the staged directory cannot be moved."""
+    staged_dir, target_dir = tmp_path / "index.build", tmp_path / "index"
+    for directory, text in [(staged_dir, "new"), (target_dir, "old")]:
+        directory.mkdir()
+        (directory / "index.json").write_text(text)
+
+    renames = []
+    os_rename = os.rename
+
+    def rename(src, dst):
+        renames.append((src, dst))
+        if src == staged_dir:
+            raise OSError("Cross-device link")
+        os_rename(src, dst)
+
+    monkeypatch.setattr(checkpoint_module.os, "rename", rename)
+    with pytest.raises(OSError, match="Cross-device link"):
+        swap_in_directory(staged_dir, target_dir)
+
+    assert renames[1] == (staged_dir, target_dir)
+    assert (target_dir / "index.json").read_text() == "old"
+    assert (staged_dir / "index.json").read_text() == "new"
+    assert not (tmp_path / "index.old").exists()
@@ -0,0 +1,209 @@
+import csv
+from unittest import mock
+
+import pytest
+from llama_index.core import Document, load_index_from_storage
+from llama_index.core.llms import MockLLM
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.settings import _Settings
+
+from reginald.defaults import LLAMA_INDEX_DIR, SCRAPE_SNAPSHOT_DIR, SOURCE_SNAPSHOT_DIR
+from reginald.models.llama_index.data_index_creator import (
+    DataIndexCreator,
+    IndexBuildConfig,
+    load_storage_context,
+)
+from reginald.models.llama_index.index_manifest import read_manifest
+from reginald.models.llama_index.source_loader import SourceLoader
+
+
+@pytest.fixture
+def settings(embed_model, monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+    settings = _Settings()
+    settings.llm = MockLLM()
+    settings.embed_model = embed_model
+    settings.node_parser = SentenceSplitter(chunk_size=256)
+    return settings
+
+
+def write_scrape(data_dir, pages: dict[str, str]) -> None:
+    """Write a turing.ac.uk scrape of pages (URL paths to text)."""
+    (data_dir / "public").mkdir(exist_ok=True)
+    with open(data_dir / "public" / "turingacuk-no-boilerplate.csv", "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "body"])
+        writer.writerows(
+            [(f"https://www.turing.ac.uk/{path}", text) for path, text in pages.items()]
+        )
+
+
+def build(
+    data_dir, settings, which_index: str = "turing_ac_uk", **kwargs
+) -> DataIndexCreator:
+    creator = DataIndexCreator(
+        data_dir=data_dir,
+        which_index=which_index,
+        settings=settings,
+        config=IndexBuildConfig(**kwargs),
+    )
+    creator.create_index()
+    creator.save_index()
+    return creator
+
+
+def persisted_pages(
+    data_dir, settings, which_index: str = "turing_ac_uk"
+) -> dict[str, str]:
+    """Text of each page in the persisted index, by URL path."""
+    index = load_index_from_storage(
+        load_storage_context(data_dir / LLAMA_INDEX_DIR / which_index),
+        embed_model=settings.embed_model,
+    )
+    return {
+        doc_id.removeprefix("https://www.turing.ac.uk/"): index.docstore.get_node(
+            info.node_ids[0]
+        ).get_content()
+        for doc_id, info in index.docstore.get_all_ref_doc_info().items()
+    }
+
+
+def test_incremental_update_with_embedding_cache(settings, tmp_path):
+    """Test updating an index embeds only what changed, through the cache."""
+    write_scrape(tmp_path, {"a": "Page A", "b": "Page B", "c": "Page C"})
+    build(tmp_path, settings, embedding_cache_size=100)
+    # the scrape snapshot is kept out of the (tracked) public data
+    assert [p.name for p in (tmp_path / "public").iterdir()] == [
+        "turingacuk-no-boilerplate.csv"
+    ]
+    assert (tmp_path / SCRAPE_SNAPSHOT_DIR).is_dir()
+
+    write_scrape(tmp_path, {"a": "Page A", "b": "New page B", "d": "Page D"})
+    settings.embed_model.texts.clear()
+    build(tmp_path, settings, embedding_cache_size=100, incremental=True)
+
+    assert sorted(t.split("\n\n")[-1] for t in settings.embed_model.texts) == [
+        "New page B",
+        "Page D",
+    ]
+    assert persisted_pages(tmp_path, settings) == {
+        "a": "Page A",
+        "b": "New page B",
+        "d": "Page D",
+    }
+
+
+def test_partial_build_keeps_complete_index(settings, tmp_path):
+    """Test a build missing a source only replaces the index if allowed."""
+    write_scrape(tmp_path, {"a": "Page A"})
+    persist_dir = tmp_path / LLAMA_INDEX_DIR / "public"
+    handbook = [Document(text="Handbook", metadata={"url": "https://handbook"})]
+    loaders = {
+        f"_load_{source}": mock.Mock(return_value=[])
+        for source in ["handbook", "rse_course", "rds_course", "turing_way"]
+    }
+    loaders["_load_handbook"].return_value = handbook
+    with mock.patch.multiple(SourceLoader, **loaders):
+        build(tmp_path, settings, which_index="public")
+    assert read_manifest(persist_dir)["missing_sources"] == []
+
+    loaders["_load_handbook"].side_effect = ConnectionError
+    with mock.patch.multiple(SourceLoader, **loaders):
+        with pytest.raises(RuntimeError, match="missing the source\\(s\\) handbook"):
+            build(tmp_path, settings, which_index="public")
+        assert "https://handbook" in persisted_pages(tmp_path, settings, "public")
+
+        build(tmp_path, settings, which_index="public", allow_partial=True)
+        assert read_manifest(persist_dir)["missing_sources"] == ["handbook"]
+        assert persisted_pages(tmp_path, settings, "public") == {"a": "Page A"}
+
+        # an index already missing the source can be replaced
+        build(tmp_path, settings, which_index="public")
+
+
+def test_failed_streamed_source_aborts_build(settings, tmp_path):
+    """Test a streamed source failing partway does not replace the index."""
+    write_scrape(tmp_path, {"a": "Page A", "b": "Page B"})
+    build(tmp_path, settings)
+
+    def fail_after_first_page(self):
+        yield Document(text="New page A", metadata={"url": "https://a"})
+        raise ConnectionError
+
+    with mock.patch.object(SourceLoader, "_load_turing_ac_uk", fail_after_first_page):
+        with pytest.raises(RuntimeError, match="Failed to load turing_ac_uk after 1"):
+            build(tmp_path, settings)
+    assert persisted_pages(tmp_path, settings) == {"a": "Page A", "b": "Page B"}
+
+
+def test_composite_index(settings, mock_llama_index, tmp_path):
+    """Test a composite index is built from source indices and searches them all."""
+    write_scrape(tmp_path, {"a": "Page A", "b": "Page B"})
+    loaders = {
+        f"_load_{source}": mock.Mock(side_effect=ConnectionError)
+        for source in ["handbook", "rse_course", "rds_course", "turing_way"]
+    }
+    loaders["_load_handbook"] = mock.Mock(
+        return_value=[Document(text="Handbook", metadata={"url": "https://handbook"})]
+    )
+    with mock.patch.multiple(SourceLoader, **loaders):
+        creator = DataIndexCreator(
+            data_dir=tmp_path,
+            which_index="public",
+            settings=settings,
+            config=IndexBuildConfig(composite=True),
+        )
+        assert creator.create_composite_index() == ["turing_ac_uk", "handbook"]
+
+    assert read_manifest(tmp_path / LLAMA_INDEX_DIR / "public")["source_indices"] == [
+        "turing_ac_uk",
+        "handbook",
+    ]
+    assert persisted_pages(tmp_path, settings, "handbook") == {
+        "https://handbook": "Handbook"
+    }
+
+    model = mock_llama_index(
+        model_name="mock",
+        max_input_size=4096,
+        data_dir=tmp_path,
+        which_index="public",
+        mode="query",
+        k=5,
+    )
+    nodes = model.retriever.retrieve("What is in the handbook?")
+    assert sorted(n.node.metadata["url"] for n in nodes) == [
+        "https://handbook",
+        "https://www.turing.ac.uk/a",
+        "https://www.turing.ac.uk/b",
+    ]
+    assert "https://handbook" in model.direct_message("Handbook?", "user").message
+
+
+def test_rebuild_from_snapshot(settings, tmp_path, monkeypatch):
+    """Test an index rebuilt from source snapshots matches the original."""
+    pytest.importorskip("pyarrow")
+    write_scrape(tmp_path, {"a": "Page A"})
+    loaders = {
+        f"_load_{source}": mock.Mock(return_value=[])
+        for source in ["handbook", "rse_course", "rds_course", "turing_way"]
+    }
+    # the documents of a source are dropped as they are indexed
+    loaders["_load_handbook"].side_effect = lambda token: [
+        Document(text="Handbook", metadata={"url": "https://handbook"})
+    ]
+    with mock.patch.multiple(SourceLoader, **loaders):
+        build(tmp_path, settings, which_index="public")
+        # snapshots are only saved if asked for
+        assert not (tmp_path / SOURCE_SNAPSHOT_DIR).exists()
+        build(tmp_path, settings, which_index="public", save_snapshots=True)
+    pages = persisted_pages(tmp_path, settings, "public")
+
+    # nothing is fetched, so no token is needed
+    monkeypatch.delenv("GITHUB_TOKEN")
+    for loader in loaders.values():
+        loader.side_effect = ConnectionError
+    with mock.patch.multiple(SourceLoader, **loaders):
+        build(tmp_path, settings, which_index="public", from_snapshot=True)
+    assert persisted_pages(tmp_path, settings, "public") == pages
+    assert pages["https://handbook"] == "Handbook"
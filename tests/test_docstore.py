@@ -0,0 +1,82 @@
+from llama_index.core.schema import TextNode
+from llama_index.core.storage.docstore import SimpleDocumentStore
+
+from reginald.models.llama_index.docstore import (
+    SQLITE_DOCSTORE_FNAME,
+    SQLiteDocumentStore,
+    SQLiteKVStore,
+)
+
+
+def simple_docstore(n_nodes: int) -> SimpleDocumentStore:
+    docstore = SimpleDocumentStore()
+    docstore.add_documents(
+        [
+            TextNode(text=f"Node {i}", id_=f"node-{i}", metadata={"url": f"u/{i}"})
+            for i in range(n_nodes)
+        ]
+    )
+    docstore.set_document_hash("node-0", "hash-0")
+    return docstore
+
+
+def test_from_simple_docstore(tmp_path):
+    """Test a converted docstore holds the same nodes, read lazily."""
+    simple = simple_docstore(5)
+    SQLiteDocumentStore.from_simple_docstore(simple, tmp_path)._kvstore.close()
+
+    docstore = SQLiteDocumentStore.from_persist_dir(tmp_path)
+    # nothing is read until a node is requested
+    assert len(docstore._kvstore._cache) == 0
+    node = docstore.get_node("node-3")
+    assert (node.text, node.metadata) == ("Node 3", {"url": "u/3"})
+    assert [key for _, key in docstore._kvstore._cache] == ["node-3"]
+
+    assert sorted(docstore.docs) == sorted(simple.docs)
+    assert docstore.get_document_hash("node-0") == "hash-0"
+    assert docstore.get_all_ref_doc_info() == simple.get_all_ref_doc_info()
+
+
+def test_kvstore_lru_cache(tmp_path):
+    """Test only the most recently read values are kept in memory."""
+    kvstore = SQLiteKVStore(tmp_path / "kv.sqlite")
+    assert kvstore.cache_size == 128
+    kvstore.put_all([(f"key-{i}", {"i": i}) for i in range(130)])
+
+    for i in range(130):
+        assert kvstore.get(f"key-{i}") == {"i": i}
+    assert len(kvstore._cache) == 128
+    assert ("data", "key-0") not in kvstore._cache
+    assert ("data", "key-1") not in kvstore._cache
+
+    # reading a value makes it the most recently used
+    kvstore.get("key-2")
+    kvstore.get("key-0")
+    assert ("data", "key-2") in kvstore._cache
+    assert ("data", "key-3") not in kvstore._cache
+
+    # values are copied, so changing one does not change the cache
+    kvstore.get("key-5")["i"] = -1
+    assert kvstore.get("key-5") == {"i": 5}
+
+    # writing a value drops it from the cache
+    kvstore.put("key-5", {"i": 50})
+    assert kvstore.get("key-5") == {"i": 50}
+    assert kvstore.delete("key-5")
+    assert kvstore.get("key-5") is None
+
+
+def test_move_to(tmp_path):
+    """Test a docstore can be moved into the persisted index's directory."""
+    docstore = SQLiteDocumentStore.from_simple_docstore(
+        simple_docstore(3), tmp_path / "index.build"
+    )
+    assert docstore.move_to(tmp_path / "index.build") is docstore
+
+    (tmp_path / "index").mkdir()
+    (tmp_path / "index" / SQLITE_DOCSTORE_FNAME).write_text("old")
+    moved = docstore.move_to(tmp_path / "index")
+    assert not (tmp_path / "index.build" / SQLITE_DOCSTORE_FNAME).exists()
+    assert moved._kvstore.db_path == tmp_path / "index" / SQLITE_DOCSTORE_FNAME
+    assert moved.get_node("node-2").text == "Node 2"
+    assert sorted(moved.docs) == ["node-0", "node-1", "node-2"]
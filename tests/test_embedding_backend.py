@@ -0,0 +1,130 @@
+import csv
+
+import numpy as np
+import pytest
+import torch
+from llama_index.core.schema import MetadataMode
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from reginald.models.llama_index import embedding_backend
+from reginald.models.llama_index.embedding_backend import (
+    INT8_MIN_COSINE,
+    embedding_backend_report,
+    load_embed_model,
+)
+from reginald.models.llama_index.vector_store import embedding_matrix
+
+QuantizedLinear = torch.ao.nn.quantized.dynamic.Linear
+
+WORDS = (
+    "the a of to and in is what who where how turing institute "
+    "research data science page handbook course"
+).split()
+
+QUERIES = [
+    "what is the turing institute",
+    "who is in the research data science course",
+    "where is the handbook page",
+    "how to research data",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model_dir(tmp_path_factory):
+    """Directory of a small randomly initialised BERT model and its tokenizer."""
+    model_dir = tmp_path_factory.mktemp("tiny-bert")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS
+    (model_dir / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(vocab_file=str(model_dir / "vocab.txt")).save_pretrained(
+        model_dir
+    )
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+    )
+    BertModel(config).save_pretrained(model_dir)
+    return model_dir
+
+
+@pytest.fixture(autouse=True)
+def tiny_embed_model(tiny_model_dir, monkeypatch):
+    """Load the small local model in place of the real embedding model."""
+    monkeypatch.setattr(embedding_backend, "EMBED_MODEL_NAME", str(tiny_model_dir))
+
+
+def count_layers(embed_model, layer_type: type) -> int:
+    return sum(type(module) is layer_type for module in embed_model._model.modules())
+
+
+def test_int8_backend_quantizes_linear_layers():
+    torch_model = load_embed_model("torch")
+    int8_model = load_embed_model("int8")
+
+    n_linear = count_layers(torch_model, torch.nn.Linear)
+    assert n_linear > 0
+    assert count_layers(torch_model, QuantizedLinear) == 0
+    assert count_layers(int8_model, torch.nn.Linear) == 0
+    assert count_layers(int8_model, QuantizedLinear) == n_linear
+    assert int8_model.model_name == torch_model.model_name
+
+
+def test_int8_query_embeddings_agree_with_torch():
+    torch_model = load_embed_model("torch")
+    embeddings = np.array(
+        torch_model.get_text_embedding_batch(
+            [" ".join(WORDS[i : i + 4]) for i in range(0, len(WORDS), 2)]
+        ),
+        dtype=np.float32,
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    report = embedding_backend_report(
+        torch_model, load_embed_model("int8"), QUERIES, embeddings, k=3
+    )
+
+    assert report["min_cosine"] >= INT8_MIN_COSINE
+    assert report["recall_at_k"] == 1.0
+
+
+def test_new_index_built_with_torch_backend(
+    mock_llm_llama_index, tmp_path, monkeypatch
+):
+    """Test an index built by an int8 model is embedded with the torch backend."""
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+    (tmp_path / "public").mkdir()
+    with open(tmp_path / "public" / "turingacuk-no-boilerplate.csv", "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "body"])
+        writer.writerows(
+            [
+                (f"https://www.turing.ac.uk/{i}", query)
+                for i, query in enumerate(QUERIES)
+            ]
+        )
+
+    model = mock_llm_llama_index(
+        model_name="mock",
+        max_input_size=4096,
+        data_dir=tmp_path,
+        which_index="turing_ac_uk",
+        force_new_index=True,
+        embedding_backend="int8",
+    )
+
+    # queries are embedded with the int8 backend
+    assert count_layers(model.index._embed_model, QuantizedLinear) > 0
+    # and the nodes were embedded with the torch backend
+    embeddings, node_ids = embedding_matrix(model.index.vector_store)
+    texts = [
+        node.get_content(metadata_mode=MetadataMode.EMBED)
+        for node in model.index.docstore.get_nodes(node_ids)
+    ]
+    for backend, expected in [("torch", True), ("int8", False)]:
+        backend_embeddings = np.array(
+            [load_embed_model(backend).get_text_embedding(text) for text in texts]
+        )
+        assert np.allclose(embeddings, backend_embeddings, atol=1e-6) == expected
@@ -0,0 +1,64 @@
+import pytest
+from git import Actor, Repo
+
+from reginald.models.llama_index.git_mirror import GitMirror
+
+AUTHOR = Actor("Reginald", "reginald@example.com")
+
+
+@pytest.fixture
+def upstream(tmp_path) -> tuple[Repo, Repo]:
+    """Bare repository with a working clone to commit and push from."""
+    bare = Repo.init(tmp_path / "upstream.git", bare=True)
+    bare.git.symbolic_ref("HEAD", "refs/heads/main")
+    work = Repo.clone_from(bare.working_dir, tmp_path / "work")
+    work.git.checkout("-b", "main")
+    return bare, work
+
+
+def commit(work: Repo, files: dict[str, str | None], message: str) -> str:
+    """Write (or delete, if None) files, commit and push them."""
+    root = work.working_tree_dir
+    for name, text in files.items():
+        if text is None:
+            work.index.remove([name], working_tree=True)
+        else:
+            with open(f"{root}/{name}", "w") as f:
+                f.write(text)
+            work.index.add([name])
+    sha = work.index.commit(message, author=AUTHOR, committer=AUTHOR).hexsha
+    work.git.push("origin", "main")
+    return sha
+
+
+def test_git_mirror(upstream, tmp_path):
+    """Test a mirror is cloned, then fetches only new commits."""
+    bare, work = upstream
+    first_sha = commit(work, {"a.md": "A", "b.md": "B"}, "First")
+    mirror = GitMirror(
+        url="https://github.com/alan-turing-institute/example.git",
+        path=tmp_path / "mirrors" / "example",
+        auth_url=f"file://{bare.working_dir}",
+    )
+    assert not mirror.exists
+
+    assert mirror.sync() is None
+    assert mirror.exists
+    assert mirror.head_sha == first_sha
+    # the credentials are not kept in the mirror's config
+    assert Repo(mirror.path).remotes.origin.url == mirror.url
+    assert Repo(mirror.path).git.rev_parse("--is-shallow-repository") == "true"
+
+    second_sha = commit(work, {"a.md": "New A", "b.md": None, "c.md": "C"}, "Second")
+    assert mirror.sync() == first_sha
+    assert mirror.head_sha == second_sha
+    assert (mirror.path / "a.md").read_text() == "New A"
+    assert not (mirror.path / "b.md").exists()
+
+    assert mirror.has_commit(first_sha)
+    assert not mirror.has_commit("0" * 40)
+    assert mirror.changed_files(first_sha) == (["a.md", "c.md"], ["b.md"])
+
+    # syncing with no new commits changes nothing
+    assert mirror.sync() == second_sha
+    assert mirror.changed_files(second_sha) == ([], [])
@@ -0,0 +1,185 @@
+import io
+import json
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from reginald.models.llama_index.github_archive import (
+    FilterType,
+    GithubArchiveReader,
+    git_blob_sha,
+)
+
+COMPARISON = {
+    "status": "ahead",
+    "files": [
+        {"filename": "content/docs/page.md", "status": "modified"},
+        {"filename": "content/old.md", "status": "removed"},
+        {
+            "filename": "content/new.md",
+            "status": "renamed",
+            "previous_filename": "content/moved.md",
+        },
+        {"filename": "other/notes.md", "status": "added"},
+    ],
+}
+
+FILES = {
+    "README.md": b"# Readme\n",
+    "content/docs/page.md": b"A handbook page\n",
+    "content/docs/script.py": b"print('hello')\n",
+    "content/image.md": b"\xff\xfe not utf-8",
+    "other/notes.md": b"Some notes\n",
+}
+
+NEW_FILES = {
+    "content/docs/page.md": b"An updated handbook page\n",
+    "content/new.md": b"A moved page\n",
+}
+
+
+def make_tarball(files: dict[str, bytes]) -> bytes:
+    """Gzipped tarball laid out like GitHub's, under a top-level directory."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in files.items():
+            info = tarfile.TarInfo(f"owner-repo-abc1234/{name}")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def github_stand_in():
+    """Local HTTP server standing in for the GitHub API and codeload."""
+    tarball = make_tarball(FILES)
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append((self.path, self.headers.get("Authorization")))
+            if self.path == "/repos/owner/repo/tarball/main":
+                # the API redirects to codeload for the archive itself
+                self.send_response(302)
+                self.send_header("Location", "/codeload/owner/repo/main")
+                self.end_headers()
+            elif self.path == "/repos/owner/repo/commits/main":
+                self._send(b"bbb")
+            elif self.path == "/repos/owner/repo/compare/aaa...bbb":
+                self._send(json.dumps(COMPARISON).encode())
+            elif self.path.startswith("/repos/owner/repo/contents/"):
+                path, _, query = self.path.partition("?")
+                file_path = path.removeprefix("/repos/owner/repo/contents/")
+                assert query == "ref=bbb"
+                self._send(NEW_FILES.get(file_path, FILES.get(file_path)))
+            elif self.path == "/codeload/owner/repo/main":
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-gzip")
+                self.send_header("Content-Length", str(len(tarball)))
+                self.end_headers()
+                self.wfile.write(tarball)
+            else:
+                self.send_response(404)
+                self.end_headers()
+
+        def _send(self, body):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+
+
+def test_archive_reader_filters_and_metadata(github_stand_in):
+    """Test the reader applies the filters and sets the same metadata as the API reader."""
+    api_url, requests = github_stand_in
+    reader = GithubArchiveReader(
+        "token",
+        owner="owner",
+        repo="repo",
+        filter_file_extensions=([".md"], FilterType.INCLUDE),
+        filter_directories=(["content"], FilterType.INCLUDE),
+        api_url=api_url,
+    )
+    documents = reader.load_data(branch="main")
+
+    # the .py file is filtered by extension, README.md and other/ by directory
+    # and content/image.md is skipped as it cannot be decoded
+    assert len(documents) == 1
+    document = documents[0]
+    assert document.text == "A handbook page\n"
+    assert document.doc_id == git_blob_sha(FILES["content/docs/page.md"])
+    assert document.metadata == {
+        "file_path": "content/docs/page.md",
+        "file_name": "page.md",
+        "url": "https://github.com/owner/repo/blob/main/content/docs/page.md",
+    }
+    assert requests[-2] == ("/repos/owner/repo/tarball/main", "Bearer token")
+
+
+def test_archive_reader_exclude_filter(github_stand_in):
+    """Test excluding directories and file extensions."""
+    api_url, _ = github_stand_in
+    reader = GithubArchiveReader(
+        None,
+        owner="owner",
+        repo="repo",
+        filter_file_extensions=([".py"], FilterType.EXCLUDE),
+        filter_directories=(["other"], FilterType.EXCLUDE),
+        api_url=api_url,
+    )
+    documents = reader.load_data(branch="main")
+
+    assert sorted(d.metadata["file_path"] for d in documents) == [
+        "README.md",
+        "content/docs/page.md",
+    ]
+
+
+def test_archive_reader_missing_branch(github_stand_in):
+    """Test a missing branch raises without retrying."""
+    api_url, requests = github_stand_in
+    reader = GithubArchiveReader(None, owner="owner", repo="repo", api_url=api_url)
+    n_requests = len(requests)
+
+    with pytest.raises(Exception, match="404"):
+        reader.load_data(branch="missing")
+    assert len(requests) == n_requests + 1
+
+
+def test_archive_reader_delta(github_stand_in):
+    """Test listing and loading only the files changed between two commits."""
+    api_url, _ = github_stand_in
+    reader = GithubArchiveReader(
+        None,
+        owner="owner",
+        repo="repo",
+        filter_file_extensions=([".md"], FilterType.INCLUDE),
+        filter_directories=(["content"], FilterType.INCLUDE),
+        api_url=api_url,
+    )
+    head_sha = reader.head_sha("main")
+    assert head_sha == "bbb"
+
+    # other/notes.md is filtered out and the renamed file is deleted and added
+    changed, deleted = reader.changed_files("aaa", head_sha)
+    assert changed == ["content/docs/page.md", "content/new.md"]
+    assert deleted == ["content/old.md", "content/moved.md"]
+
+    documents = reader.load_files(changed, ref=head_sha, branch="main")
+    assert [d.text.encode() for d in documents] == list(NEW_FILES.values())
+    assert documents[1].metadata["url"] == reader.file_url("content/new.md", "main")
+
+    # unknown base commits (e.g. after a force push) cannot be compared
+    assert reader.changed_files("zzz", head_sha) is None
+    assert reader.changed_files(head_sha, head_sha) == ([], [])
@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from reginald.models.llama_index.github_issues import GithubIssuesReader
+
+
+def make_issue(number: int, state: str = "open", updated_at: str = "2024-01-01"):
+    return {
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "Body",
+        "state": state,
+        "created_at": "2024-01-01",
+        "updated_at": updated_at,
+        "closed_at": None if state == "open" else updated_at,
+        "url": f"https://api.github.com/repos/owner/repo/issues/{number}",
+        "html_url": f"https://github.com/owner/repo/issues/{number}",
+        "assignee": None,
+        "labels": [{"name": "project"}],
+        "comments": 0,
+    }
+
+
+@pytest.fixture
+def issues_stand_in():
+    """Local HTTP server standing in for the GitHub issues API."""
+    issues = [make_issue(number) for number in range(1, 6)]
+    issues.append(make_issue(6, state="closed"))
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            requests.append(query)
+            since = query.get("since", "")
+            matching = [
+                i
+                for i in issues
+                if i["updated_at"] >= since and query["state"] in ["all", i["state"]]
+            ]
+
+            # two issues per page rather than 100
+            page = int(query["page"])
+            body = json.dumps(matching[2 * (page - 1) : 2 * page]).encode()
+            n_pages = max(1, (len(matching) + 1) // 2)
+            self.send_response(200)
+            self.send_header("Link", f'<http://x/issues?page={n_pages}>; rel="last"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", issues, requests
+    server.shutdown()
+
+
+def test_issues_reader_snapshot(issues_stand_in, tmp_path):
+    """Test fetching all pages of open issues, then only updated issues."""
+    api_url, issues, requests = issues_stand_in
+    reader = GithubIssuesReader(
+        None,
+        owner="owner",
+        repo="repo",
+        snapshot_path=tmp_path / "issues.jsonl",
+        api_url=api_url,
+    )
+    documents = reader.load_data()
+
+    assert sorted(query["page"] for query in requests) == ["1", "2", "3"]
+    assert {query["state"] for query in requests} == {"open"}
+    assert [d.doc_id for d in documents] == ["1", "2", "3", "4", "5"]
+    assert documents[0].text == "Issue 1\nBody"
+    assert documents[0].metadata["url"] == "https://github.com/owner/repo/issues/1"
+    assert documents[0].metadata["api_url"] == issues[0]["url"]
+    assert documents[0].metadata["labels"] == ["project"]
+
+    # closing an issue drops it from the documents
+    issues[1] = make_issue(2, state="closed", updated_at="2024-02-01")
+    requests.clear()
+    documents = reader.load_data()
+
+    assert (requests[0]["since"], requests[0]["state"]) == ("2024-01-01", "all")
+    assert [d.doc_id for d in documents] == ["1", "3", "4", "5"]
+    assert sorted(reader.read_snapshot()) == [1, 3, 4, 5]
+
+    # the snapshot can be read without fetching anything
+    requests.clear()
+    assert len(reader.load_data(offline=True)) == 4
+    assert requests == []
@@ -0,0 +1,82 @@
+import pytest
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+
+from reginald.models.llama_index.incremental import assign_stable_ids, update_index
+from reginald.models.llama_index.vector_store import MemmapVectorStore
+
+
+def page(name: str, text: str) -> Document:
+    return Document(text=text, metadata={"url": f"https://a.b/{name}"})
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_update_index(embed_model, memmap):
+    """Test only new and changed documents are embedded and stale nodes removed."""
+    storage_context = StorageContext.from_defaults(
+        vector_store=MemmapVectorStore() if memmap else None
+    )
+    index = VectorStoreIndex.from_documents(
+        assign_stable_ids(
+            [
+                page("same", "Unchanged page"),
+                page("changed", "Old page"),
+                page("deleted", "Deleted page"),
+                page("kept", "Page of a source which failed to load"),
+            ]
+        ),
+        storage_context=storage_context,
+        embed_model=embed_model,
+    )
+    embed_model.texts.clear()
+
+    summary = update_index(
+        index,
+        assign_stable_ids(
+            [
+                page("same", "Unchanged page"),
+                page("changed", "New page"),
+                page("added", "Added page"),
+            ]
+        ),
+        keep_missing=lambda doc_id: doc_id == "https://a.b/kept",
+    )
+
+    assert (summary.added, summary.updated, summary.deleted) == (
+        ["https://a.b/added"],
+        ["https://a.b/changed"],
+        ["https://a.b/deleted"],
+    )
+    assert sorted(summary.unchanged) == ["https://a.b/kept", "https://a.b/same"]
+    assert sorted(t.split("\n\n")[-1] for t in embed_model.texts) == [
+        "Added page",
+        "New page",
+    ]
+
+    # the index holds one node per remaining document
+    ref_docs = index.docstore.get_all_ref_doc_info()
+    assert sorted(ref_docs) == [
+        "https://a.b/added",
+        "https://a.b/changed",
+        "https://a.b/kept",
+        "https://a.b/same",
+    ]
+    node_ids = sorted(n for info in ref_docs.values() for n in info.node_ids)
+    assert sorted(index.index_struct.nodes_dict) == node_ids
+    retrieved = index.as_retriever(similarity_top_k=10).retrieve("page")
+    assert sorted(n.node.node_id for n in retrieved) == node_ids
+    assert "Old page" not in [n.node.get_content() for n in retrieved]
+
+    # updating again with the same documents changes nothing
+    embed_model.texts.clear()
+    summary = update_index(
+        index,
+        assign_stable_ids(
+            [
+                page("same", "Unchanged page"),
+                page("changed", "New page"),
+                page("added", "Added page"),
+            ]
+        ),
+    )
+    assert summary.deleted == ["https://a.b/kept"]
+    assert summary.added == summary.updated == embed_model.texts == []
@@ -0,0 +1,53 @@
+import json
+
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.storage.docstore import SimpleDocumentStore
+
+from reginald.models.llama_index.notebooks import (
+    CELLS_KEY,
+    NOTEBOOK_CELLS_KEY,
+    NotebookCellRanges,
+    notebook_document,
+)
+
+
+def notebook(n_cells: int) -> Document:
+    cells = [
+        {"cell_type": "markdown", "metadata": {}, "source": f"Cell {i}. " * 20}
+        for i in range(1, n_cells + 1)
+    ]
+    return Document(
+        text=json.dumps({"cells": cells, "metadata": {}}),
+        doc_id="notebook.ipynb",
+        metadata={"file_path": "notebook.ipynb"},
+    )
+
+
+def test_cell_offsets_not_persisted(tmp_path):
+    """Test nodes record their cells but not the document's cell offsets."""
+    document = notebook_document(notebook(6))
+    assert NOTEBOOK_CELLS_KEY in document.metadata
+
+    storage_context = StorageContext.from_defaults()
+    index = VectorStoreIndex.from_documents(
+        [document],
+        storage_context=storage_context,
+        embed_model=MockEmbedding(embed_dim=8),
+        transformations=[
+            SentenceSplitter(chunk_size=128, chunk_overlap=0),
+            NotebookCellRanges(),
+        ],
+    )
+    nodes = list(index.docstore.docs.values())
+    assert len(nodes) > 1
+    assert nodes[0].metadata[CELLS_KEY].startswith("1")
+    assert all(CELLS_KEY in node.metadata for node in nodes)
+
+    storage_context.persist(persist_dir=tmp_path)
+    docstore = SimpleDocumentStore.from_persist_dir(str(tmp_path))
+    for node in docstore.docs.values():
+        assert NOTEBOOK_CELLS_KEY not in node.metadata
+        for related in node.relationships.values():
+            assert NOTEBOOK_CELLS_KEY not in related.metadata
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from reginald.models.llama_index.quantization import QuantizedEmbeddings
+from reginald.models.llama_index.similarity import normalise_rows, top_k_indices
+
+K = 10
+
+
+@pytest.fixture(scope="module")
+def data() -> tuple[np.ndarray, np.ndarray]:
+    """
+    Random unit-length embeddings around 100 topics, and queries
+    about some of the topics.
+    """
+    rng = np.random.default_rng(0)
+    topics = normalise_rows(rng.standard_normal((100, 384)))
+
+    def around_topics(n: int) -> np.ndarray:
+        noise = normalise_rows(rng.standard_normal((n, 384)))
+        return normalise_rows(topics[rng.integers(0, 100, n)] + noise)
+
+    return around_topics(2000).astype(np.float32), around_topics(50).astype(np.float32)
+
+
+def recall(embeddings: np.ndarray, quantized, queries: np.ndarray) -> float:
+    """Recall@K of the quantized embeddings against the float32 ones."""
+    hits = sum(
+        len(
+            set(top_k_indices(embeddings @ query, K).tolist())
+            & set(top_k_indices(quantized @ query, K).tolist())
+        )
+        for query in queries
+    )
+    return hits / (K * len(queries))
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_recall(data, quantization):
+    embeddings, queries = data
+    quantized = QuantizedEmbeddings.from_float(embeddings, quantization, block_size=300)
+
+    assert recall(embeddings, quantized, queries) >= 0.99
+    assert np.allclose(quantized @ queries[0], embeddings @ queries[0], atol=1e-2)
+    assert np.allclose(quantized[[3, 1]], embeddings[[3, 1]], atol=1e-2)
+
+
+def test_binary_rescores_shortlist(data):
+    embeddings, queries = data
+    quantized = QuantizedEmbeddings.from_float(
+        embeddings, "binary", n_rescore=100, block_size=300
+    )
+
+    scores = quantized @ queries[0]
+    shortlist = np.isfinite(scores)
+    assert shortlist.sum() == 100
+    # the shortlisted rows are scored exactly
+    assert np.allclose(scores[shortlist], (embeddings @ queries[0])[shortlist])
+    assert recall(embeddings, quantized, queries) >= 0.95
+
+
+def test_binary_full_rescore_is_exact(data):
+    embeddings, queries = data
+    quantized = QuantizedEmbeddings.from_float(
+        embeddings, "binary", n_rescore=len(embeddings)
+    )
+
+    assert recall(embeddings, quantized, queries) == 1.0
@@ -0,0 +1,38 @@
+import threading
+
+from llama_index.core.embeddings import MockEmbedding
+
+from reginald.models.llama_index.query_batcher import QueryEmbeddingBatcher
+
+
+class BlockingEmbedding(MockEmbedding):
+    """Mock embedding model which waits for an event before embedding."""
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        embedding.set()
+        release.wait()
+        return [float(len(query))] * self.embed_dim
+
+
+embedding = threading.Event()
+release = threading.Event()
+
+
+def test_query_embedding_batcher():
+    """Test queries arriving while a batch is embedded are batched together."""
+    batcher = QueryEmbeddingBatcher(
+        BlockingEmbedding(embed_dim=2), max_batch_size=3, max_wait_ms=0
+    )
+
+    # the first query is embedded on its own while the others queue up
+    futures = [batcher.submit("a")]
+    embedding.wait()
+    futures += [batcher.submit("b" * i) for i in range(1, 6)]
+    release.set()
+
+    assert [f.result() for f in futures] == [[1.0, 1.0]] + [
+        [float(i), float(i)] for i in range(1, 6)
+    ]
+    stats = batcher.stats()
+    assert (stats["batches"], stats["queries"]) == (3, 6)
+    assert stats["batch_occupancy"] == 2 / 3
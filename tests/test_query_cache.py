@@ -0,0 +1,55 @@
+import time
+
+from llama_index.core import Document, VectorStoreIndex
+
+from reginald.models.llama_index.query_cache import (
+    CachedRetriever,
+    LRUCache,
+    QueryCache,
+)
+from reginald.models.llama_index.retriever import NumpyRetriever
+
+
+def test_cached_retriever(embed_model):
+    """Test repeated messages are neither embedded nor searched again."""
+    documents = [Document(text=f"Page {i}", doc_id=f"page-{i}") for i in range(5)]
+    index = VectorStoreIndex.from_documents(documents, embed_model=embed_model)
+    cache = QueryCache(max_size=8)
+    cache.set_index_version("build-1")
+    retriever = CachedRetriever(
+        NumpyRetriever.from_index(index, similarity_top_k=2),
+        embed_model=embed_model,
+        cache=cache,
+        similarity_top_k=2,
+    )
+
+    first = retriever.retrieve("How do I book annual leave?")
+    second = retriever.retrieve("  how do I book ANNUAL leave? ")
+    assert len(embed_model.queries) == 1
+    assert [(n.node.node_id, n.score) for n in second] == [
+        (n.node.node_id, n.score) for n in first
+    ]
+    stats = cache.stats()["results"]
+    assert (stats["size"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+    # a new version of the index drops the retrieved nodes but not embeddings
+    cache.set_index_version("build-2")
+    retriever.retrieve("how do i book annual leave?")
+    assert len(embed_model.queries) == 1
+    assert cache.results.misses == 2
+
+
+def test_lru_cache():
+    """Test least recently used and expired entries are evicted."""
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert (cache.get("b"), cache.get("a"), cache.get("c")) == (None, 1, 3)
+
+    cache = LRUCache(max_size=2, ttl_seconds=0.01)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
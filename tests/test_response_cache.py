@@ -0,0 +1,45 @@
+import pytest
+
+from reginald.models.llama_index.response_cache import (
+    ResponseCacheKey,
+    load_response_cache,
+)
+
+
+def key(message: str, index_version: str = "build-1") -> ResponseCacheKey:
+    return ResponseCacheKey.create(message, "llama", "reg", index_version, 3, 512)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_response_cache(backend, tmp_path):
+    """Test responses are reused for the same key and hits are counted."""
+    cache = load_response_cache(backend, tmp_path, max_entries=2)
+    assert cache.get(key("What is REG?")) is None
+
+    cache.put(key("What is REG?"), "Research Engineering Group")
+    assert cache.get(key("what is  reg?")) == "Research Engineering Group"
+    assert cache.get(key("what is reg?")) == "Research Engineering Group"
+    assert cache.get(key("What is REG?", index_version="build-2")) is None
+
+    # the least recently used response is evicted
+    cache.put(key("Who is Reginald?"), "A bot")
+    assert cache.get(key("Who is Reginald?")) == "A bot"
+    cache.put(key("What is the handbook?"), "A handbook")
+    assert cache.get(key("What is REG?")) is None
+    assert [(e["message"], e["hits"]) for e in cache.entries()] == [
+        ("who is reginald?", 1),
+        ("what is the handbook?", 0),
+    ]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 3)
+
+
+def test_sqlite_response_cache_persists(tmp_path):
+    """Test responses and their hit counts are kept between runs."""
+    cache = load_response_cache("sqlite", tmp_path, max_entries=2)
+    cache.put(key("What is REG?"), "Research Engineering Group")
+    cache.get(key("What is REG?"))
+    cache.close()
+
+    cache = load_response_cache("sqlite", tmp_path, max_entries=2)
+    assert cache.get(key("What is REG?")) == "Research Engineering Group"
+    assert cache.entries()[0]["hits"] == 2
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.schema import QueryBundle, TextNode
+
+from reginald.models.llama_index.ann_index import IVFIndex
+from reginald.models.llama_index.retriever import NumpyRetriever
+from reginald.models.llama_index.vector_store import MemmapVectorStore, embedding_matrix
+
+
+@pytest.fixture
+def embeddings() -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(50, 8))
+
+
+def build_index(embeddings: np.ndarray, embed_model, memmap: bool) -> VectorStoreIndex:
+    nodes = [
+        TextNode(text=f"Node {i}", id_=f"node-{i}", embedding=embedding.tolist())
+        for i, embedding in enumerate(embeddings)
+    ]
+    return VectorStoreIndex(
+        nodes,
+        storage_context=StorageContext.from_defaults(
+            vector_store=MemmapVectorStore() if memmap else None
+        ),
+        embed_model=embed_model,
+    )
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_numpy_retriever_matches_default(embeddings, embed_model, memmap):
+    """Test the top-k nodes and scores match llama-index's retriever."""
+    index = build_index(embeddings, embed_model, memmap)
+    numpy_retriever = NumpyRetriever.from_index(index, similarity_top_k=5)
+    default_retriever = index.as_retriever(similarity_top_k=5)
+
+    for query in np.random.default_rng(1).normal(size=(10, 8)):
+        query_bundle = QueryBundle(query_str="query", embedding=query.tolist())
+        expected = default_retriever.retrieve(query_bundle)
+        results = numpy_retriever.retrieve(query_bundle)
+        assert [n.node.node_id for n in results] == [n.node.node_id for n in expected]
+        assert [n.score for n in results] == pytest.approx(
+            [n.score for n in expected], abs=1e-5
+        )
+    assert embed_model.queries == []
+
+
+def test_numpy_retriever_with_ivf_index(embeddings, embed_model):
+    """Test probing every IVF list gives the exact results."""
+    index = build_index(embeddings, embed_model, memmap=True)
+    exact = NumpyRetriever.from_index(index, similarity_top_k=5)
+    ivf_index = IVFIndex.build(embedding_matrix(index.vector_store)[0], n_lists=4)
+    approximate = NumpyRetriever.from_index(
+        index, similarity_top_k=5, ann_index=ivf_index, n_probe=4
+    )
+
+    query_bundle = QueryBundle(query_str="query", embedding=embeddings[3].tolist())
+    assert [n.node.node_id for n in approximate.retrieve(query_bundle)] == [
+        n.node.node_id for n in exact.retrieve(query_bundle)
+    ]
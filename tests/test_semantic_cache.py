@@ -0,0 +1,49 @@
+import json
+
+from reginald.models.llama_index.semantic_cache import SemanticAnswerCache
+
+CONTEXT = ("llama", "reg", "build-1", 3, 512)
+
+
+def test_semantic_answer_cache(tmp_path):
+    """Test answers are reused for similar queries and the hits are logged."""
+    audit_log_path = tmp_path / "semantic_hits.jsonl"
+    cache = SemanticAnswerCache(
+        max_entries=2, threshold=0.9, audit_log_path=audit_log_path
+    )
+    cache.put([1.0, 0.0, 0.0], CONTEXT, "What is REG?", "Research Engineering")
+
+    assert cache.get([2.0, 0.2, 0.0], CONTEXT, "What's REG?") == "Research Engineering"
+    assert cache.get([1.0, 1.0, 0.0], CONTEXT, "Who is Reginald?") is None
+    assert cache.get([1.0, 0.0, 0.0], ("llama", "reg", "build-2", 3, 512), "") is None
+
+    hits = [json.loads(line) for line in audit_log_path.read_text().splitlines()]
+    assert [(h["message"], h["cached_message"]) for h in hits] == [
+        ("What's REG?", "What is REG?")
+    ]
+    assert 0.99 < hits[0]["similarity"] < 1
+
+    # the least recently used answer is evicted
+    cache.put([0.0, 1.0, 0.0], CONTEXT, "Who is Reginald?", "A bot")
+    cache.get([1.0, 0.0, 0.0], CONTEXT, "What is REG?")
+    cache.put([0.0, 0.0, 1.0], CONTEXT, "What is the handbook?", "A handbook")
+    assert cache.get([0.0, 1.0, 0.0], CONTEXT, "Who is Reginald?") is None
+    assert cache.get([1.0, 0.0, 0.0], CONTEXT, "What is REG?") == "Research Engineering"
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (3, 3)
+
+
+def test_semantic_answer_cache_contexts():
+    """Test only answers given in the same context are reused."""
+    other_context = ("llama", "reg", "build-2", 3, 512)
+    cache = SemanticAnswerCache(max_entries=2, threshold=0.9)
+    cache.put([1.0, 0.0, 0.0], CONTEXT, "What is REG?", "Research Engineering")
+    cache.put([1.0, 0.0, 0.0], other_context, "What is REG?", "REG")
+    assert cache.get([1.0, 0.0, 0.0], CONTEXT, "") == "Research Engineering"
+    assert cache.get([1.0, 0.0, 0.0], other_context, "") == "REG"
+
+    # evicting the only answer of a context leaves nothing to reuse in it
+    cache.put([0.0, 1.0, 0.0], CONTEXT, "Who is Reginald?", "A bot")
+    assert len(cache) == 2
+    assert cache.get([1.0, 0.0, 0.0], CONTEXT, "") is None
+    assert cache.get([1.0, 0.0, 0.0], other_context, "") == "REG"
+    assert cache.get([0.0, 1.0, 0.0], CONTEXT, "") == "A bot"
@@ -0,0 +1,45 @@
+import pytest
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+
+from reginald.models.llama_index.shards import merge_shards, shard_of
+
+
+def build_shard(documents, embed_model):
+    """In-memory partial index of some documents."""
+    index = VectorStoreIndex.from_documents(documents, embed_model=embed_model)
+    for document in documents:
+        index.docstore.set_document_hash(document.get_doc_id(), document.hash)
+    return index.storage_context
+
+
+def test_merge_shards():
+    """Test merging hash range shards gives one index of all the documents."""
+    embed_model = MockEmbedding(embed_dim=8)
+    documents = [Document(text=f"Page {i}", doc_id=f"page-{i}") for i in range(10)]
+    shards = [
+        build_shard(
+            [d for d in documents if shard_of(d.doc_id, 2) == shard], embed_model
+        )
+        for shard in range(2)
+    ]
+
+    index = merge_shards(
+        shards, StorageContext.from_defaults(), embed_model, batch_size=3
+    )
+
+    assert len(index.index_struct.nodes_dict) == 10
+    assert sorted(index.docstore.get_all_ref_doc_info()) == sorted(
+        d.doc_id for d in documents
+    )
+    assert index.docstore.get_document_hash("page-3") == documents[3].hash
+    node_id = index.index_struct.nodes_dict.popitem()[1]
+    assert index.vector_store.get(node_id) == pytest.approx([8**-0.5] * 8)
+
+    with pytest.raises(ValueError, match="more than one shard"):
+        merge_shards(
+            [shards[0], shards[0]],
+            StorageContext.from_defaults(),
+            embed_model,
+            batch_size=3,
+        )
@@ -0,0 +1,37 @@
+import pytest
+from llama_index.core import Document
+
+from reginald.models.llama_index.source_snapshot import SourceSnapshots
+
+pytest.importorskip("pyarrow")
+
+
+def test_round_trip(tmp_path):
+    """Test documents read back from a snapshot are those which were saved."""
+    documents = [
+        Document(
+            doc_id="https://handbook/a",
+            text="Page A",
+            metadata={"url": "https://handbook/a", "file_path": "a.md"},
+            excluded_embed_metadata_keys=["file_path"],
+            excluded_llm_metadata_keys=["file_path"],
+        ),
+        Document(doc_id="https://handbook/b", text="Page B", metadata={"n": 1}),
+    ]
+    snapshots = SourceSnapshots(tmp_path / "snapshots")
+    snapshots.save("handbook", documents, {"handbook": "abc123"})
+
+    loaded, source_shas = snapshots.load("handbook")
+
+    assert source_shas == {"handbook": "abc123"}
+    assert [d.doc_id for d in loaded] == [d.doc_id for d in documents]
+    assert [d.metadata for d in loaded] == [d.metadata for d in documents]
+    assert [d.excluded_embed_metadata_keys for d in loaded] == [
+        d.excluded_embed_metadata_keys for d in documents
+    ]
+    assert [d.hash for d in loaded] == [d.hash for d in documents]
+
+
+def test_missing_snapshot(tmp_path):
+    with pytest.raises(FileNotFoundError, match="No snapshot of handbook"):
+        SourceSnapshots(tmp_path).load("handbook")
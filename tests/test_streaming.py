@@ -0,0 +1,46 @@
+import hashlib
+
+from llama_index.core import Document, StorageContext
+from llama_index.core.embeddings import MockEmbedding
+
+from reginald.models.llama_index.streaming import build_index
+
+
+class HashEmbedding(MockEmbedding):
+    """Mock embedding model with a different embedding for each text,
+    which worker processes can rebuild from its config."""
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode()).digest()
+        return [float(byte) for byte in digest[: self.embed_dim]]
+
+
+def indexed_nodes(workers: int) -> list[tuple[str, str, list[float]]]:
+    """Document, text and embedding of each node of an index, in order."""
+    documents = [
+        Document(
+            text=" ".join(f"Page {i} sentence {j}." for j in range(1 + 300 * (i % 3))),
+            doc_id=f"page-{i}",
+        )
+        for i in range(9)
+    ]
+    index = build_index(
+        iter(documents),
+        storage_context=StorageContext.from_defaults(),
+        embed_model=HashEmbedding(embed_dim=8),
+        batch_size=2,
+        workers=workers,
+    )
+    nodes = index.docstore.get_nodes(list(index.index_struct.nodes_dict))
+    return [
+        (node.ref_doc_id, node.get_content(), index.vector_store.get(node.node_id))
+        for node in nodes
+    ]
+
+
+def test_build_with_worker_processes():
+    """Test building in worker processes gives the same index, in order."""
+    nodes = indexed_nodes(workers=1)
+    assert len(nodes) > 9
+    assert len({tuple(embedding) for _, _, embedding in nodes}) == len(nodes)
+    assert indexed_nodes(workers=2) == nodes
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from llama_index.core import StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from reginald.models.llama_index.vector_store import EMBEDDINGS_FNAME, MemmapVectorStore
+
+EMBEDDINGS = [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [0.0, 0.0, 3.0], [1.0, 1.0, 0.0]]
+
+
+def nodes(start: int = 0, stop: int = len(EMBEDDINGS)) -> list[TextNode]:
+    return [
+        TextNode(text=f"Node {i}", id_=f"node-{i}", embedding=EMBEDDINGS[i])
+        for i in range(start, stop)
+    ]
+
+
+def query(store: MemmapVectorStore, embedding: list[float], k: int = 2):
+    result = store.query(
+        VectorStoreQuery(query_embedding=embedding, similarity_top_k=k)
+    )
+    return result.ids, result.similarities
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_memmap_vector_store_round_trip(spill, tmp_path):
+    """Test a store gives the same results after persisting and loading it."""
+    spill_path = tmp_path / "build" / "embeddings.spill"
+    if spill:
+        store = MemmapVectorStore.spilling_to(spill_path)
+        # embeddings are appended to the spill file batch by batch
+        store.add(nodes(0, 2))
+        store.add(nodes(2, 4))
+        assert isinstance(store.embeddings, np.memmap)
+        assert spill_path.stat().st_size == 4 * 3 * 4
+    else:
+        store = MemmapVectorStore()
+        store.add(nodes())
+
+    ids, similarities = query(store, [1.0, 0.5, 0.0])
+    assert ids == ["node-3", "node-0"]
+    assert similarities == pytest.approx([3 / 10**0.5, 2 / 5**0.5])
+
+    persist_dir = tmp_path / "index"
+    store.persist(str(persist_dir / "default__vector_store.json"))
+    assert not spill_path.exists()
+    assert (persist_dir / EMBEDDINGS_FNAME).exists()
+
+    loaded = MemmapVectorStore.from_persist_dir(persist_dir)
+    assert isinstance(loaded.embeddings, np.memmap)
+    assert loaded.node_ids == [f"node-{i}" for i in range(4)]
+    assert loaded.get("node-1") == pytest.approx([0.0, 1.0, 0.0])
+    assert query(loaded, [1.0, 0.5, 0.0]) == (ids, pytest.approx(similarities))
+
+    loaded.delete_nodes(["node-3"])
+    assert query(loaded, [1.0, 0.5, 0.0], k=4)[0] == ["node-0", "node-1", "node-2"]
+
+
+def test_memmap_vector_store_index(tmp_path):
+    """Test an index with a memmap vector store can be persisted and loaded."""
+    embed_model = MockEmbedding(embed_dim=3)
+    index = VectorStoreIndex(
+        nodes(),
+        storage_context=StorageContext.from_defaults(vector_store=MemmapVectorStore()),
+        embed_model=embed_model,
+    )
+    index.storage_context.persist(persist_dir=tmp_path)
+
+    loaded = load_index_from_storage(
+        StorageContext.from_defaults(
+            persist_dir=tmp_path,
+            vector_store=MemmapVectorStore.from_persist_dir(tmp_path),
+        ),
+        embed_model=embed_model,
+    )
+    retrieved = loaded.as_retriever(similarity_top_k=1).retrieve("Node 2")
+    # the mock query embedding is (0.5, 0.5, 0.5), closest to node-3
+    assert [(n.node.node_id, n.node.text) for n in retrieved] == [("node-3", "Node 3")]